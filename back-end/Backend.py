@@ -1,31 +1,51 @@
+from __future__ import annotations
+
 # Need to install:
 # pip install psycopg2-binary scikit-learn pandas numpy openpyxl flask-cors python-dotenv
+# Optional: pip install pyinstrument   (on-demand request profiling, see ADMIN_TOKEN)
+#           pip install pyarrow        (Parquet / Arrow IPC uploads, training snapshots)
+#           pip install duckdb         (KPI_ENGINE=duckdb, see columnar.py)
 
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 import os
-from datetime import datetime, date
+import sys
+import hmac
+import tempfile
+import hashlib
+import json
+import queue
+import random
+import re
+import threading
+import time
+import tracemalloc
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from datetime import datetime
 import bcrypt
 import io
-from openpyxl import load_workbook
-import pandas as pd
-import numpy as np
-import io
 import csv
-from openpyxl import load_workbook
 import psycopg2
+import psycopg2.errors
 from psycopg2.extras import RealDictCursor
 
-# ML
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import OneHotEncoder
-from sklearn.compose import ColumnTransformer
-from sklearn.pipeline import Pipeline
-from sklearn.impute import SimpleImputer
-from sklearn.metrics import roc_auc_score
-from catboost import CatBoostClassifier, Pool
+import columnar
+import ingest
+import metrics
+import schema
+import snapshots
+from schema import SCREEN_HEADERS
+
+# pandas / numpy / scikit-learn / catboost / openpyxl are imported inside the
+# functions that train, score or parse spreadsheets, so the KPI endpoints
+# start without loading the ML stack.
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # -------------------------------------------------
@@ -41,6 +61,7 @@ CORS(
     supports_credentials=True,
     methods=["GET", "POST", "OPTIONS"],
     allow_headers=["Content-Type", "Authorization"],
+    expose_headers=["Retry-After", "X-Data-Stale"],
 )
 
 
@@ -53,6 +74,7 @@ def add_cors_headers(resp):
         resp.headers["Access-Control-Allow-Credentials"] = "true"
         resp.headers["Access-Control-Allow-Headers"] = "Content-Type, Authorization"
         resp.headers["Access-Control-Allow-Methods"] = "GET,POST,OPTIONS"
+        resp.headers["Access-Control-Expose-Headers"] = "Retry-After, X-Data-Stale"
     return resp
 
 
@@ -61,179 +83,406 @@ def preflight(any_path):
     return ("", 204)
 
 
-conn = psycopg2.connect(
+DB_PARAMS = dict(
     dbname=os.getenv("DB_NAME"),
     user=os.getenv("DB_USER"),
     password=os.getenv("DB_PASSWORD"),
     host=os.getenv("DB_HOST"),
     port=os.getenv("DB_PORT"),
 )
-conn.autocommit = True
-cursor = conn.cursor()
+_conn = None
+_cursor = None
+_CONN_LOCK = threading.Lock()
+
+
+def get_conn():
+    """Shared autocommit connection, opened on first use and reopened if closed."""
+    global _conn, _cursor
+    if _conn is None or _conn.closed:
+        with _CONN_LOCK:
+            if _conn is None or _conn.closed:
+                new_conn = psycopg2.connect(**DB_PARAMS)
+                new_conn.autocommit = True
+                _cursor = new_conn.cursor()
+                _conn = new_conn
+    return _conn
+
+
+def get_cursor():
+    """Module-wide cursor on get_conn() (auth, upload and /tenants/active)."""
+    get_conn()
+    return _cursor
+
 
 # -------------------------------------------------
-# Schema (matches your manual load)
+# Metrics (exposed at /metrics in Prometheus text format)
 # -------------------------------------------------
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS transacts (
-    pscode TEXT,
-    tscode TEXT PRIMARY KEY,
-    uscode TEXT,
-    screenresult TEXT,
-    screenvendor TEXT,
-    dnumnsf INTEGER,
-    dnumlate INTEGER,
-    davgdayslate INTEGER,
-    sevicted TEXT,
-    smoveoutreason TEXT,
-    drentwrittenoff NUMERIC,
-    dnonrentwrittenoff NUMERIC,
-    damoutcollections NUMERIC,
-    srenewed TEXT,
-    srent NUMERIC,
-    sfulfilledterm TEXT,
-    dincome NUMERIC,
-    dtleasefrom DATE,
-    dtleaseto DATE,
-    dtmovein DATE,
-    dtmoveout DATE,
-    dwocount INTEGER,
-    dtroomearlyout DATE,
-    sempcompany TEXT,
-    sempposition TEXT,
-    sflex TEXT,
-    sleap TEXT,
-    sprevzip TEXT,
-    daypaid INTEGER,
-    spaymentsource TEXT,
-    dpaysourcechange INTEGER
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS screening (
-    appcredid TEXT,
-    appcreddate DATE,
-    appid TEXT,
-    category TEXT,
-    city TEXT,
-    companycode TEXT,
-    companyname TEXT,
-    creditrun BOOLEAN,
-    date DATE,
-    propertyid TEXT,
-    policy TEXT,
-    posemployment TEXT,
-    poshousing TEXT,
-    propname TEXT,
-    reasonone TEXT,
-    reasontwo TEXT,
-    reasonthree TEXT,
-    rentownhist TEXT,
-    origscore TEXT,
-    finscore TEXT,
-    scorecat TEXT,
-    scoremodel INTEGER,
-    marketsource TEXT,
-    state TEXT,
-    zip TEXT,
-    age NUMERIC,
-    currempmon NUMERIC,
-    currempyear NUMERIC,
-    currresmon NUMERIC,
-    currresyear NUMERIC,
-    income NUMERIC,
-    primincome NUMERIC,
-    addincome NUMERIC,
-    riskscore NUMERIC,
-    prevempmon NUMERIC,
-    prevempyear NUMERIC,
-    prevresmon NUMERIC,
-    prevresyear NUMERIC,
-    rent NUMERIC,
-    rentincratio NUMERIC,
-    debtincratio NUMERIC,
-    debtcredratio NUMERIC,
-    voyappcode TEXT PRIMARY KEY,
-    voypropname TEXT,
-    voypropcode TEXT,
-    hascpmess TEXT,
-    checkmes1 TEXT,
-    checkmes2 TEXT,
-    hasconsstmt TEXT,
-    studdebt TEXT,
-    meddebt TEXT,
-    totscordebt NUMERIC,
-    totdebt NUMERIC,
-    itemrev1 TEXT,
-    itemrev2 TEXT,
-    itemrev3 TEXT,
-    revrepack TEXT,
-    appid2 TEXT,
-    appscore TEXT,
-    appmoninc TEXT,
-    apptotdebt NUMERIC,
-    avgriskscore NUMERIC,
-    twnreport TEXT,
-    appstatus TEXT
-);
-""")
-
-cursor.execute("""
-CREATE TABLE IF NOT EXISTS meta_updates (
-    id SERIAL PRIMARY KEY,
-    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
-);
-""")
-conn.commit()
-
-# Helpful indexes for WHERE clauses in KPI queries / filters
-def ensure_indexes():
-    # NOTE: CREATE INDEX IF NOT EXISTS is cheap if it already exists.
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_pscode ON transacts (pscode);"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_screenresult ON transacts (screenresult);"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_sevicted ON transacts (sevicted);"
-    )
-    # dates used to bucket: these help planner even with coalesce/date_trunc
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_dates_movein ON transacts (dtmovein);"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_dates_leasefrom ON transacts (dtleasefrom);"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_dates_roomout ON transacts (dtroomearlyout);"
-    )
-    cursor.execute(
-        "CREATE INDEX IF NOT EXISTS idx_transacts_dates_leaseto ON transacts (dtleaseto);"
-    )
-    conn.commit()
+HTTP_REQUEST_SECONDS = metrics.Histogram(
+    "http_request_duration_seconds",
+    "Request latency by route (time to response headers for streamed bodies).",
+    ("method", "route", "status"),
+)
+HTTP_HANDLED_ERRORS = metrics.Counter(
+    "http_handled_errors_total",
+    "Exceptions caught inside a route and answered with a fallback payload.",
+    ("route",),
+)
+DB_QUERY_SECONDS = metrics.Histogram(
+    "db_query_duration_seconds",
+    "SQL execution time by named query.",
+    ("query",),
+    buckets=metrics.DEFAULT_BUCKETS + (30.0, 60.0),
+)
+DB_QUERY_ERRORS = metrics.Counter(
+    "db_query_errors_total",
+    "SQL statements that raised, by named query.",
+    ("query",),
+)
+MODEL_CACHE_REQUESTS = metrics.Counter(
+    "model_cache_requests_total",
+    "Model payload cache lookups by cache and result (hit/artifact/miss).",
+    ("cache", "result"),
+)
+MODEL_TRAINING_SECONDS = metrics.Histogram(
+    "model_training_duration_seconds",
+    "Time to recompute a model payload (load, train, score, assemble).",
+    ("model",),
+    buckets=metrics.SLOW_BUCKETS,
+)
+MODEL_STAGE_SECONDS = metrics.Histogram(
+    "model_stage_duration_seconds",
+    "Time per stage of a model payload computation.",
+    ("model", "stage"),
+    buckets=metrics.SLOW_BUCKETS,
+)
+SLOW_QUERIES = metrics.Counter(
+    "db_slow_queries_total",
+    "Statements slower than SLOW_QUERY_MS, by named query.",
+    ("query",),
+)
+SINGLEFLIGHT_REQUESTS = metrics.Counter(
+    "singleflight_requests_total",
+    "Calls through the single-flight layer by group and result (executed = ran "
+    "the work, shared = waited for an identical call already in flight).",
+    ("group", "result"),
+)
+ML_ADMISSION = metrics.Counter(
+    "ml_admission_total",
+    "Model requests that needed a retrain, by model and outcome (served = "
+    "answered within ML_ADMISSION_WAIT_S, timeout = still training, "
+    "rejected = retrain queue full).",
+    ("model", "outcome"),
+)
+
+
+def _route_label():
+    rule = request.url_rule
+    return rule.rule if rule is not None else "unmatched"
+
+
+@app.before_request
+def _start_request_timer():
+    g.request_t0 = time.perf_counter()
+
+
+@app.after_request
+def _record_request_metrics(resp):
+    t0 = g.get("request_t0")
+    if t0 is not None:
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            route=_route_label(),
+            status=resp.status_code,
+        )
+    return resp
+
+
+def _count_handled_error():
+    HTTP_HANDLED_ERRORS.inc(route=_route_label())
 
-ensure_indexes()
 
 # -------------------------------------------------
-# Users / Auth
+# Single-flight
+# -------------------------------------------------
+# When the data version changes every open dashboard misses at once. Calls
+# with the same key that overlap in time run once: the first caller does the
+# work, the rest wait for it and share its result (or exception). Nothing is
+# kept after the call returns; caching stays with the callers.
+_FLIGHTS = {}
+_FLIGHTS_LOCK = threading.Lock()
+
+
+def _flight_key(params):
+    """Hashable form of a query's parameter list (lists become tuples)."""
+    return tuple(tuple(v) if isinstance(v, list) else v for v in params or ())
+
+
+def _single_flight(group, key, fn):
+    with _FLIGHTS_LOCK:
+        call = _FLIGHTS.get((group, key))
+        leader = call is None
+        if leader:
+            call = _FLIGHTS[(group, key)] = {"done": threading.Event(), "result": None, "error": None}
+
+    if not leader:
+        SINGLEFLIGHT_REQUESTS.inc(group=group, result="shared")
+        call["done"].wait()
+        if call["error"] is not None:
+            raise call["error"]
+        return call["result"]
+
+    SINGLEFLIGHT_REQUESTS.inc(group=group, result="executed")
+    try:
+        call["result"] = fn()
+        return call["result"]
+    except BaseException as e:
+        call["error"] = e
+        raise
+    finally:
+        with _FLIGHTS_LOCK:
+            del _FLIGHTS[(group, key)]
+        call["done"].set()
+
+
+# -------------------------------------------------
+# Slow-query log
+# -------------------------------------------------
+# Statements slower than SLOW_QUERY_MS (<= 0 disables) are written to the
+# slow_queries table with their parameters; SLOW_QUERY_EXPLAIN_RATE of the
+# read-only ones are re-run under EXPLAIN (ANALYZE, BUFFERS) to capture a plan.
+# Both happen on a background thread with its own connection, so the request
+# that hit the slow query only pays for a queue put.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_EXPLAIN_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_RATE", "0.1"))
+
+_SLOW_LOG_QUEUE = queue.Queue(maxsize=1000)
+_SLOW_LOG_WORKER = None
+_SLOW_LOG_LOCK = threading.Lock()
+
+
+def _sql_fingerprint(q):
+    """Stable id for a statement's shape: comments/whitespace/literals stripped."""
+    text = re.sub(r"--[^\n]*", " ", q)
+    text = re.sub(r"'(?:[^']|'')*'", "?", text)
+    text = re.sub(r"\b\d+(?:\.\d+)?\b", "?", text)
+    text = " ".join(text.split()).rstrip(";").strip().lower()
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16], text
+
+
+def _slow_log_worker():
+    log_conn = None
+    while True:
+        entry = _SLOW_LOG_QUEUE.get()
+        try:
+            if log_conn is None or log_conn.closed:
+                log_conn = psycopg2.connect(**DB_PARAMS)
+                log_conn.autocommit = True
+            plan = None
+            with log_conn.cursor() as cur:
+                if entry["explain"]:
+                    try:
+                        cur.execute(
+                            "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + entry["statement"],
+                            entry["params"],
+                        )
+                        plan = json.dumps(cur.fetchone()[0])
+                    except Exception as e:
+                        print(f"Slow-query EXPLAIN failed for {entry['name']}: {e}")
+                cur.execute(
+                    """
+                    INSERT INTO slow_queries
+                        (query_name, fingerprint, statement, params, duration_ms, plan)
+                    VALUES (%s, %s, %s, %s, %s, %s)
+                    """,
+                    (
+                        entry["name"],
+                        entry["fingerprint"],
+                        entry["normalized"],
+                        json.dumps(entry["params"], default=str),
+                        entry["duration_ms"],
+                        plan,
+                    ),
+                )
+        except Exception as e:
+            print(f"Slow-query log error: {e}")
+            try:
+                if log_conn is not None:
+                    log_conn.close()
+            except Exception:
+                pass
+            log_conn = None
+        finally:
+            _SLOW_LOG_QUEUE.task_done()
+
+
+def _log_slow_query(name, q, params, seconds):
+    global _SLOW_LOG_WORKER
+    SLOW_QUERIES.inc(query=name)
+    fingerprint, normalized = _sql_fingerprint(q)
+    duration_ms = seconds * 1000.0
+    print(f"Slow query {name} [{fingerprint}] {duration_ms:.0f} ms")
+
+    is_read = normalized.startswith(("select", "with"))
+    if _SLOW_LOG_WORKER is None:
+        with _SLOW_LOG_LOCK:
+            if _SLOW_LOG_WORKER is None:
+                _SLOW_LOG_WORKER = threading.Thread(
+                    target=_slow_log_worker, name="slow-query-log", daemon=True
+                )
+                _SLOW_LOG_WORKER.start()
+    try:
+        _SLOW_LOG_QUEUE.put_nowait({
+            "name": name,
+            "fingerprint": fingerprint,
+            "normalized": normalized,
+            "statement": q,
+            "params": params,
+            "duration_ms": duration_ms,
+            "explain": is_read and random.random() < SLOW_QUERY_EXPLAIN_RATE,
+        })
+    except queue.Full:
+        print("Slow-query log queue full; dropping entry")
+
+
+@contextmanager
+def _timed_query(name, q=None, params=None):
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        DB_QUERY_ERRORS.inc(query=name)
+        raise
+    finally:
+        elapsed = time.perf_counter() - t0
+        DB_QUERY_SECONDS.observe(elapsed, query=name)
+        if q is not None and 0 < SLOW_QUERY_MS <= elapsed * 1000.0:
+            _log_slow_query(name, q, params, elapsed)
+
+
+def _execute(cur, name, q, params=None):
+    """cur.execute(q, params), recorded under db_query_duration_seconds{query=name}."""
+    with _timed_query(name, q, params):
+        cur.execute(q, params)
+
+
+def _executemany(cur, name, q, seq):
+    # parameters aren't logged for batches, only the batch size
+    with _timed_query(name, q, None):
+        cur.executemany(q, seq)
+
+
+def _read_sql(name, q, params=None):
+    """pd.read_sql on the shared connection, timed like _execute."""
+    import pandas as pd
+
+    with _timed_query(name, q, params):
+        return pd.read_sql(q, get_conn(), params=params)
+
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+# -------------------------------------------------
+# Admin access + on-demand request profiling
 # -------------------------------------------------
-def ensure_users_table():
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id SERIAL PRIMARY KEY,
-            name VARCHAR(100) NOT NULL,
-            email VARCHAR(255) UNIQUE NOT NULL,
-            password_hash VARCHAR(255) NOT NULL,
-            role VARCHAR(50) DEFAULT 'end-user',
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    conn.commit()
-
-ensure_users_table()
+# Admin-only features are off unless ADMIN_TOKEN is set; callers send it
+# in the X-Admin-Token header.
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Profiles are written here when set; otherwise returned as the response body.
+PROFILE_DIR = os.getenv("PROFILE_DIR")
+PROFILE_INTERVAL_S = float(os.getenv("PROFILE_INTERVAL_MS", "1")) / 1000.0
+PROFILE_FORMATS = ("speedscope", "html")
+# WSGI environ flag the CLI sets on the requests it makes through app.test_client()
+CLI_ENVIRON_KEY = "eviction_risk.cli"
+
+
+def _is_admin():
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied, ADMIN_TOKEN)
+
+
+def _require_admin():
+    """None if the caller is an admin, otherwise the error response to return."""
+    if request.environ.get(CLI_ENVIRON_KEY):
+        # In-process request from the CLI (see _cli_ingest); not settable over HTTP
+        return None
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin features are disabled (ADMIN_TOKEN not set)"}), 404
+    if not _is_admin():
+        return jsonify({"error": "Admin token required"}), 403
+    return None
+
+
+@app.before_request
+def _start_profiler():
+    """
+    Profile this request with pyinstrument when asked via the X-Profile header
+    or ?_profile= query flag ("speedscope" or "html"). Costs nothing when
+    ADMIN_TOKEN is unset or no flag is sent.
+    """
+    if not ADMIN_TOKEN:
+        return None
+    fmt = request.headers.get("X-Profile") or request.args.get("_profile")
+    if not fmt:
+        return None
+
+    denied = _require_admin()
+    if denied is not None:
+        return denied
+    fmt = fmt.strip().lower()
+    if fmt in ("1", "true", "yes"):
+        fmt = "speedscope"
+    if fmt not in PROFILE_FORMATS:
+        return jsonify({"error": f"Unknown profile format; use one of {', '.join(PROFILE_FORMATS)}"}), 400
+    try:
+        from pyinstrument import Profiler
+    except ImportError:
+        return jsonify({"error": "Profiling needs pyinstrument (pip install pyinstrument)"}), 501
+
+    profiler = Profiler(interval=PROFILE_INTERVAL_S, async_mode="disabled")
+    profiler.start()
+    g.profiler = profiler
+    g.profile_format = fmt
+    return None
+
+
+@app.after_request
+def _finish_profiler(resp):
+    profiler = g.pop("profiler", None)
+    if profiler is None:
+        return resp
+    profiler.stop()
 
+    from pyinstrument.renderers import HTMLRenderer, SpeedscopeRenderer
+
+    fmt = g.pop("profile_format")
+    if fmt == "html":
+        body, ext, mimetype = profiler.output(HTMLRenderer()), "html", "text/html"
+    else:
+        body, ext, mimetype = profiler.output(SpeedscopeRenderer()), "speedscope.json", "application/json"
+
+    if PROFILE_DIR:
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        route = _route_label().strip("/").replace("/", "_").replace("<", "").replace(">", "") or "root"
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        path = os.path.join(PROFILE_DIR, f"{stamp}_{route}.{ext}")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(body)
+        resp.headers["X-Profile-File"] = path
+        return resp
+
+    # No PROFILE_DIR: the profile replaces the response body
+    profiled = Response(body, mimetype=mimetype)
+    profiled.headers["X-Profiled-Status"] = str(resp.status_code)
+    return profiled
+
+
+# -------------------------------------------------
+# Users / Auth
+# -------------------------------------------------
 @app.route('/register', methods=['POST', 'OPTIONS'])
 def register():
     if request.method == 'OPTIONS':
@@ -250,13 +499,13 @@ def register():
     hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf8')
 
     try:
-        cursor.execute("""
+        get_cursor().execute("""
             INSERT INTO users (name, email, password_hash)
             VALUES (%s, %s, %s)
             RETURNING id, name, email, role
         """, (name, email, hashed_pw))
-        conn.commit()
-        new_user = cursor.fetchone()
+        get_conn().commit()
+        new_user = get_cursor().fetchone()
         return jsonify({
             'id': new_user[0],
             'name': new_user[1],
@@ -264,7 +513,7 @@ def register():
             'role': new_user[3]
         }), 201
     except psycopg2.Error as e:
-        conn.rollback()
+        get_conn().rollback()
         if 'unique' in str(e).lower():
             return jsonify({'error': 'Email exists'}), 409
         return jsonify({'error': 'Database error'}), 500
@@ -279,11 +528,11 @@ def login():
     if not email or not password:
         return jsonify({'error': 'Missing either email or password'}), 400
 
-    cursor.execute(
+    get_cursor().execute(
         "SELECT id, name, email, password_hash, role FROM users WHERE email = %s",
         (email,)
     )
-    user = cursor.fetchone()
+    user = get_cursor().fetchone()
 
     if not user:
         return jsonify({'error': 'Invalid credentials'}), 401
@@ -303,239 +552,895 @@ def login():
 # Helpers
 # -------------------------------------------------
 PRIMARY_KEY = None
-DATE_COLUMNS = ['dtleasefrom', 'dtleaseto', 'dtmovein', 'dtmoveout', 'dtroomearlyout']
 
+# transacts merges on the partitioned primary key (see schema.py); a tenant
+# whose dates moved them to another month is matched on tscode alone and
+# moved out of the old partition.
+TRANSACTS_CONFLICT_KEY = ("tscode", "bucket_month")
+UPLOAD_MERGE_KEYS = {
+    "transacts": (TRANSACTS_CONFLICT_KEY, ("tscode",)),
+    "screening": (("voyappcode",), None),
+}
+UPLOAD_BATCH_ROWS = 1000
+# CSV uploads are parsed in byte-range chunks of about INGEST_CHUNK_MB, spread
+# over INGEST_WORKERS processes once there is more than one chunk.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 1)))
+INGEST_CHUNK_BYTES = int(float(os.getenv("INGEST_CHUNK_MB", "8")) * 1024 * 1024)
+# Parquet / Arrow uploads are cleaned in one vectorized pass, then merged in
+# slices of this many rows.
+ARROW_BATCH_ROWS = int(os.getenv("ARROW_BATCH_ROWS", "100000"))
+# Years known to have a partition (or to belong in transacts_default)
+_TRANSACTS_PARTITION_YEARS = set()
+# /upload?mode=replace (admin token required) swaps in the refreshed table
+# under a lock_timeout, retrying with backoff while long readers hold the
+# live table.
+REFRESH_LOCK_TIMEOUT_MS = int(os.getenv("REFRESH_LOCK_TIMEOUT_MS", "2000"))
+REFRESH_SWAP_ATTEMPTS = int(os.getenv("REFRESH_SWAP_ATTEMPTS", "10"))
+# Batch upload stage tables older than this are leftovers of a killed worker
+# and are dropped before the next batch (ingest.drop_stale_upload_stages).
+UPLOAD_STAGE_MAX_AGE_S = float(os.getenv("UPLOAD_STAGE_MAX_AGE_HOURS", "24")) * 3600
+
+
+def _ensure_transacts_partitions(cur, years):
+    """Create missing yearly transacts partitions in the upload's transaction."""
+    missing = set(years) - _TRANSACTS_PARTITION_YEARS
+    if not missing:
+        return
+    created = schema.ensure_transacts_partitions(cur, missing)
+    if created:
+        print(f"Created transacts partitions for {', '.join(map(str, created))}")
+    _TRANSACTS_PARTITION_YEARS.update(missing)
+
+
+def _merge_batch(cur, dataName, columns, packed, stats):
+    """Stage and merge one packed upload batch (see ingest.py), adding to `stats`."""
+    if dataName == "transacts":
+        _ensure_transacts_partitions(cur, packed["years"])
+    key, moved_key = UPLOAD_MERGE_KEYS[dataName]
+    with _timed_query("upload_merge"):
+        ingest.merge_packed(cur, dataName, columns, packed, key, stats, moved_key=moved_key)
+
+
+def _log_ingest_rejects(cur, source, table_name, rejects):
+    if rejects:
+        _executemany(cur, "ingest_rejects_insert", schema.INSERT_REJECT_SQL,
+                     [(source, table_name, key, col, raw) for key, col, raw in rejects])
+
+
+# --- Uploads ledger: skip files that were already ingested ---
+def _ingested_upload(kind, digest):
+    """
+    Ledger entry for an identical `kind` file whose rows are still current
+    (no later upload of that kind wrote anything), else None.
+    """
+    with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+        _execute(cur, "uploads_lookup", """
+            SELECT u.filename, u.uploaded_at
+            FROM uploads u
+            WHERE u.kind = %s
+              AND u.sha256 = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM uploads later
+                  WHERE later.kind = u.kind
+                    AND later.uploaded_at > u.uploaded_at
+                    AND later.rows_written > 0
+              )
+        """, (kind, digest))
+        return cur.fetchone()
+
+
+def _record_upload(cur, kind, digest, filename, size_bytes, rows_written, rejected_values):
+    # clock_timestamp(), not NOW(): files merged by one batch transaction
+    # still get distinct, ordered upload times for _ingested_upload.
+    _execute(cur, "uploads_record", """
+        INSERT INTO uploads (kind, sha256, filename, size_bytes, rows_written, rejected_values, uploaded_at)
+        VALUES (%s, %s, %s, %s, %s, %s, clock_timestamp())
+        ON CONFLICT (kind, sha256) DO UPDATE SET
+            filename = EXCLUDED.filename,
+            rows_written = EXCLUDED.rows_written,
+            rejected_values = EXCLUDED.rejected_values,
+            uploaded_at = EXCLUDED.uploaded_at
+    """, (kind, digest, filename, size_bytes, rows_written, rejected_values))
+
+
+def _spool_upload(stream, filename, max_bytes=None):
+    """
+    Copy an uploaded file to a temp file in 1 MiB blocks, hashing as it goes,
+    so multi-GB exports are never held in memory and parser workers can read
+    their byte ranges directly. Returns (path, sha256 hex, size in bytes);
+    the caller deletes the file. Raises _UploadError (and deletes the partial
+    file) once more than max_bytes have been read.
+    """
+    sha = hashlib.sha256()
+    size = 0
+    suffix = os.path.splitext(filename)[1]
+    with tempfile.NamedTemporaryFile(prefix="upload_", suffix=suffix, delete=False) as out:
+        try:
+            for block in iter(lambda: stream.read(1024 * 1024), b""):
+                size += len(block)
+                if max_bytes is not None and size > max_bytes:
+                    raise _UploadTooLarge(f"{filename} is larger than {max_bytes} bytes")
+                sha.update(block)
+                out.write(block)
+        except BaseException:
+            out.close()
+            os.unlink(out.name)
+            raise
+    return out.name, sha.hexdigest(), size
 
-def _normalize_row(row: dict):
-    """Trim keys/values, empty->None, and parse dates (mm/dd/yyyy)."""
-    row = {str(k).strip().lower(): (str(v).strip() if (v is not None and str(v).strip() != '') else None)
-           for k, v in row.items()}
-    for col in DATE_COLUMNS:
-        if row.get(col):
-            try:
-                row[col] = datetime.strptime(row[col], "%m/%d/%Y").date()
-            except Exception:
-                try:
-                    # Try ISO style if already clean
-                    if isinstance(row[col], (datetime, date)):
-                        row[col] = row[col]
-                    else:
-                        row[col] = datetime.fromisoformat(str(row[col])).date()
-                except Exception:
-                    row[col] = None
-    return row
 
 # --- Mapping of names for screening data ---
+# Lowercase all keys in the mapping for screening
 SCREEN_MAPPING = {
-    "screening": {
-        "Applicant Credit Applicant ID": "appcredid",
-        "Applicant Credit Date": "appcreddate",
-        "Applicant ID": "appid",
-        "Category": "category",
-        "City": "city",
-        "Company Code": "companycode",
-        "Company Name": "companyname",
-        "Credit Run": "creditrun",
-        "Date": "date",
-        "Property ID": "propertyid",
-        "Policy": "policy",
-        "Positive Employment": "posemployment",
-        "Positive Housing": "poshousing",
-        "Property Name": "propname",
-        "Reason 1": "reasonone",
-        "Reason 2": "reasontwo",
-        "Reason 3": "reasonthree",
-        "Rent Own History": "rentownhist",
-        "Original Score": "origscore",
-        "Final Score": "finscore",
-        "Score Category": "scorecat",
-        "Score Model": "scoremodel",
-        "Market Source": "marketsource",
-        "State": "state",
-        "Zip": "zip",
-        "Age" : "age",
-        "Current Emp (Months)": "currempmon",
-        "Current Emp (Years)": "currempyear",
-        "Current Res (Months)": "currresmon",
-        "Current Res (Years)": "currresyear",
-        "Income": "income",
-        "Primary Income": "primincome",
-        "Additional Income": "addincome",
-        "Risk Score": "riskscore",
-        "Previous Emp (Months)": "prevempmon",
-        "Previous Emp (Years)": "prevempyear",
-        "Previous Res (Months)": "prevresmon",
-        "Previous Res (Years)": "prevresyear",
-        "Rent": "rent",
-        "Rent To Income Ratio (%)": "rentincratio",
-        "Debt To Income Ratio (%)": "debtincratio",
-        "Debt To Credit Ratio (%)": "debtcredratio",
-        "Voyager Applicant Code": "voyappcode",
-        "Voyager Property Name": "voypropname",
-        "Voyager Property Code" : "voypropcode",
-        "Has CheckPoint Msgs": "hascpmess",
-        "Checkpoint Message 1": "checkmes1",
-        "Checkpoint Message 2": "checkmes2",
-        "Has Consumer Stmt": "hasconsstmt",
-        "Student Debt": "studdebt",
-        "Medical Debt": "meddebt",
-        "Total Scorable Debt": "totscordebt",
-        "Total Debt": "totdebt",
-        "Item To Review 1": "itemrev1",
-        "Item To Review 2": "itemrev2",
-        "Item To Review 3": "itemrev3",
-        "Review Report Acknowledgement": "revrepack",
-        "Application ID": "appid2",
-        "Application Score": "appscore",
-        "Application Monthly Income": "appmoninc",
-        "Application Total Debt (Policy)": "apptotdebt",
-        "Avg Risk Score": "avgriskscore",
-        "TWN Report Found": "twnreport",
-        "Applicant Status": "appstatus"
-    }
+    "screening": {k.lower(): v for k, v in SCREEN_HEADERS.items()}
 }
 
-# Lowercase all keys in the mapping for screening
-SCREEN_MAPPING["screening"] = {
-    k.lower(): v for k, v in SCREEN_MAPPING["screening"].items()
-}
+# -------------------------------------------------
+# Post-ingest maintenance: planner statistics and bloat
+# -------------------------------------------------
+# Autovacuum analyzes a table only after about 10% of it changed, on its own
+# schedule, and never analyzes a partitioned parent such as transacts, whose
+# statistics the planner uses for joins like t.tscode = s.voyappcode. So an
+# upload that changed at least ANALYZE_CHANGE_FRACTION of a table (by the
+# planner's last row estimate) ANALYZEs it before responding. If dead rows
+# left by updated / moved rows pass VACUUM_DEAD_FRACTION of the table (and
+# VACUUM_MIN_DEAD_ROWS), it also gets a VACUUM, queued to a background
+# thread with its own connection (like the slow-query log), since on a large
+# transacts that can take minutes. A fraction <= 0 turns that step off.
+# Every run is written to maintenance_log.
+ANALYZE_CHANGE_FRACTION = float(os.getenv("ANALYZE_CHANGE_FRACTION", "0.1"))
+VACUUM_DEAD_FRACTION = float(os.getenv("VACUUM_DEAD_FRACTION", "0.2"))
+VACUUM_MIN_DEAD_ROWS = int(os.getenv("VACUUM_MIN_DEAD_ROWS", "1000"))
+MAINTENANCE_TABLES = ("transacts", "screening")
+
+_VACUUM_QUEUE = queue.Queue(maxsize=100)
+_VACUUM_PENDING = set()
+_VACUUM_WORKER = None
+_VACUUM_LOCK = threading.Lock()
+
+# The table and, if partitioned, every partition below it
+TABLE_HEALTH_SQL = """
+    WITH t AS (
+        SELECT %(table)s::regclass AS relid
+        UNION SELECT relid FROM pg_partition_tree(%(table)s::regclass)
+    )
+    SELECT
+        c.relname,
+        c.relkind = 'p' AS partitioned,
+        c.reltuples,
+        s.n_live_tup,
+        s.n_dead_tup,
+        s.n_mod_since_analyze,
+        GREATEST(s.last_analyze, s.last_autoanalyze) AS analyzed_at,
+        GREATEST(s.last_vacuum, s.last_autovacuum) AS vacuumed_at,
+        pg_table_size(c.oid) AS table_bytes,
+        pg_indexes_size(c.oid) AS index_bytes
+    FROM t
+    JOIN pg_class c ON c.oid = t.relid
+    LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+    ORDER BY c.relkind = 'p' DESC, c.relname
+"""
+
+# Size of each index on the table (summed over its partitions) next to the
+# size a freshly built btree would have: tuples x (MAXALIGN(8-byte header +
+# key widths from pg_stats) + 4-byte line pointer), on 90%-full 8 kB pages.
+# NULL estimate while a non-empty partition has no statistics yet. Needs no extension,
+# unlike pgstattuple, at the price of being approximate.
+INDEX_BLOAT_SQL = """
+    WITH leaf AS (
+        SELECT top.relname AS index_name, li.oid, li.reltuples, lx.indrelid, lx.indkey, lx.indnkeyatts
+        FROM pg_index x
+        JOIN pg_class top ON top.oid = x.indexrelid
+        CROSS JOIN LATERAL (
+            SELECT x.indexrelid AS relid
+            UNION SELECT relid FROM pg_partition_tree(x.indexrelid)
+        ) t
+        JOIN pg_class li ON li.oid = t.relid AND li.relkind = 'i'
+        JOIN pg_index lx ON lx.indexrelid = li.oid
+        WHERE x.indrelid = %(table)s::regclass
+    ), width AS (
+        SELECT leaf.oid, SUM(st.avg_width) AS key_width, COUNT(st.avg_width) = COUNT(*) AS complete
+        FROM leaf
+        CROSS JOIN LATERAL unnest(leaf.indkey[0:leaf.indnkeyatts - 1]) AS k(attnum)
+        JOIN pg_attribute a ON a.attrelid = leaf.indrelid AND a.attnum = k.attnum
+        JOIN pg_class tc ON tc.oid = leaf.indrelid
+        JOIN pg_namespace n ON n.oid = tc.relnamespace
+        LEFT JOIN pg_stats st
+            ON st.schemaname = n.nspname AND st.tablename = tc.relname AND st.attname = a.attname
+        GROUP BY leaf.oid
+    ), estimate AS (
+        SELECT
+            leaf.index_name,
+            pg_relation_size(leaf.oid) AS bytes,
+            CASE
+                WHEN leaf.reltuples = 0 THEN 1
+                WHEN w.complete AND leaf.reltuples > 0 THEN
+                    1 + ceil(leaf.reltuples * (ceil((8 + w.key_width) / 8.0) * 8 + 4)
+                             / ((current_setting('block_size')::int - 40) * 0.9))
+            END * current_setting('block_size')::int AS estimated_bytes
+        FROM leaf
+        LEFT JOIN width w ON w.oid = leaf.oid
+    )
+    SELECT
+        index_name,
+        SUM(bytes)::bigint AS bytes,
+        CASE WHEN bool_and(estimated_bytes IS NOT NULL) THEN SUM(estimated_bytes)::bigint END AS estimated_bytes
+    FROM estimate
+    GROUP BY index_name
+    ORDER BY index_name
+"""
+
+
+def _table_health(cur, table):
+    """
+    Planner-statistics freshness and bloat of `table` (RealDictCursor), summed
+    over its partitions. rows_estimate is the planner's row count for the
+    table itself; -1 means it was never analyzed.
+    """
+    _execute(cur, "table_health", TABLE_HEALTH_SQL, {"table": table})
+    rels = cur.fetchall()
+    top, leaves = rels[0], [r for r in rels if not r["partitioned"]]
+    live = sum(r["n_live_tup"] or 0 for r in leaves)
+    dead = sum(r["n_dead_tup"] or 0 for r in leaves)
+    health = {
+        "rows_estimate": top["reltuples"],
+        "live_rows": live,
+        "dead_rows": dead,
+        "dead_fraction": dead / (live + dead) if live + dead else 0.0,
+        "modified_since_analyze": sum(r["n_mod_since_analyze"] or 0 for r in leaves),
+        "analyzed_at": top["analyzed_at"],
+        "vacuumed_at": top["vacuumed_at"],
+        "table_bytes": sum(r["table_bytes"] for r in leaves),
+        "index_bytes": sum(r["index_bytes"] for r in leaves),
+    }
+    if top["partitioned"]:
+        health["partitions"] = [
+            {
+                "name": r["relname"],
+                "live_rows": r["n_live_tup"] or 0,
+                "dead_rows": r["n_dead_tup"] or 0,
+                "analyzed_at": r["analyzed_at"],
+                "vacuumed_at": r["vacuumed_at"],
+            }
+            for r in leaves
+        ]
+    return health
+
+
+def _maintenance_action(health, written, dead_written):
+    """"vacuum", "analyze" or None for a table an ingest just changed."""
+    dead = max(health["dead_rows"], dead_written)
+    live = max(health["live_rows"], health["rows_estimate"], 0)
+    if (VACUUM_DEAD_FRACTION > 0 and dead >= VACUUM_MIN_DEAD_ROWS
+            and dead >= VACUUM_DEAD_FRACTION * (live + dead)):
+        return "vacuum"
+    if ANALYZE_CHANGE_FRACTION > 0 and (
+            health["rows_estimate"] < 0
+            or written >= ANALYZE_CHANGE_FRACTION * max(health["rows_estimate"], 1)):
+        return "analyze"
+    return None
+
+
+def _log_maintenance(cur, table, action, reason, rows_changed, live_rows, dead_rows,
+                     table_bytes, index_bytes, duration_ms):
+    _execute(cur, "maintenance_log_insert", """
+        INSERT INTO maintenance_log
+            (table_name, action, reason, rows_changed, live_rows, dead_rows,
+             table_bytes, index_bytes, duration_ms)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """, (table, action, reason, rows_changed, live_rows, dead_rows, table_bytes, index_bytes, duration_ms))
+
+
+def _run_maintenance(cur, table, action, reason, written, dead_rows, health):
+    """Run ANALYZE or VACUUM on `table` and record it in maintenance_log."""
+    t0 = time.perf_counter()
+    with _timed_query(f"maintenance_{action}"):
+        cur.execute(f"VACUUM {table}" if action == "vacuum" else f"ANALYZE {table}")
+    duration_ms = (time.perf_counter() - t0) * 1000.0
+    # live rows as just counted by ANALYZE / VACUUM; the stats views lag
+    cur.execute("SELECT reltuples::bigint AS rows FROM pg_class WHERE oid = %s::regclass", (table,))
+    _log_maintenance(
+        cur, table, action, reason, written, cur.fetchone()["rows"],
+        dead_rows, health["table_bytes"], health["index_bytes"], duration_ms,
+    )
+
+
+def _vacuum_worker():
+    vacuum_conn = None
+    while True:
+        job = _VACUUM_QUEUE.get()
+        try:
+            if vacuum_conn is None or vacuum_conn.closed:
+                vacuum_conn = psycopg2.connect(**DB_PARAMS)
+                vacuum_conn.autocommit = True
+            with vacuum_conn.cursor(cursor_factory=RealDictCursor) as cur:
+                _run_maintenance(cur, action="vacuum", **job)
+        except Exception as e:
+            print(f"Background VACUUM of {job['table']} failed: {e}")
+            try:
+                if vacuum_conn is not None:
+                    vacuum_conn.close()
+            except Exception:
+                pass
+            vacuum_conn = None
+        finally:
+            with _VACUUM_LOCK:
+                _VACUUM_PENDING.discard(job["table"])
+            _VACUUM_QUEUE.task_done()
+
+
+def _queue_vacuum(table, reason, written, dead_rows, health):
+    """Hand `table` to the VACUUM thread; False if the queue is full."""
+    global _VACUUM_WORKER
+    with _VACUUM_LOCK:
+        if _VACUUM_WORKER is None:
+            _VACUUM_WORKER = threading.Thread(target=_vacuum_worker, name="post-ingest-vacuum", daemon=True)
+            _VACUUM_WORKER.start()
+        if table in _VACUUM_PENDING:
+            return True
+        try:
+            _VACUUM_QUEUE.put_nowait({
+                "table": table, "reason": reason, "written": written,
+                "dead_rows": dead_rows, "health": health,
+            })
+        except queue.Full:
+            return False
+        _VACUUM_PENDING.add(table)
+    return True
+
+
+def _maintain_after_ingest(changes, reason):
+    """
+    ANALYZE the tables an ingest changed, and queue a VACUUM for them, when
+    the change crosses the thresholds above. `changes` maps table -> (rows
+    written, rows updated or moved, each of which left a dead row version).
+    Call after the ingest committed; the ANALYZE runs on its own autocommit
+    connection before returning, the VACUUM on the background thread.
+    Failures are logged, not raised. Returns the actions taken or queued,
+    e.g. ["analyze transacts", "vacuum transacts (queued)"].
+    """
+    todo = {table: c for table, c in changes.items() if c[0]}
+    done = []
+    if not todo:
+        return done
+    conn = psycopg2.connect(**DB_PARAMS)
+    conn.autocommit = True
+    try:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            for table, (written, dead_written) in todo.items():
+                try:
+                    health = _table_health(cur, table)
+                    action = _maintenance_action(health, written, dead_written)
+                    if action is None:
+                        continue
+                    dead_rows = max(health["dead_rows"], dead_written)
+                    # Fresh statistics right away, even when a VACUUM follows
+                    _run_maintenance(cur, table, "analyze", reason, written, dead_rows, health)
+                    done.append(f"analyze {table}")
+                    if action == "vacuum":
+                        if _queue_vacuum(table, reason, written, dead_rows, health):
+                            done.append(f"vacuum {table} (queued)")
+                        else:
+                            print(f"Post-ingest VACUUM queue full; skipping {table}")
+                except Exception as e:
+                    print(f"Post-ingest maintenance of {table} failed: {e}")
+    finally:
+        conn.close()
+    return done
+
 
 # -------------------------------------------------
 # Upload route for data
 # -------------------------------------------------
-@app.route("/upload", methods=["POST"])
-def upload_file():
-    file = None
-    dataName = None
-    if "transact" in request.files:
-        file = request.files["transact"]
-        dataName = "transacts"
-        PRIMARY_KEY = "tscode"
-    elif "screening" in request.files:
-        file = request.files["screening"]
-        dataName = "screening"
-        PRIMARY_KEY = "voyappcode"
-        col_map = SCREEN_MAPPING.get(dataName, {})
+class _UploadError(Exception):
+    """Something wrong with an uploaded file itself; reported as a 400."""
 
-        def map_columns(row):
-            mapped = {}
-            for key, value in row.items():
-                mapped[col_map.get(key.strip(), key)] = value
-            return mapped
 
-    else:
-        return jsonify({"error": "No file uploaded"}), 400
-    
-    filename = file.filename
-    content = file.read()  # bytes
+class _UploadTooLarge(_UploadError):
+    """An upload ran past the byte limit it was spooled with."""
 
-    ext = os.path.splitext(filename)[1].lower()
-    if ext == ".csv":
-        try:
-            csv_file = io.StringIO(content.decode("utf-8-sig"))
-        except UnicodeDecodeError:
-            return jsonify({"message": f"{filename} is not UTF-8 encoded"}), 400
 
+def _upload_batches(dataName, PRIMARY_KEY, col_map, filename, ext, path, rejects, workers=INGEST_WORKERS):
+    """
+    Parse one spooled upload into (columns, packed batch) pairs in file
+    order, appending bad numeric cells to `rejects`.
+    """
+    from openpyxl import load_workbook
+
+    key, moved_key = UPLOAD_MERGE_KEYS[dataName]
+    if ext == ".csv":
         # Skip first 5 rows (headers/noise)
         # for _ in range(5):
         #     next(csv_file, None)
 
-        reader = csv.DictReader(csv_file)
-        reader.fieldnames = [h.strip().lower() for h in reader.fieldnames]
-
-        # Prepare upsert dynamically based on first row
-        first = next(reader, None)
-        if first is None:
-            return jsonify({"message": "No rows detected after header"}), 400
-
-        first = _normalize_row(first)
-        if dataName == "screening":
-            first = map_columns(first)   # apply SCREEN_MAPPING here
-        columns = list(first.keys())
-        placeholders = ', '.join(['%s'] * len(columns))
-        colsql = ', '.join(columns)
-        update_clause = ', '.join([f"{c}=EXCLUDED.{c}" for c in columns if c != PRIMARY_KEY])
-
-        sql = f"INSERT INTO {dataName} ({colsql}) VALUES ({placeholders}) ON CONFLICT ({PRIMARY_KEY}) DO UPDATE SET {update_clause}"
-
-        batch, batch_size = [], 1000
-
-        def add_row(r):
-            r = _normalize_row(r)
-            if dataName == "screening":
-                r = map_columns(r)
-            # print("Primary Key:", PRIMARY_KEY)
-            # print("Row keys:", list(r.keys()))
-            if not r.get(PRIMARY_KEY):
-                return
-            batch.append([r.get(c) for c in columns])
-
-        add_row(first)
-        for r in reader:
-            add_row(r)
-            if len(batch) >= batch_size:
-                cursor.executemany(sql, batch)
-                batch.clear()
-        if batch:
-            print("Columns:", columns)
-            print("First batch row:", batch[0] if batch else None)
-            print("SQL:", sql)
-            cursor.executemany(sql, batch)
+        try:
+            fieldnames, data_start = ingest.read_csv_header(path)
+        except UnicodeDecodeError:
+            raise _UploadError(f"{filename} is not UTF-8 encoded")
+        if not fieldnames:
+            raise _UploadError("No rows detected after header")
+
+        columns = ingest.upload_columns(dataName, fieldnames, col_map)
+        spec = ingest.RowSpec(dataName, fieldnames, col_map, columns, PRIMARY_KEY, moved_key or key)
+        ranges = ingest.csv_chunks(path, data_start, INGEST_CHUNK_BYTES)
+
+        # Chunks are parsed in parallel but handed out in file order, so a
+        # tenant repeated later in the file still wins.
+        parsed = 0
+        try:
+            for packed in ingest.parse_csv(path, ranges, spec, workers=workers):
+                parsed += packed["parsed"]
+                rejects.extend(packed["rejects"])
+                yield columns, packed
+        except UnicodeDecodeError:
+            raise _UploadError(f"{filename} is not UTF-8 encoded")
+        if not parsed:
+            raise _UploadError("No rows detected after header")
 
     elif ext == ".xlsx":
-        xlsx = io.BytesIO(content)
-        wb = load_workbook(xlsx, data_only=True)
+        wb = load_workbook(path, data_only=True)
         ws = wb.active
         rows = list(ws.iter_rows(values_only=True))
         rows = rows[5:]  # skip first 5 rows
         if not rows:
-            return jsonify({"message": "No data rows detected"}), 400
+            raise _UploadError("No data rows detected")
         headers = [str(h).strip().lower() for h in rows[0]]
+        cols, batch = None, []
         for row in rows[1:]:
             rd = {k: v for k, v in zip(headers, row)}
-            rd = _normalize_row(rd)
-            if dataName == "screening":
-                rd = map_columns(rd)
+            rd = ingest.prepare_row(dataName, rd, col_map, rejects)
             if not rd.get(PRIMARY_KEY):
                 continue
-            cols = list(rd.keys())
-            placeholders = ', '.join(['%s'] * len(cols))
-            colsql = ', '.join(cols)
-            update_clause = ', '.join([f"{c}=EXCLUDED.{c}" for c in cols if c != PRIMARY_KEY])
-            sql = f"INSERT INTO transacts ({colsql}) VALUES ({placeholders}) ON CONFLICT ({PRIMARY_KEY}) DO UPDATE SET {update_clause}"
-            cursor.execute(sql, [rd.get(c) for c in cols])
+            cols = cols or list(rd.keys())
+            batch.append([rd.get(c) for c in cols])
+            if len(batch) >= UPLOAD_BATCH_ROWS:
+                yield cols, ingest.pack_rows(cols, batch, moved_key or key)
+                batch = []
+        if batch:
+            yield cols, ingest.pack_rows(cols, batch, moved_key or key)
+    elif ext in ingest.ARROW_EXTENSIONS:
+        try:
+            table = ingest.read_arrow(path, ext)
+        except ImportError:
+            raise _UploadError("Parquet / Arrow uploads need pyarrow (pip install pyarrow)")
+        except (ValueError, OSError) as e:
+            raise _UploadError(f"{filename} is not a readable Parquet / Arrow file: {e}")
+        if not table.num_rows:
+            raise _UploadError("No data rows detected")
+        columns, table = ingest.prepare_arrow(table, dataName, col_map, PRIMARY_KEY, rejects)
+        yield from ((columns, packed) for packed in
+                    ingest.arrow_batches(columns, table, moved_key or key, ARROW_BATCH_ROWS))
     else:
-        return jsonify({"message": "Unsupported file type"}), 400
+        raise _UploadError("Unsupported file type")
+
+
+@app.route("/upload", methods=["POST"])
+def upload_file():
+    file = None
+    dataName = None
+    col_map = {}
+    if "transact" in request.files:
+        file = request.files["transact"]
+        dataName = "transacts"
+        PRIMARY_KEY = "tscode"
+    elif "screening" in request.files:
+        file = request.files["screening"]
+        dataName = "screening"
+        PRIMARY_KEY = "voyappcode"
+        col_map = SCREEN_MAPPING.get(dataName, {})
+    else:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    if request.args.get("mode") == "replace":
+        # A full refresh swaps out the live table, so it is admin-only
+        denied = _require_admin()
+        if denied:
+            return denied
+
+    filename = file.filename
+    ext = os.path.splitext(filename)[1].lower()
+    path, digest, size_bytes = _spool_upload(file.stream, filename)
+    try:
+        return _ingest_upload(dataName, PRIMARY_KEY, col_map, filename, ext, path, digest, size_bytes)
+    finally:
+        os.unlink(path)
+
+
+def _full_refresh(cur, dataName, batches):
+    """
+    Replace the whole table with the upload: COPY every batch into an
+    index-free shadow table, build the indexes and ANALYZE it, then swap it
+    in for the live table (see ingest.py). Readers keep using the old table
+    until the caller commits. Returns the number of rows loaded.
+    """
+    key, moved_key = UPLOAD_MERGE_KEYS[dataName]
+    ident = moved_key or key
+    loaded = 0
+    with _timed_query("refresh_load"):
+        shadow, partitioned = ingest.create_shadow(cur, dataName)
+        years = set()
+        if partitioned:
+            years = schema.transacts_partition_years(cur)
+            schema.ensure_transacts_partitions(cur, years, suffix=ingest.SHADOW_SUFFIX)
+        for columns, packed in batches:
+            if packed["duplicates"]:
+                raise _UploadError(f"Full refresh needs one row per {'/'.join(ident)}; the file repeats some")
+            if packed["years"] - years:
+                schema.ensure_transacts_partitions(cur, packed["years"] - years, suffix=ingest.SHADOW_SUFFIX)
+                years |= packed["years"]
+            # COPY FREEZE isn't allowed on a partitioned table
+            ingest.copy_packed(cur, shadow, columns, packed, freeze=not partitioned)
+            loaded += packed["rows"]
+    if not loaded:
+        raise _UploadError("No data rows detected")
+    dup = ingest.shadow_duplicate(cur, shadow, ident)
+    if dup is not None:
+        raise _UploadError(f"Full refresh needs one row per {'/'.join(ident)}; {', '.join(map(str, dup))} repeats")
+
+    with _timed_query("refresh_index"):
+        ingest.build_shadow_indexes(cur, dataName)
+    t0 = time.perf_counter()
+    with _timed_query("refresh_analyze"):
+        cur.execute(f"ANALYZE {shadow}")
+    _log_maintenance(cur, dataName, "analyze", "full refresh", loaded, loaded, 0,
+                     None, None, (time.perf_counter() - t0) * 1000.0)
+    with _timed_query("refresh_swap"):
+        ingest.swap_shadow(cur, dataName, REFRESH_LOCK_TIMEOUT_MS, REFRESH_SWAP_ATTEMPTS)
+    if dataName == "transacts":
+        with _timed_query("refresh_dimensions"):
+            schema.rebuild_dimensions(cur)
+    return loaded
+
+
+def _ingest_upload(dataName, PRIMARY_KEY, col_map, filename, ext, path, digest, size_bytes):
+    rejects = []
+    stats = ingest.new_stats()
+    # ?mode=replace: the file is the complete table, not a set of changes
+    replace = request.args.get("mode") == "replace"
+
+    # Same export uploaded again (and nothing newer since): nothing to do,
+    # and no data-version bump. ?force=1 re-ingests anyway.
+    if not replace and request.args.get("force") not in ("1", "true", "yes"):
+        seen = _ingested_upload(dataName, digest)
+        if seen is not None:
+            return jsonify({
+                "message": f"{filename} is identical to {seen['filename']} "
+                           f"(ingested {seen['uploaded_at'].isoformat()}); skipped",
+                "duplicate": True,
+            }), 200
+
+    # One connection / transaction per upload: the staging tables are
+    # per-session, and a failed file leaves no partial merge behind.
+    conn = psycopg2.connect(**DB_PARAMS)
+    try:
+        with conn, conn.cursor() as cur:
+            batches = _upload_batches(dataName, PRIMARY_KEY, col_map, filename, ext, path, rejects)
+            if replace:
+                written = stats["inserted"] = _full_refresh(cur, dataName, batches)
+            else:
+                for columns, packed in batches:
+                    _merge_batch(cur, dataName, columns, packed, stats)
+                written = stats["inserted"] + stats["updated"]
+            _log_ingest_rejects(cur, filename, dataName, rejects)
+            _record_upload(cur, dataName, digest, filename, size_bytes, written, len(rejects))
+
+            # Touch meta_updates (new data version) only if rows actually changed
+            if written:
+                _execute(cur, "meta_bump", "INSERT INTO meta_updates (updated_at) VALUES (NOW())")
+    except _UploadError as e:
+        _TRANSACTS_PARTITION_YEARS.clear()
+        return jsonify({"message": str(e)}), 400
+    except ingest.RefreshInProgress as e:
+        return jsonify({"message": str(e)}), 409
+    except psycopg2.errors.LockNotAvailable:
+        # swap_shadow ran out of attempts; the live table is untouched
+        return jsonify({"message": f"{dataName} is busy with long-running reads; try the refresh again"}), 503
+    except Exception:
+        # partitions created in the rolled-back transaction are gone too
+        _TRANSACTS_PARTITION_YEARS.clear()
+        raise
+    finally:
+        conn.close()
+    if replace and dataName == "transacts":
+        # the swapped-in table has its own set of partitions
+        _TRANSACTS_PARTITION_YEARS.clear()
+    # a full refresh arrives analyzed and without dead rows
+    maintenance = [] if replace else _maintain_after_ingest({dataName: (written, stats["updated"])}, filename)
+
+    return jsonify({
+        "message": f"{filename} uploaded successfully",
+        "mode": "replace" if replace else "merge",
+        "rows_written": written,
+        "inserted": stats["inserted"],
+        "updated": stats["updated"],
+        "unchanged": stats["unchanged"],
+        "rejected_values": len(rejects),
+        "duplicate": False,
+        "maintenance": maintenance,
+    }), 200
+
+
+# -------------------------------------------------
+# Batch upload: several exports (or .zip archives of them) as one data version
+# -------------------------------------------------
+# Form field -> table. Files sent under any other field, and members of .zip
+# archives, are routed by name: transact* or screen*.
+UPLOAD_FIELD_KINDS = {"transact": "transacts", "screening": "screening"}
+UPLOAD_ROW_KEYS = {"transacts": "tscode", "screening": "voyappcode"}
+# Files staged at once, each on its own connection
+UPLOAD_BATCH_WORKERS = int(os.getenv("UPLOAD_BATCH_WORKERS", "4"))
+# Per uploaded .zip: members, and bytes they may unpack to on the temp disk
+ZIP_MAX_MEMBERS = int(os.getenv("ZIP_MAX_MEMBERS", "100"))
+ZIP_MAX_UNPACKED_BYTES = int(float(os.getenv("ZIP_MAX_UNPACKED_MB", "4096")) * 1024 * 1024)
+
+
+def _upload_kind_for(filename):
+    name = os.path.basename(filename).lower()
+    if "transact" in name:
+        return "transacts"
+    if "screen" in name:
+        return "screening"
+    return None
+
+
+def _spool_batch_file(spooled, kind, filename, stream, max_bytes=None):
+    kind = kind or _upload_kind_for(filename)
+    if kind is None:
+        raise _UploadError(
+            f"Can't tell whether {filename} is transaction or screening data; "
+            "name it transact*/screening* or send it as the transact/screening field"
+        )
+    path, digest, size_bytes = _spool_upload(stream, filename, max_bytes)
+    spooled.append({
+        "kind": kind,
+        "filename": filename,
+        "ext": os.path.splitext(filename)[1].lower(),
+        "path": path,
+        "sha256": digest,
+        "size_bytes": size_bytes,
+    })
+
+
+def _spool_archive(spooled, kind, storage):
+    """
+    Spool each file in an uploaded .zip, skipping folders and dotfiles.
+    Archives with more than ZIP_MAX_MEMBERS entries, or whose files unpack
+    to more than ZIP_MAX_UNPACKED_BYTES (declared or actually read), are
+    rejected.
+    """
+    path, _, _ = _spool_upload(storage.stream, storage.filename)
+    too_big = f"{storage.filename} unpacks to more than {ZIP_MAX_UNPACKED_BYTES // (1024 * 1024)} MB"
+    try:
+        with zipfile.ZipFile(path) as zf:
+            infos = zf.infolist()
+            if len(infos) > ZIP_MAX_MEMBERS:
+                raise _UploadError(f"{storage.filename} has more than {ZIP_MAX_MEMBERS} entries")
+            members = [
+                info for info in infos
+                if not (
+                    info.is_dir()
+                    or info.filename.startswith("__MACOSX/")
+                    or os.path.basename(info.filename).startswith(".")
+                )
+            ]
+            if sum(info.file_size for info in members) > ZIP_MAX_UNPACKED_BYTES:
+                raise _UploadError(too_big)
+            # The declared sizes come from the archive, so count what is read too
+            unpacked = 0
+            for info in members:
+                with zf.open(info) as member:
+                    try:
+                        _spool_batch_file(
+                            spooled, kind, f"{storage.filename}/{info.filename}", member,
+                            max_bytes=ZIP_MAX_UNPACKED_BYTES - unpacked,
+                        )
+                    except _UploadTooLarge:
+                        raise _UploadError(too_big) from None
+                unpacked += spooled[-1]["size_bytes"]
+    except zipfile.BadZipFile:
+        raise _UploadError(f"{storage.filename} is not a valid zip archive")
+    finally:
+        os.unlink(path)
+
+
+def _stage_batch_file(item, table, workers):
+    """
+    Parse one batch file into the unlogged table `table` on its own
+    connection and commit, so the merge transaction can read it.
+    """
+    dataName = item["kind"]
+    rejects, years, columns = [], set(), None
+    conn = psycopg2.connect(**DB_PARAMS)
+    try:
+        with conn, conn.cursor() as cur:
+            ingest.create_upload_stage(cur, dataName, table)
+            for columns, packed in _upload_batches(
+                dataName, UPLOAD_ROW_KEYS[dataName], SCREEN_MAPPING.get(dataName, {}),
+                item["filename"], item["ext"], item["path"], rejects, workers=workers,
+            ):
+                with _timed_query("upload_stage"):
+                    ingest.copy_packed(cur, table, columns, packed)
+                years |= packed["years"]
+    except _UploadError as e:
+        msg = str(e)
+        raise _UploadError(msg if item["filename"] in msg else f"{item['filename']}: {msg}")
+    finally:
+        conn.close()
+    return {"table": table, "columns": columns, "years": years, "rejects": rejects}
+
+
+def _drop_upload_stages(tables):
+    with get_conn().cursor() as cur:
+        for table in tables:
+            cur.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def _sweep_upload_stages():
+    """Drop stage tables that an earlier batch never cleaned up."""
+    try:
+        with get_conn().cursor() as cur:
+            dropped = ingest.drop_stale_upload_stages(cur, UPLOAD_STAGE_MAX_AGE_S)
+    except psycopg2.Error as e:
+        print(f"Sweeping stale upload stages failed: {e}")
+        return
+    if dropped:
+        print(f"Dropped {len(dropped)} stale upload stage table(s): {', '.join(dropped)}")
 
-    # Touch meta_updates
-    cursor.execute("INSERT INTO meta_updates (updated_at) VALUES (NOW())")
-    return jsonify({"message": f"{filename} uploaded successfully"}), 200
+
+@app.route("/upload/batch", methods=["POST"])
+def upload_batch():
+    """
+    Ingest several transaction / screening exports, or .zip archives of
+    them, as one data version. Files are staged concurrently, each on its
+    own connection, then merged in the order they were sent by a single
+    transaction that bumps meta_updates at most once, so the model caches
+    retrain once per batch rather than once per file. If any file is
+    rejected nothing is merged. ?force=1 re-ingests files the uploads ledger
+    has already seen.
+    """
+    force = request.args.get("force") in ("1", "true", "yes")
+    spooled = []
+    try:
+        try:
+            for field, storage in request.files.items(multi=True):
+                if not storage.filename:
+                    continue
+                kind = UPLOAD_FIELD_KINDS.get(field)
+                if storage.filename.lower().endswith(".zip"):
+                    _spool_archive(spooled, kind, storage)
+                else:
+                    _spool_batch_file(spooled, kind, storage.filename, storage.stream)
+        except _UploadError as e:
+            return jsonify({"message": str(e)}), 400
+        if not spooled:
+            return jsonify({"error": "No file uploaded"}), 400
+        return _ingest_batch(spooled, force)
+    finally:
+        for item in spooled:
+            os.unlink(item["path"])
+
+
+def _ingest_batch(spooled, force):
+    results, todo, seen = [], [], set()
+    for item in spooled:
+        result = {"filename": item["filename"], "kind": item["kind"], "duplicate": False}
+        results.append(result)
+        ident = (item["kind"], item["sha256"])
+        prior = None
+        if ident in seen:
+            prior = "an earlier file in this batch"
+        elif not force:
+            hit = _ingested_upload(*ident)
+            if hit is not None:
+                prior = f"{hit['filename']} (ingested {hit['uploaded_at'].isoformat()})"
+        if prior:
+            result.update(duplicate=True, message=f"identical to {prior}; skipped")
+            continue
+        seen.add(ident)
+        todo.append((item, result))
+
+    _sweep_upload_stages()
+    batch_id = os.urandom(4).hex()
+    tables = [ingest.upload_stage_name(batch_id, i) for i in range(len(todo))]
+    # Share the parser processes between the files staged side by side
+    workers = max(1, INGEST_WORKERS // max(1, min(len(todo), UPLOAD_BATCH_WORKERS)))
+    written_total = 0
+    changes = {}
+    try:
+        staged = []
+        if todo:
+            with ThreadPoolExecutor(max_workers=min(len(todo), UPLOAD_BATCH_WORKERS)) as pool:
+                futures = [
+                    pool.submit(_stage_batch_file, item, table, workers)
+                    for (item, _), table in zip(todo, tables)
+                ]
+                try:
+                    staged = [f.result() for f in futures]
+                except _UploadError as e:
+                    for f in futures:
+                        f.cancel()
+                    return jsonify({"message": str(e)}), 400
+
+        conn = psycopg2.connect(**DB_PARAMS)
+        try:
+            with conn, conn.cursor() as cur:
+                for (item, result), st in zip(todo, staged):
+                    dataName = item["kind"]
+                    stats = ingest.new_stats()
+                    if st["columns"]:
+                        if dataName == "transacts":
+                            _ensure_transacts_partitions(cur, st["years"])
+                        key, moved_key = UPLOAD_MERGE_KEYS[dataName]
+                        with _timed_query("upload_merge"):
+                            ingest.merge_staged(cur, dataName, st["table"], st["columns"], key, stats, moved_key)
+
+                    written = stats["inserted"] + stats["updated"]
+                    _log_ingest_rejects(cur, item["filename"], dataName, st["rejects"])
+                    _record_upload(cur, dataName, item["sha256"], item["filename"], item["size_bytes"],
+                                   written, len(st["rejects"]))
+                    result.update(
+                        rows_written=written,
+                        inserted=stats["inserted"],
+                        updated=stats["updated"],
+                        unchanged=stats["unchanged"],
+                        rejected_values=len(st["rejects"]),
+                    )
+                    written_total += written
+                    prior_written, prior_updated = changes.get(dataName, (0, 0))
+                    changes[dataName] = (prior_written + written, prior_updated + stats["updated"])
+
+                # One new data version for the whole batch, if anything changed
+                if written_total:
+                    _execute(cur, "meta_bump", "INSERT INTO meta_updates (updated_at) VALUES (NOW())")
+        except Exception:
+            _TRANSACTS_PARTITION_YEARS.clear()
+            raise
+        finally:
+            conn.close()
+    finally:
+        _drop_upload_stages(tables)
+
+    return jsonify({
+        "message": f"{len(todo)} of {len(results)} file(s) ingested",
+        "files": results,
+        "rows_written": written_total,
+        "data_version_bumped": bool(written_total),
+        "maintenance": _maintain_after_ingest(changes, f"batch {batch_id}"),
+    }), 200
 
 def _bucketsql():
-    # Which month a row counts toward (for grouping)
-    return """date_trunc('month',
-              coalesce(dtmovein, dtleasefrom, dtroomearlyout, dtleaseto)
-            )::date"""
+    # Which month a row counts toward (for grouping). Stored as the transacts
+    # partition key; undated rows carry a sentinel that reads back as NULL.
+    return f"NULLIF(bucket_month, DATE '{schema.BUCKET_MONTH_SENTINEL.isoformat()}')"
 
 
 def _clean_pscode_sql():
-    # Strip trailing ".0" from pscode
-    return "regexp_replace(pscode, '\\.0+$', '')"
+    # Strip trailing ".0" from pscode (same expression as dim_properties)
+    return schema.PSCODE_CLEAN_SQL.format("pscode")
 
 
-def _build_filter_sql(params, allow_dates=True):
+def _build_filter_sql(params, allow_dates=True, placeholder="%s", pscode_sql=None):
+    # placeholder / pscode_sql let the DuckDB mirror (columnar.py) reuse the
+    # same filters with its own parameter style and pre-cleaned pscode column
+    p = placeholder
     where = []
     vals = []
 
-    # date window: frontend passes YYYY-MM
+    # date window: frontend passes YYYY-MM, so "{month}-01" is already the
+    # bucket. Compared as plain dates against bucket_month so the planner
+    # prunes transacts partitions.
     if allow_dates:
         start = params.get("start")
         end = params.get("end")
         if start:
-            where.append(f"{_bucketsql()} >= date_trunc('month', %s::date)")
+            where.append(f"bucket_month >= {p}::date")
             vals.append(f"{start}-01")
+        elif end:
+            # undated rows never match a date window
+            where.append(f"bucket_month > {p}::date")
+            vals.append(schema.BUCKET_MONTH_SENTINEL)
         if end:
-            where.append(f"{_bucketsql()} <= (date_trunc('month', %s::date) + interval '1 month - 1 day')::date")
+            where.append(f"bucket_month <= {p}::date")
             vals.append(f"{end}-01")
 
     # multi-pscode
@@ -543,13 +1448,13 @@ def _build_filter_sql(params, allow_dates=True):
     if pscodes:
         if isinstance(pscodes, str):
             pscodes = [pscodes]
-        where.append(f"{_clean_pscode_sql()} = ANY(%s)")
+        where.append(f"{pscode_sql or _clean_pscode_sql()} = ANY({p})")
         vals.append(pscodes)
 
     # screen result
     screen = params.get("screenresult")
     if screen:
-        where.append("screenresult = %s")
+        where.append(f"screenresult = {p}")
         vals.append(screen)
 
     # collections filter
@@ -562,7 +1467,7 @@ def _build_filter_sql(params, allow_dates=True):
     # eviction filter
     ev = params.get("evicted")
     if ev in ("Yes", "No"):
-        where.append("sevicted = %s")
+        where.append(f"sevicted = {p}")
         vals.append(ev)
 
     return ("WHERE " + " AND ".join(where)) if where else "", vals
@@ -571,36 +1476,55 @@ def _build_filter_sql(params, allow_dates=True):
 # -------------------------------------------------
 # /filters/options
 # -------------------------------------------------
+# Shared with the async read API (async_app.py). The lists come from the
+# dimension tables kept by ingest (schema.TRANSACTS_DIMENSIONS), not from
+# DISTINCT scans over transacts.
+FILTER_OPTION_TABLES = {
+    "pscodes": "dim_properties",
+    "screenresults": "dim_screenresults",
+    "paymentsources": "dim_payment_sources",
+    "screenvendors": "dim_screen_vendors",
+}
+
+FILTER_OPTIONS_SQL = "\n    UNION ALL\n".join(
+    f"    SELECT '{field}' AS field, {schema.TRANSACTS_DIMENSIONS[table][0]} AS value, row_count FROM {table}"
+    for field, table in FILTER_OPTION_TABLES.items()
+) + "\n    ORDER BY field, value\n"
+
+
+def _filter_options_payload(rows, counts=False):
+    """
+    {"pscodes": [...], "screenresults": [...], ...} from FILTER_OPTIONS_SQL
+    rows; counts=True adds {"counts": {field: {value: transacts rows}}}.
+    """
+    payload = {field: [] for field in FILTER_OPTION_TABLES}
+    if counts:
+        payload["counts"] = {field: {} for field in FILTER_OPTION_TABLES}
+    for r in rows:
+        payload[r["field"]].append(r["value"])
+        if counts:
+            payload["counts"][r["field"]][r["value"]] = r["row_count"]
+    return payload
+
+
 @app.route("/filters/options")
 def filter_options():
+    """Filter dropdown values; ?counts=1 adds per-value transacts row counts."""
+    counts = request.args.get("counts") in ("1", "true", "yes")
     try:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(f"""
-                SELECT DISTINCT {_clean_pscode_sql()} AS pcode_clean
-                FROM transacts
-                WHERE pscode IS NOT NULL
-                ORDER BY pcode_clean
-            """)
-            props = [r["pcode_clean"] for r in cur.fetchall()]
-
-            cur.execute("""
-                SELECT DISTINCT screenresult
-                FROM transacts
-                WHERE screenresult IS NOT NULL
-                ORDER BY screenresult
-            """)
-            screens = [r["screenresult"] for r in cur.fetchall()]
-
-        return jsonify({"pscodes": props, "screenresults": screens})
+        with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+            _execute(cur, "filter_options", FILTER_OPTIONS_SQL)
+            return jsonify(_filter_options_payload(cur.fetchall(), counts))
     except Exception as e:
         print(f"Error in filter_options: {str(e)}")
-        return jsonify({"pscodes": [], "screenresults": []}), 200
+        _count_handled_error()
+        return jsonify(_filter_options_payload([], counts)), 200
 
 
 # -------------------------------------------------
 # KPI queries with positive dollar magnitudes
 # -------------------------------------------------
-def _query_snapshot(where_clause, vals):
+def _snapshot_sql(where_clause):
     """
     Aggregate portfolio-level KPIs over the filtered window.
 
@@ -608,7 +1532,7 @@ def _query_snapshot(where_clause, vals):
     dollars_delinquent    = total delinquent exposure
                             = collections_exposure + rent/non-rent write-offs
     """
-    q = f"""
+    return f"""
         WITH base AS (
             SELECT {_bucketsql()} AS month_key,
                    dnumlate,
@@ -621,7 +1545,7 @@ def _query_snapshot(where_clause, vals):
         )
         SELECT
           COUNT(*) AS total_rows,
-          COALESCE(SUM(CASE WHEN dnumlate > 0 THEN 1 ELSE 0 END),0)::float
+          COALESCE(SUM(CASE WHEN dnumlate > 0 THEN 1 ELSE 0 END),0)::float8
             / NULLIF(COUNT(*),0) AS pct_late_payers,
           COALESCE(SUM(dnumnsf),0) AS nsf_count,
           -- dollars currently in collections
@@ -634,14 +1558,10 @@ def _query_snapshot(where_clause, vals):
           ) AS dollars_delinquent
         FROM base;
     """
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(q, vals)
-        row = cur.fetchone()
-    return row
 
 
 
-def _query_timeseries(where_clause, vals):
+def _timeseries_sql(where_clause):
     """
     Monthly time-series for portfolio KPIs.
 
@@ -649,7 +1569,7 @@ def _query_timeseries(where_clause, vals):
     dollars_delinquent    = total delinquent exposure
                             = collections_exposure + rent/non-rent write-offs
     """
-    q = f"""
+    return f"""
         WITH base AS (
             SELECT {_bucketsql()} AS month_key,
                    dnumlate,
@@ -662,7 +1582,7 @@ def _query_timeseries(where_clause, vals):
         )
         SELECT
           month_key,
-          COALESCE(SUM(CASE WHEN dnumlate > 0 THEN 1 ELSE 0 END),0)::float
+          COALESCE(SUM(CASE WHEN dnumlate > 0 THEN 1 ELSE 0 END),0)::float8
             / NULLIF(COUNT(*),0) AS pct_late_payers,
           COALESCE(SUM(dnumnsf),0) AS nsf_count,
           -- dollars currently in collections
@@ -677,9 +1597,107 @@ def _query_timeseries(where_clause, vals):
         GROUP BY month_key
         ORDER BY month_key;
     """
-    with conn.cursor(cursor_factory=RealDictCursor) as cur:
-        cur.execute(q, vals)
-        return cur.fetchall()
+
+
+# Which engine answers /kpis/snapshot and /kpis/timeseries: "postgres", or
+# "duckdb" for the columnar mirror in columnar.py (refreshed per data version;
+# KPI_DUCKDB_PATH keeps it in a file instead of memory, one process per file)
+KPI_ENGINE = os.getenv("KPI_ENGINE", "postgres").lower()
+KPI_DUCKDB_PATH = os.getenv("KPI_DUCKDB_PATH", ":memory:")
+KPI_ENGINES = ("postgres", "duckdb")
+if KPI_ENGINE not in KPI_ENGINES:
+    raise ValueError(f"KPI_ENGINE must be one of {', '.join(KPI_ENGINES)}, not {KPI_ENGINE!r}")
+
+_KPI_SQL = {"snapshot": _snapshot_sql, "timeseries": _timeseries_sql}
+
+
+def _sync_kpi_mirror():
+    """Reload the DuckDB mirror if meta_updates moved since it was built."""
+    version = _latest_meta_ts()
+    if columnar.ensure_version(version, lambda: psycopg2.connect(**DB_PARAMS), KPI_DUCKDB_PATH):
+        mirror = columnar.status()
+        DB_QUERY_SECONDS.observe(mirror["load_seconds"], query="kpi_mirror_load")
+        print(f"KPI mirror loaded: {mirror['rows']} rows in {mirror['load_seconds']:.1f}s (data version {version})")
+
+
+def _kpi_rows(kind, params, allow_dates, engine=None):
+    """
+    _snapshot_sql / _timeseries_sql rows ("snapshot" / "timeseries") for the
+    request filters, from KPI_ENGINE unless `engine` overrides it.
+    """
+    if (engine or KPI_ENGINE) == "duckdb":
+        where, vals = _build_filter_sql(
+            params, allow_dates, placeholder=columnar.PLACEHOLDER, pscode_sql=columnar.PSCODE_COLUMN
+        )
+        _sync_kpi_mirror()
+        sql = _KPI_SQL[kind](where)
+
+        def run():
+            with _timed_query(f"{kind}_duckdb"):
+                return columnar.fetch(sql, vals)
+
+        return _single_flight(f"kpi_{kind}", ("duckdb", sql, _flight_key(vals)), run)
+
+    where, vals = _build_filter_sql(params, allow_dates)
+    sql = _KPI_SQL[kind](where)
+
+    def run():
+        with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+            _execute(cur, kind, sql, vals)
+            return cur.fetchall()
+
+    return _single_flight(f"kpi_{kind}", ("postgres", sql, _flight_key(vals)), run)
+
+
+def _kpi_snapshot(params, engine=None):
+    """/kpis/snapshot payload; falls back to all dates if the window is empty."""
+    rows = _kpi_rows("snapshot", params, allow_dates=True, engine=engine)
+    if not rows or (rows[0]["total_rows"] or 0) == 0:
+        rows = _kpi_rows("snapshot", params, allow_dates=False, engine=engine)
+    return _snapshot_payload(rows[0] if rows else None)
+
+
+def _kpi_timeseries(params, engine=None):
+    """/kpis/timeseries payload; falls back to all dates if the window is empty."""
+    rows = _kpi_rows("timeseries", params, allow_dates=True, engine=engine)
+    if len(rows) == 0:
+        rows = _kpi_rows("timeseries", params, allow_dates=False, engine=engine)
+    return _timeseries_payload(rows)
+
+
+EMPTY_SNAPSHOT = {
+    "pct_late_payers": 0.0,
+    "nsf_count": 0,
+    "collections_exposure": 0.0,
+    "dollars_delinquent": 0.0
+}
+
+
+def _snapshot_payload(row):
+    """JSON body for /kpis/snapshot from a _snapshot_sql row (None -> zeros)."""
+    if not row or (row["total_rows"] or 0) == 0:
+        return dict(EMPTY_SNAPSHOT)
+    return {
+        "pct_late_payers": float(row["pct_late_payers"] or 0.0),
+        "nsf_count": int(row["nsf_count"] or 0),
+        "collections_exposure": float(row["collections_exposure"] or 0.0),
+        "dollars_delinquent": float(row["dollars_delinquent"] or 0.0)
+    }
+
+
+def _timeseries_payload(rows):
+    """JSON body for /kpis/timeseries from _timeseries_sql rows."""
+    out = []
+    for r in rows:
+        mk = r["month_key"]
+        out.append({
+            "month": mk.strftime("%Y/%m") if mk else None,
+            "pct_late_payers": float(r["pct_late_payers"] or 0.0),
+            "nsf_count": int(r["nsf_count"] or 0),
+            "collections_exposure": float(r["collections_exposure"] or 0.0),
+            "dollars_delinquent": float(r["dollars_delinquent"] or 0.0),
+        })
+    return out
 
 
 
@@ -689,37 +1707,13 @@ def _query_timeseries(where_clause, vals):
 @app.route("/kpis/snapshot")
 def kpi_snapshot():
     try:
-        where1, vals1 = _build_filter_sql(request.args, allow_dates=True)
-        row = _query_snapshot(where1, vals1)
-
-        if not row or (row["total_rows"] or 0) == 0:
-            where2, vals2 = _build_filter_sql(request.args, allow_dates=False)
-            row = _query_snapshot(where2, vals2)
-
-        if not row or (row["total_rows"] or 0) == 0:
-            return jsonify({
-                "pct_late_payers": 0.0,
-                "nsf_count": 0,
-                "collections_exposure": 0.0,
-                "dollars_delinquent": 0.0
-            })
-
-        return jsonify({
-            "pct_late_payers": float(row["pct_late_payers"] or 0.0),
-            "nsf_count": int(row["nsf_count"] or 0),
-            "collections_exposure": float(row["collections_exposure"] or 0.0),
-            "dollars_delinquent": float(row["dollars_delinquent"] or 0.0)
-        })
+        return jsonify(_kpi_snapshot(request.args))
     except Exception as e:
         print(f"Error in kpi_snapshot: {str(e)}")
         import traceback
         traceback.print_exc()
-        return jsonify({
-            "pct_late_payers": 0.0,
-            "nsf_count": 0,
-            "collections_exposure": 0.0,
-            "dollars_delinquent": 0.0
-        }), 200
+        _count_handled_error()
+        return jsonify(EMPTY_SNAPSHOT), 200
 
 
 # -------------------------------------------------
@@ -728,28 +1722,12 @@ def kpi_snapshot():
 @app.route("/kpis/timeseries")
 def kpi_timeseries():
     try:
-        where1, vals1 = _build_filter_sql(request.args, allow_dates=True)
-        rows = _query_timeseries(where1, vals1)
-
-        if len(rows) == 0:
-            where2, vals2 = _build_filter_sql(request.args, allow_dates=False)
-            rows = _query_timeseries(where2, vals2)
-
-        out = []
-        for r in rows:
-            mk = r["month_key"]
-            out.append({
-                "month": mk.strftime("%Y/%m") if mk else None,
-                "pct_late_payers": float(r["pct_late_payers"] or 0.0),
-                "nsf_count": int(r["nsf_count"] or 0),
-                "collections_exposure": float(r["collections_exposure"] or 0.0),
-                "dollars_delinquent": float(r["dollars_delinquent"] or 0.0),
-            })
-        return jsonify(out)
+        return jsonify(_kpi_timeseries(request.args))
     except Exception as e:
         print(f"Error in kpi_timeseries: {str(e)}")
         import traceback
         traceback.print_exc()
+        _count_handled_error()
         return jsonify([]), 200
 
 
@@ -786,11 +1764,22 @@ def _humanize_feature_name(raw: str) -> str:
             return f"{_HUMAN_NAME[prefix]}: {val.replace('_', ' ')}"
     return _HUMAN_NAME.get(raw, raw)
 
-def _train_rf_with_imputation(X: pd.DataFrame, y: pd.Series):
+def _train_rf_with_imputation(X: pd.DataFrame, y: pd.Series, stages=None):
     """
     Train Random Forest with proper missing value handling via imputation.
     Returns (pipeline, auc_score, feature_names) or (None, None, None) on failure.
+    `stages` is an optional _StageTimer to report feature_prep/train/score laps to.
     """
+    import numpy as np
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.impute import SimpleImputer
+    from sklearn.metrics import roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder
+
+    stages = stages or _StageTimer("feature_importance")
     try:
         num_cols = X.select_dtypes(include=[np.number]).columns.tolist()
         cat_cols = [c for c in X.columns if c not in num_cols]
@@ -833,7 +1822,7 @@ def _train_rf_with_imputation(X: pd.DataFrame, y: pd.Series):
             max_depth=10,
             min_samples_leaf=5,
             max_features='sqrt',
-            n_jobs=-1,
+            n_jobs=ML_TRAIN_THREADS,
             random_state=42,
             class_weight='balanced'
         )
@@ -843,10 +1832,13 @@ def _train_rf_with_imputation(X: pd.DataFrame, y: pd.Series):
             ('classifier', rf)
         ])
 
+        stages.lap("feature_prep")
         pipeline.fit(X_train, y_train)
+        stages.lap("train")
 
         y_pred_proba = pipeline.predict_proba(X_test)[:, 1]
         auc = roc_auc_score(y_test, y_pred_proba)
+        stages.lap("score")
 
         feature_names = []
         if num_cols:
@@ -882,6 +1874,63 @@ _SCREENING_MODEL_CACHE = {
     "last_meta_ts": None,
     "payload": None,
 }
+# Held while a model's cache entries are swapped in (_publish_cache)
+_CACHE_PUBLISH_LOCK = threading.Lock()
+
+
+# -------------------------------------------------
+# Stage timing for the model pipelines
+# -------------------------------------------------
+# Callbacks fn(pipeline, stage, seconds, peak_bytes) fired as each stage of
+# a model payload computation finishes (see benchmarks/ml_stages.py).
+STAGE_LISTENERS = [
+    lambda pipeline, stage, seconds, peak: MODEL_STAGE_SECONDS.observe(
+        seconds, model=pipeline, stage=stage
+    ),
+]
+
+
+class _StageTimer:
+    """
+    Lap timer for a model pipeline: stages.lap("train") charges the time since
+    the previous lap to "train". Work interleaved with another stage inside a
+    loop (per-tenant drivers in the payload loop) goes through
+    stages.timed(...) and is reported separately from the enclosing lap.
+    peak_bytes is the tracemalloc peak for the lap, or None when not tracing.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        self._carved = {}
+        self._start()
+
+    def _start(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+        self._t0 = time.perf_counter()
+
+    def _emit(self, stage, seconds, peak):
+        for listener in STAGE_LISTENERS:
+            try:
+                listener(self.pipeline, stage, seconds, peak)
+            except Exception as e:
+                print(f"Stage listener error: {e}")
+
+    def timed(self, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self._carved[stage] = self._carved.get(stage, 0.0) + time.perf_counter() - t0
+
+    def lap(self, stage):
+        elapsed = time.perf_counter() - self._t0
+        peak = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+        carved, self._carved = self._carved, {}
+        self._emit(stage, elapsed - sum(carved.values()), peak)
+        for name, seconds in carved.items():
+            self._emit(name, seconds, None)
+        self._start()
 
 
 def _map_flag(x):
@@ -910,16 +1959,335 @@ def _map_flag(x):
 def _latest_meta_ts():
     """Return latest updated_at from meta_updates, or None if table empty."""
     try:
-        with conn.cursor() as cur:
-            cur.execute("SELECT MAX(updated_at) FROM meta_updates;")
+        with get_conn().cursor() as cur:
+            _execute(cur, "meta_version", "SELECT MAX(updated_at) FROM meta_updates;")
             row = cur.fetchone()
             return row[0] if row else None
     except Exception:
         return None
 
-def _compute_feature_importance_payload():
+
+# Model frames can be kept per data version as memory-mapped Arrow files (see
+# snapshots.py), so retrains, other worker processes and experiments skip the
+# Postgres load. The files hold tenant income, eviction and payment history,
+# so this is off unless SNAPSHOT_DIR names a directory for them (created
+# owner-only). Missing pyarrow turns it off too.
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "")
+
+TRAINING_SNAPSHOT_LOADS = metrics.Counter(
+    "training_snapshot_loads_total",
+    "Model frame loads by query and source (snapshot or postgres).",
+    ("query", "source"),
+)
+
+
+def _read_frame(name, q, params=None):
+    """
+    _read_sql for the model pipelines: the frame comes from this data
+    version's snapshot if there is one, otherwise from Postgres, and is then
+    written as the snapshot for the next run.
+    """
+    version = _latest_meta_ts() if SNAPSHOT_DIR else None
+    if version is None:
+        return _read_sql(name, q, params)
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return _read_sql(name, q, params)
+
+    path = snapshots.snapshot_path(SNAPSHOT_DIR, DB_PARAMS["dbname"], version, name, q, params)
+    with _timed_query(f"{name}_snapshot"):
+        df = snapshots.read(path)
+    if df is not None:
+        TRAINING_SNAPSHOT_LOADS.inc(query=name, source="snapshot")
+        return df
+
+    df = _read_sql(name, q, params)
+    TRAINING_SNAPSHOT_LOADS.inc(query=name, source="postgres")
+    try:
+        snapshots.write(path, df)
+    except Exception as e:
+        print(f"Could not write training snapshot {path}: {e}")
+    return df
+
+
+# Trained caches are shared through the model_artifacts table (one row per
+# model and data version), so a model is trained once per data version --
+# by `python Backend.py train` or the first worker to need it -- and every
+# other process just loads it. Each row records the versions of the
+# libraries whose objects it pickles; a row written under other versions,
+# or one that won't unpickle, counts as missing and is retrained.
+ARTIFACT_LIBRARIES = ("catboost", "scikit-learn", "pandas", "numpy")
+_ARTIFACT_LIBRARY_VERSIONS = None
+# Artifacts are pickles, so each is signed with an HMAC under this key and
+# only unpickled if the signature matches: write access to the table alone
+# isn't enough to run code in the workers. Every process sharing a database
+# needs the same key; without one, artifacts are neither stored nor loaded
+# and each process trains its own models.
+MODEL_ARTIFACT_KEY = os.getenv("MODEL_ARTIFACT_KEY", "").encode()
+
+
+def _artifact_signature(name, version, blob):
+    """HMAC-SHA256 of an artifact, bound to its model name and data version."""
+    head = f"{name}\n{version.isoformat()}\n".encode()
+    return hmac.new(MODEL_ARTIFACT_KEY, head + blob, hashlib.sha256).digest()
+
+
+def _artifact_signed(name, version, blob, signature):
+    return signature is not None and hmac.compare_digest(
+        bytes(signature), _artifact_signature(name, version, bytes(blob))
+    )
+
+
+def _artifact_library_versions():
+    """{"python": "3.11", "catboost": "1.2.5", ...} for this process."""
+    global _ARTIFACT_LIBRARY_VERSIONS
+    if _ARTIFACT_LIBRARY_VERSIONS is None:
+        from importlib import metadata
+
+        versions = {"python": "%d.%d" % sys.version_info[:2]}
+        for dist in ARTIFACT_LIBRARIES:
+            try:
+                versions[dist] = metadata.version(dist)
+            except metadata.PackageNotFoundError:
+                versions[dist] = None
+        _ARTIFACT_LIBRARY_VERSIONS = versions
+    return _ARTIFACT_LIBRARY_VERSIONS
+
+
+def _load_model_artifact(cache, name, version):
+    """
+    Fill cache from the stored artifact for (name, version). False if
+    MODEL_ARTIFACT_KEY is unset, there is none, it was written under other
+    library versions, its signature doesn't match, or it can't be unpickled
+    (that row is deleted).
+    """
+    import pickle
+
+    if not MODEL_ARTIFACT_KEY:
+        return False
+    try:
+        with get_conn().cursor() as cur:
+            _execute(
+                cur, "model_artifact_load",
+                """
+                SELECT artifact, libraries, signature FROM model_artifacts
+                WHERE model = %s AND data_version = %s
+                """,
+                (name, version),
+            )
+            row = cur.fetchone()
+    except Exception as e:
+        print(f"Could not load {name} model artifact: {e}")
+        return False
+    if row is None:
+        return False
+    if row[1] != _artifact_library_versions():
+        print(f"Ignoring {name} model artifact built with {row[1]}")
+        return False
+    if not _artifact_signed(name, version, row[0], row[2]):
+        print(f"Ignoring {name} model artifact without a valid signature")
+        return False
+    try:
+        entries = pickle.loads(bytes(row[0]))
+    except Exception as e:
+        print(f"Deleting unreadable {name} model artifact: {e}")
+        try:
+            with get_conn().cursor() as cur:
+                _execute(
+                    cur, "model_artifact_delete",
+                    "DELETE FROM model_artifacts WHERE model = %s AND data_version = %s",
+                    (name, version),
+                )
+        except Exception as e:
+            print(f"Could not delete {name} model artifact: {e}")
+        return False
+    _publish_cache(cache, entries, version)
+    return True
+
+
+def _save_model_artifact(cache, name, version, train_seconds, source):
+    """
+    Store cache (minus its version stamp) for (name, version), signed; drop
+    older versions. Nothing is stored without MODEL_ARTIFACT_KEY.
+    """
+    import pickle
+
+    if not MODEL_ARTIFACT_KEY:
+        return
+    entries = {k: v for k, v in cache.items() if k != "last_meta_ts"}
+    blob = pickle.dumps(entries)
+    try:
+        with get_conn().cursor() as cur:
+            _execute(
+                cur, "model_artifact_save",
+                """
+                INSERT INTO model_artifacts
+                    (model, data_version, source, train_seconds, artifact, libraries, signature)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (model, data_version) DO UPDATE
+                SET created_at = NOW(), source = EXCLUDED.source,
+                    train_seconds = EXCLUDED.train_seconds, artifact = EXCLUDED.artifact,
+                    libraries = EXCLUDED.libraries, signature = EXCLUDED.signature
+                """,
+                (
+                    name, version, source, train_seconds, psycopg2.Binary(blob),
+                    json.dumps(_artifact_library_versions()),
+                    psycopg2.Binary(_artifact_signature(name, version, blob)),
+                ),
+            )
+            _execute(
+                cur, "model_artifact_prune",
+                "DELETE FROM model_artifacts WHERE model = %s AND data_version < %s",
+                (name, version),
+            )
+    except Exception as e:
+        print(f"Could not save {name} model artifact: {e}")
+
+
+def _cached_payload(cache, name, compute, admit=False):
+    """
+    Return cache["payload"] if it was built for the current meta_updates
+    version, else load the stored artifact for that version, else recompute
+    it with compute() and store it (in cache and model_artifacts).
+    Concurrent misses for the same version share one load / retrain.
+    Records hit/artifact/miss and recompute duration under `name`.
+
+    With admit=True (web requests) the retrain runs on the bounded ML pool
+    and _ModelBusy is raised if it can't be queued or doesn't finish within
+    ML_ADMISSION_WAIT_S; see _admitted_retrain.
+    """
+    current_ts = _latest_meta_ts()
+    if cache.get("payload") is not None and cache.get("last_meta_ts") == current_ts:
+        MODEL_CACHE_REQUESTS.inc(cache=name, result="hit")
+        return cache["payload"]
+
+    def refresh():
+        # A flight for this version may have finished since the check above
+        if cache.get("payload") is not None and cache.get("last_meta_ts") == current_ts:
+            MODEL_CACHE_REQUESTS.inc(cache=name, result="hit")
+            return cache["payload"]
+        if current_ts is not None and _load_model_artifact(cache, name, current_ts):
+            MODEL_CACHE_REQUESTS.inc(cache=name, result="artifact")
+            return cache["payload"]
+        MODEL_CACHE_REQUESTS.inc(cache=name, result="miss")
+        if admit:
+            return _admitted_retrain(
+                name, current_ts, lambda: _train_payload(cache, name, compute, current_ts, source="web")
+            )
+        return _train_payload(cache, name, compute, current_ts, source="web")
+
+    return _single_flight(f"model_{name}", current_ts, refresh)
+
+
+def _publish_cache(cache, entries, version):
+    """
+    Swap in a model's entries (payload, model bundle, global drivers) and
+    their version together, so readers holding _CACHE_PUBLISH_LOCK never see
+    a payload next to another version's bundle.
+    """
+    with _CACHE_PUBLISH_LOCK:
+        cache.update(entries)
+        cache["last_meta_ts"] = version
+
+
+def _train_payload(cache, name, compute, version, source):
+    """Recompute a model payload for `version` and store it as its artifact."""
+    t0 = time.perf_counter()
+    # compute() fills extras with what it keeps besides the payload
+    extras = {}
+    payload = compute(extras=extras)
+    seconds = time.perf_counter() - t0
+    MODEL_TRAINING_SECONDS.observe(seconds, model=name)
+    _publish_cache(cache, dict(extras, payload=payload), version)
+    if version is not None:
+        _save_model_artifact(cache, name, version, seconds, source)
+    return payload
+
+
+# -------------------------------------------------
+# Admission control for model retrains
+# -------------------------------------------------
+# A retrain takes every core and a few copies of the training frame. Web
+# requests never train on their own thread: retrains run on a small pool of
+# their own (ML_MAX_CONCURRENT workers, ML_QUEUE_DEPTH more waiting), and a
+# request waits at most ML_ADMISSION_WAIT_S for one before it is answered
+# with the previous payload (if any) or a 202, plus Retry-After. The job
+# keeps running, so the retry is a cache hit. Cache hits and the KPI / filter
+# endpoints never go through here, so they keep the request threads and
+# the database to themselves while a model trains.
+ML_MAX_CONCURRENT = int(os.getenv("ML_MAX_CONCURRENT", "1"))
+ML_QUEUE_DEPTH = int(os.getenv("ML_QUEUE_DEPTH", "4"))
+ML_ADMISSION_WAIT_S = float(os.getenv("ML_ADMISSION_WAIT_S", "10"))
+ML_RETRY_AFTER_S = int(os.getenv("ML_RETRY_AFTER_S", "15"))
+# Threads per RandomForest / CatBoost fit or batch prediction (-1 = all cores)
+ML_TRAIN_THREADS = int(os.getenv("ML_TRAIN_THREADS", "-1"))
+# /score/batch streams scored at once; more get the same 202 + Retry-After
+ML_SCORE_CONCURRENT = int(os.getenv("ML_SCORE_CONCURRENT", "1"))
+
+_ML_POOL = ThreadPoolExecutor(max_workers=ML_MAX_CONCURRENT, thread_name_prefix="ml-retrain")
+_ML_JOBS = {}
+_ML_JOBS_LOCK = threading.Lock()
+_SCORE_SLOTS = threading.BoundedSemaphore(ML_SCORE_CONCURRENT)
+
+
+class _ModelBusy(Exception):
+    """The model needs a retrain that is queued or running; ask again later."""
+
+
+def _admitted_retrain(name, version, train):
+    """
+    Run train() for (name, version) on the ML pool and return its result,
+    joining a job already queued for the same key. Raises _ModelBusy when
+    the pool and queue are full, or when the job is still running after
+    ML_ADMISSION_WAIT_S.
+    """
+    key = (name, version)
+    with _ML_JOBS_LOCK:
+        job = _ML_JOBS.get(key)
+        if job is None:
+            if len(_ML_JOBS) >= ML_MAX_CONCURRENT + ML_QUEUE_DEPTH:
+                ML_ADMISSION.inc(model=name, outcome="rejected")
+                raise _ModelBusy(f"{name} retrain queue is full")
+
+            def run():
+                try:
+                    return train()
+                finally:
+                    with _ML_JOBS_LOCK:
+                        _ML_JOBS.pop(key, None)
+
+            job = _ML_JOBS[key] = _ML_POOL.submit(run)
+
+    try:
+        result = job.result(timeout=ML_ADMISSION_WAIT_S)
+    except FutureTimeoutError:
+        ML_ADMISSION.inc(model=name, outcome="timeout")
+        raise _ModelBusy(f"{name} is retraining") from None
+    ML_ADMISSION.inc(model=name, outcome="served")
+    return result
+
+
+def _model_busy_reply(stale=None, message="The model is retraining on new data; retry shortly."):
+    """
+    (body, status, headers) for a request that hit _ModelBusy: the stale
+    payload with X-Data-Stale when there is one, else a 202.
+    """
+    headers = {"Retry-After": str(ML_RETRY_AFTER_S)}
+    if stale is not None:
+        headers["X-Data-Stale"] = "true"
+        return stale, 200, headers
+    body = {
+        "status": "pending",
+        "message": message,
+        "retry_after": ML_RETRY_AFTER_S,
+    }
+    return body, 202, headers
+
+def _compute_feature_importance_payload(extras=None):
     """
     Run the expensive pandas + RF pipeline once and return the JSON payload.
+    `extras` is unused; it keeps the signature of the other model pipelines.
     """
     q = """
         SELECT
@@ -930,7 +2298,9 @@ def _compute_feature_importance_payload():
         FROM transacts
         WHERE sevicted IS NOT NULL
     """
-    df = pd.read_sql(q, conn)
+    stages = _StageTimer("feature_importance")
+    df = _read_frame("feature_importance_load", q)
+    stages.lap("sql_load")
 
     # sanity checks
     if df.empty or len(df) < 50:
@@ -959,7 +2329,7 @@ def _compute_feature_importance_payload():
             "top_features": []
         }
 
-    pipeline, auc, feature_names = _train_rf_with_imputation(X, y)
+    pipeline, auc, feature_names = _train_rf_with_imputation(X, y, stages=stages)
     if pipeline is None or feature_names is None:
         return {
             "auc": None,
@@ -969,6 +2339,7 @@ def _compute_feature_importance_payload():
     feature_importances = pipeline.named_steps['classifier'].feature_importances_
     feature_importance_pairs = list(zip(feature_names, feature_importances))
     feature_importance_pairs.sort(key=lambda x: x[1], reverse=True)
+    stages.lap("drivers")
 
     top_features = [
         {
@@ -977,23 +2348,31 @@ def _compute_feature_importance_payload():
         }
         for name, importance in feature_importance_pairs[:20]
     ]
+    stages.lap("payload")
 
     return {
         "auc": float(auc),
         "top_features": top_features
     }
 
-def _compute_transaction_model_payload():
+def _compute_transaction_model_payload(extras=None):
     """
     Train a CatBoost model on historical transaction data to predict eviction,
     then return 0–100 eviction risk scores for the 2024+ cohort,
     grouped by property code, with per-tenant top driver features.
+    The global drivers go into `extras` (cached next to the payload).
 
     Now includes:
       - daypaid (numeric)
       - dpaysourcechange (numeric)
       - spaymentsource (categorical)
     """
+    import pandas as pd
+    import numpy as np
+    from catboost import CatBoostClassifier, Pool
+
+    extras = {} if extras is None else extras
+
     q = """
     SELECT
         pscode,
@@ -1023,7 +2402,9 @@ def _compute_transaction_model_payload():
       AND dtmovein IS NOT NULL;
     """
 
-    df = pd.read_sql(q, conn)
+    stages = _StageTimer("transaction")
+    df = _read_frame("transaction_model_load", q)
+    stages.lap("sql_load")
 
     if df.empty or "sevicted" not in df.columns:
         return {}
@@ -1171,6 +2552,7 @@ def _compute_transaction_model_payload():
 
     # Safety: only keep drivers that are actually in the model feature set
     driver_specs = {k: v for k, v in driver_specs.items() if k in FEATURES}
+    stages.lap("feature_prep")
 
     low_risk_train = train_df[train_df["label"] == 0]
     baseline = {}
@@ -1199,6 +2581,7 @@ def _compute_transaction_model_payload():
             baseline[col] = float(series.median())
             std_val = float(series.std(ddof=0))
             spread[col] = std_val if std_val > 0 else None
+    stages.lap("drivers")
 
     # ------------------------------------------------------------------
     # Model training
@@ -1230,6 +2613,7 @@ def _compute_transaction_model_payload():
 
     train_pool = Pool(X_train, label=y_train, cat_features=cat_features_idx)
     test_pool = Pool(X_test, label=y_test, cat_features=cat_features_idx)
+    stages.lap("feature_prep")
 
     model = CatBoostClassifier(
         loss_function="Logloss",
@@ -1242,10 +2626,12 @@ def _compute_transaction_model_payload():
         auto_class_weights="Balanced",
         od_type="Iter",
         od_wait=200,
+        thread_count=ML_TRAIN_THREADS,
         verbose=False,
     )
 
     model.fit(train_pool, eval_set=test_pool, use_best_model=True)
+    stages.lap("train")
 
     # ------------------------------------------------------------------
     # Global top drivers for the transaction model (feature importance)
@@ -1273,13 +2659,15 @@ def _compute_transaction_model_payload():
                 }
             )
 
-        _TRANSACTION_MODEL_CACHE["global_drivers"] = global_tx_drivers
+        extras["global_drivers"] = global_tx_drivers
     except Exception as e:
         print(f"Could not compute global transaction drivers: {e}")
-        _TRANSACTION_MODEL_CACHE["global_drivers"] = []
+        extras["global_drivers"] = []
+    stages.lap("drivers")
 
     y_proba_test = model.predict_proba(test_pool)[:, 1]
     risk_score_0_100 = (y_proba_test * 100).round(1)
+    stages.lap("score")
 
     test_df = test_df.copy()
     test_df["eviction_risk_score"] = risk_score_0_100
@@ -1299,7 +2687,9 @@ def _compute_transaction_model_payload():
         dtmoveout_val = row.get("dtmoveout")
 
         # Per-tenant top drivers for the transaction model
-        top_drivers = _compute_top_drivers(
+        top_drivers = stages.timed(
+            "drivers",
+            _compute_top_drivers,
             row,
             driver_specs=driver_specs,
             baseline=baseline,
@@ -1336,424 +2726,515 @@ def _compute_transaction_model_payload():
                 "drivers": top_drivers,
             }
         )
+    stages.lap("payload")
 
     return out
 
 
+# -------------------------------------------------
+# Screening feature pipeline (adapted from NEW MODEL)
+# -------------------------------------------------
+def _clean_binary_flag(series: pd.Series) -> pd.Series:
+    """
+    Normalize common binary encodings to {0,1}.
+    Handles:
+    - booleans
+    - 0/1
+    - 'Y'/'N', 'YES'/'NO'
+    - 'TRUE'/'FALSE'
+    """
+    import pandas as pd
+
+    s = series.copy()
+
+    # If already numeric-ish, coerce and return
+    if pd.api.types.is_numeric_dtype(s):
+        return pd.to_numeric(s, errors="coerce")
+
+    s = s.astype(str).str.strip().str.upper()
+    mapping = {
+        "1": 1,
+        "0": 0,
+        "Y": 1,
+        "N": 0,
+        "YES": 1,
+        "NO": 0,
+        "TRUE": 1,
+        "FALSE": 0,
+    }
+    s = s.map(mapping)
+    return s
+
+def _coerce_numeric(series: pd.Series) -> pd.Series:
+    """Coerce numeric-like strings (optionally with %) to float."""
+    import pandas as pd
 
-def _compute_screening_model_payload():
+    s = series.astype(str).str.replace("%", "", regex=False)
+    return pd.to_numeric(s, errors="coerce")
+
+def _combine_years_months(df: pd.DataFrame, years_col: str, months_col: str) -> pd.Series:
+    """Combine years + months into total months."""
+    import pandas as pd
+
+    years = df[years_col] if years_col in df.columns else 0
+    months = df[months_col] if months_col in df.columns else 0
+    years = pd.to_numeric(years, errors="coerce").fillna(0)
+    months = pd.to_numeric(months, errors="coerce").fillna(0)
+    return years * 12 + months
+
+RENAME_MAP = {
+    # dates
+    "appcreddate": "applicant_credit_date",
+    # booleans / flags
+    "creditrun": "credit_run",
+    "hascpmess": "has_checkpoint_msgs",
+    "hasconsstmt": "has_consumer_stmt",
+    # employment / residence tenure
+    "currempmon": "current_emp_months",
+    "currempyear": "current_emp_years",
+    "currresmon": "current_res_months",
+    "currresyear": "current_res_years",
+    "prevempmon": "previous_emp_months",
+    "prevempyear": "previous_emp_years",
+    "prevresmon": "previous_res_months",
+    "prevresyear": "previous_res_years",
+    # income / debt
+    "primincome": "primary_income",
+    "addincome": "additional_income",
+    "riskscore": "risk_score",
+    "rentincratio": "rent_to_income_ratio_pct",
+    "debtincratio": "debt_to_income_ratio_pct",
+    "debtcredratio": "debt_to_credit_ratio_pct",
+    "studdebt": "student_debt",
+    "meddebt": "medical_debt",
+    "totscordebt": "total_scorable_debt",
+    "totdebt": "total_debt",
+    "appmoninc": "application_monthly_income",
+    "apptotdebt": "application_total_debt_policy",
+    "avgriskscore": "avg_risk_score",
+    # ids / names
+    "voyappcode": "voyager_applicant_code",
+    "voypropcode": "voyager_property_code",
+    "propertyid": "property_id",
+    "companyname": "company_name",
+    "companycode": "company_code",
+    "propname": "property_name",
+    "voypropname": "voyager_property_name",
+    "appstatus": "applicant_status",
+    "scoremodel": "score_model",
+    # free-text reason / checkpoint / review
+    "reasonone": "reason_1",
+    "reasontwo": "reason_2",
+    "reasonthree": "reason_3",
+    "checkmes1": "checkpoint_message_1",
+    "checkmes2": "checkpoint_message_2",
+    "itemrev1": "item_to_review_1",
+    "itemrev2": "item_to_review_2",
+    "itemrev3": "item_to_review_3",
+}
+
+# Which raw screening fields we want to expose as "driver" candidates
+# Which raw screening fields we want to expose as "driver" candidates.
+# These are also used as features in the screening model.
+# `direction` tells _compute_top_drivers whether higher or lower
+# than the low-risk baseline is considered worse.
+SCREENING_DRIVER_SPECS = {
+    "riskscore": {
+        "label": "Screening risk score",
+        "direction": "low",  # lower score = worse (e.g., 0 vs 719)
+    },
+    "rentincratio": {
+        "label": "Rent-to-income (%)",
+        "direction": "high",  # higher ratio = worse
+    },
+    "debtincratio": {
+        "label": "Debt-to-income (%)",
+        "direction": "high",  # higher ratio = worse
+    },
+    "totdebt": {
+        "label": "Total debt ($)",
+        "direction": "high",  # more debt = worse
+    },
+}
+
+# Renamed screening columns that never become model features (ids, names,
+# free text, leakage). _prepare_screening_features drops them and the model
+# loaders don't fetch them.
+SCREENING_ID_COLS = [
+    "applicant_credit_applicant_id",
+    "applicant_credit_id",
+    "applicant_id",
+    "voyager_applicant_code",
+    "voyager_property_code",
+    "property_id",
+    "application_id",
+]
+SCREENING_NAME_COLS = [
+    "company_name",
+    "company_code",
+    "property_name",
+    "voyager_property_name",
+]
+SCREENING_FREE_TEXT_COLS = [
+    "reason_1",
+    "reason_2",
+    "reason_3",
+    "checkpoint_message_1",
+    "checkpoint_message_2",
+    "item_to_review_1",
+    "item_to_review_2",
+    "item_to_review_3",
+]
+SCREENING_LEAKAGE_COLS = ["applicant_status"]
+
+# Engineered features -> the renamed columns they are computed from in
+# _prepare_screening_features. log_<col> and <date col>_<part> features are
+# resolved by pattern in _screening_score_columns.
+_SCREENING_DERIVED_INPUTS = {
+    "current_emp_tenure_months": ("current_emp_years", "current_emp_months"),
+    "current_res_tenure_months": ("current_res_years", "current_res_months"),
+    "previous_emp_tenure_months": ("previous_emp_years", "previous_emp_months"),
+    "previous_res_tenure_months": ("previous_res_years", "previous_res_months"),
+    "rent_to_income_ratio_ratio": ("rent_to_income_ratio_pct",),
+    "debt_to_income_ratio_ratio": ("debt_to_income_ratio_pct",),
+    "debt_to_credit_ratio_ratio": ("debt_to_credit_ratio_pct",),
+    "has_student_debt": ("student_debt",),
+    "has_medical_debt": ("medical_debt",),
+    "primary_income_share": ("primary_income", "income"),
+}
+_SCREENING_DATE_PART = re.compile(r"^(applicant_credit_date|date)_(year|month|dayofweek)$")
+
+
+def _screening_train_columns():
+    """screening DB columns the training query loads: every possible feature input."""
+    skip = set(
+        SCREENING_ID_COLS + SCREENING_NAME_COLS
+        + SCREENING_FREE_TEXT_COLS + SCREENING_LEAKAGE_COLS
+    )
+    return [c for c in SCREEN_HEADERS.values() if RENAME_MAP.get(c, c) not in skip]
+
+
+def _screening_score_columns(feature_cols):
     """
-    Train a CatBoost model using **screening-only features** (plus sevicted
-    label from transacts) to predict eviction (sevicted), then score the
-    2024+ cohort that has screening data.
+    screening DB columns needed to rebuild the trained `feature_cols`, plus the
+    driver columns shown per tenant. Table order, like s.* would give.
+    """
+    needed = set()
+    for feature in feature_cols:
+        date_part = _SCREENING_DATE_PART.match(feature)
+        if feature in _SCREENING_DERIVED_INPUTS:
+            needed.update(_SCREENING_DERIVED_INPUTS[feature])
+        elif date_part:
+            needed.add(date_part.group(1))
+        elif feature.startswith("log_"):
+            needed.add(feature[len("log_"):])
+        else:
+            needed.add(feature)
+    needed.update(SCREENING_DRIVER_SPECS)
+    return [c for c in SCREEN_HEADERS.values() if c in needed or RENAME_MAP.get(c) in needed]
 
-    In addition to per-tenant eviction_risk_score, this function also
-    computes the top 3 driver features (with comparison to a low-risk
-    baseline) so the frontend at-risk view can show local explanations.
+
+def _prepare_screening_features(
+    df_raw: pd.DataFrame,
+    is_train: bool,
+    trained_feature_cols=None,
+    trained_categorical_cols=None,
+):
+    """
+    Shared feature pipeline for training & scoring, adapted from NEW MODEL.
+
+    When is_train=True: returns (X, y, feature_cols, categorical_feature_cols)
+    When is_train=False: returns (X, None, feature_cols, categorical_feature_cols) but
+    uses `trained_feature_cols` / `trained_categorical_cols` to align columns.
     """
     import pandas as pd
     import numpy as np
-    from sklearn.model_selection import train_test_split
-    from catboost import CatBoostClassifier, Pool
-    from datetime import date, datetime as dt
 
-    # ------------------------------------------------------------------
-    # Helper functions (adapted from NEW MODEL)
-    # ------------------------------------------------------------------
-    def clean_binary_flag(series: pd.Series) -> pd.Series:
-        """
-        Normalize common binary encodings to {0,1}.
-        Handles:
-        - booleans
-        - 0/1
-        - 'Y'/'N', 'YES'/'NO'
-        - 'TRUE'/'FALSE'
-        """
-        s = series.copy()
-
-        # If already numeric-ish, coerce and return
-        if pd.api.types.is_numeric_dtype(s):
-            return pd.to_numeric(s, errors="coerce")
-
-        s = s.astype(str).str.strip().str.upper()
-        mapping = {
-            "1": 1,
-            "0": 0,
-            "Y": 1,
-            "N": 0,
-            "YES": 1,
-            "NO": 0,
-            "TRUE": 1,
-            "FALSE": 0,
-        }
-        s = s.map(mapping)
-        return s
-
-    def coerce_numeric(series: pd.Series) -> pd.Series:
-        """Coerce numeric-like strings (optionally with %) to float."""
-        s = series.astype(str).str.replace("%", "", regex=False)
-        return pd.to_numeric(s, errors="coerce")
+    df = df_raw.copy()
+
+    # 0) Rename DB columns -> canonical names used in NEW MODEL
+    df.rename(columns=RENAME_MAP, inplace=True)
+    df.columns = [str(c).strip() for c in df.columns]
+
+    target_col = "sevicted" if is_train else None
+
+    # --- Handle label for training ---
+    if is_train:
+        if target_col not in df.columns:
+            return None, None, None, None
+
+        df = df[df[target_col].notna()].copy()
+        df[target_col] = _clean_binary_flag(df[target_col])
+        df = df[df[target_col].isin([0, 1])].copy()
+        if df[target_col].nunique() < 2:
+            return None, None, None, None
+
+    # --- Type conversions: dates, numerics, booleans ---
+    date_cols_expected = ["applicant_credit_date", "date"]
+    date_cols = [c for c in date_cols_expected if c in df.columns]
+    for c in date_cols:
+        df[c] = pd.to_datetime(cast(df[c], "datetime64[ns]"), errors="coerce") if False else pd.to_datetime(df[c], errors="coerce")
+
+    numeric_cols_expected = [
+        "age",
+        "current_emp_months",
+        "current_emp_years",
+        "current_res_months",
+        "current_res_years",
+        "previous_emp_months",
+        "previous_emp_years",
+        "previous_res_months",
+        "previous_res_years",
+        "income",
+        "primary_income",
+        "additional_income",
+        "risk_score",
+        "rent",
+        "rent_to_income_ratio_pct",
+        "debt_to_income_ratio_pct",
+        "debt_to_credit_ratio_pct",
+        "student_debt",
+        "medical_debt",
+        "total_scorable_debt",
+        "total_debt",
+        "application_monthly_income",
+        "application_total_debt_policy",
+        "avg_risk_score",
+    ]
+    numeric_cols = [c for c in numeric_cols_expected if c in df.columns]
+    for c in numeric_cols:
+        # DB loads are already float (NUMERIC columns); only text input such
+        # as batch-scoring files needs coercing
+        if not pd.api.types.is_numeric_dtype(df[c]):
+            df[c] = _coerce_numeric(df[c])
+
+    bool_like_cols_expected = [
+        "credit_run",
+        "has_checkpoint_msgs",
+        "has_consumer_stmt",
+    ]
+    for c in bool_like_cols_expected:
+        if c in df.columns:
+            df[c] = _clean_binary_flag(df[c]).astype("float")
+
+    # --- Feature engineering ---
+    # Tenure in months
+    if "current_emp_years" in df.columns or "current_emp_months" in df.columns:
+        df["current_emp_tenure_months"] = _combine_years_months(
+            df, "current_emp_years", "current_emp_months"
+        )
 
-    def combine_years_months(df: pd.DataFrame, years_col: str, months_col: str) -> pd.Series:
-        """Combine years + months into total months."""
-        years = df[years_col] if years_col in df.columns else 0
-        months = df[months_col] if months_col in df.columns else 0
-        years = pd.to_numeric(years, errors="coerce").fillna(0)
-        months = pd.to_numeric(months, errors="coerce").fillna(0)
-        return years * 12 + months
+    if "current_res_years" in df.columns or "current_res_months" in df.columns:
+        df["current_res_tenure_months"] = _combine_years_months(
+            df, "current_res_years", "current_res_months"
+        )
 
-    def _safe_float(v):
-        return float(v) if v is not None and not pd.isna(v) else None
+    if "previous_emp_years" in df.columns or "previous_emp_months" in df.columns:
+        df["previous_emp_tenure_months"] = _combine_years_months(
+            df, "previous_emp_years", "previous_emp_months"
+        )
 
-    # Map DB column names -> canonical NEW MODEL names
-    RENAME_MAP = {
-        # dates
-        "appcreddate": "applicant_credit_date",
-        # booleans / flags
-        "creditrun": "credit_run",
-        "hascpmess": "has_checkpoint_msgs",
-        "hasconsstmt": "has_consumer_stmt",
-        # employment / residence tenure
-        "currempmon": "current_emp_months",
-        "currempyear": "current_emp_years",
-        "currresmon": "current_res_months",
-        "currresyear": "current_res_years",
-        "prevempmon": "previous_emp_months",
-        "prevempyear": "previous_emp_years",
-        "prevresmon": "previous_res_months",
-        "prevresyear": "previous_res_years",
-        # income / debt
-        "primincome": "primary_income",
-        "addincome": "additional_income",
-        "riskscore": "risk_score",
-        "rentincratio": "rent_to_income_ratio_pct",
-        "debtincratio": "debt_to_income_ratio_pct",
-        "debtcredratio": "debt_to_credit_ratio_pct",
-        "studdebt": "student_debt",
-        "meddebt": "medical_debt",
-        "totscordebt": "total_scorable_debt",
-        "totdebt": "total_debt",
-        "appmoninc": "application_monthly_income",
-        "apptotdebt": "application_total_debt_policy",
-        "avgriskscore": "avg_risk_score",
-        # ids / names
-        "voyappcode": "voyager_applicant_code",
-        "voypropcode": "voyager_property_code",
-        "propertyid": "property_id",
-        "companyname": "company_name",
-        "companycode": "company_code",
-        "propname": "property_name",
-        "voypropname": "voyager_property_name",
-        "appstatus": "applicant_status",
-        "scoremodel": "score_model",
-        # free-text reason / checkpoint / review
-        "reasonone": "reason_1",
-        "reasontwo": "reason_2",
-        "reasonthree": "reason_3",
-        "checkmes1": "checkpoint_message_1",
-        "checkmes2": "checkpoint_message_2",
-        "itemrev1": "item_to_review_1",
-        "itemrev2": "item_to_review_2",
-        "itemrev3": "item_to_review_3",
-    }
+    if "previous_res_years" in df.columns or "previous_res_months" in df.columns:
+        df["previous_res_tenure_months"] = _combine_years_months(
+            df, "previous_res_years", "previous_res_months"
+        )
 
-    # Which raw screening fields we want to expose as "driver" candidates
-    # Which raw screening fields we want to expose as "driver" candidates.
-    # These are also used as features in the screening model.
-    # `direction` tells _compute_top_drivers whether higher or lower
-    # than the low-risk baseline is considered worse.
-    SCREENING_DRIVER_SPECS = {
-        "riskscore": {
-            "label": "Screening risk score",
-            "direction": "low",  # lower score = worse (e.g., 0 vs 719)
-        },
-        "rentincratio": {
-            "label": "Rent-to-income (%)",
-            "direction": "high",  # higher ratio = worse
-        },
-        "debtincratio": {
-            "label": "Debt-to-income (%)",
-            "direction": "high",  # higher ratio = worse
-        },
-        "totdebt": {
-            "label": "Total debt ($)",
-            "direction": "high",  # more debt = worse
-        },
-    }
+    # Normalize percentage ratios to 0–1
+    ratio_pct_cols = [
+        "rent_to_income_ratio_pct",
+        "debt_to_income_ratio_pct",
+        "debt_to_credit_ratio_pct",
+    ]
+    for c in ratio_pct_cols:
+        if c in df.columns:
+            df[c.replace("_pct", "_ratio")] = df[c] / 100.0
+
+    # Flags for having student / medical debt
+    if "student_debt" in df.columns:
+        df["has_student_debt"] = (df["student_debt"].fillna(0) > 0).astype(int)
+
+    if "medical_debt" in df.columns:
+        df["has_medical_debt"] = (df["medical_debt"].fillna(0) > 0).astype(int)
+
+    # Primary income share
+    if "primary_income" in df.columns and "income" in df.columns:
+        df["primary_income_share"] = np.where(
+            (df["income"] > 0) & df["income"].notna(),
+            df["primary_income"] / df["income"],
+            np.nan,
+        )
 
-    def _prepare_screening_features(
-        df_raw: pd.DataFrame,
-        is_train: bool,
-        trained_feature_cols=None,
-        trained_categorical_cols=None,
-    ):
-        """
-        Shared feature pipeline for training & scoring, adapted from NEW MODEL.
-
-        When is_train=True: returns (X, y, feature_cols, categorical_feature_cols)
-        When is_train=False: returns (X, None, feature_cols, categorical_feature_cols) but
-        uses `trained_feature_cols` / `trained_categorical_cols` to align columns.
-        """
-        df = df_raw.copy()
-
-        # 0) Rename DB columns -> canonical names used in NEW MODEL
-        df.rename(columns=RENAME_MAP, inplace=True)
-        df.columns = [str(c).strip() for c in df.columns]
-
-        target_col = "sevicted" if is_train else None
-
-        # --- Handle label for training ---
-        if is_train:
-            if target_col not in df.columns:
-                return None, None, None, None
-
-            df = df[df[target_col].notna()].copy()
-            df[target_col] = clean_binary_flag(df[target_col])
-            df = df[df[target_col].isin([0, 1])].copy()
-            if df[target_col].nunique() < 2:
-                return None, None, None, None
-
-        # --- Type conversions: dates, numerics, booleans ---
-        date_cols_expected = ["applicant_credit_date", "date"]
-        date_cols = [c for c in date_cols_expected if c in df.columns]
-        for c in date_cols:
-            df[c] = pd.to_datetime(cast(df[c], "datetime64[ns]"), errors="coerce") if False else pd.to_datetime(df[c], errors="coerce")
-
-        numeric_cols_expected = [
-            "age",
-            "current_emp_months",
-            "current_emp_years",
-            "current_res_months",
-            "current_res_years",
-            "previous_emp_months",
-            "previous_emp_years",
-            "previous_res_months",
-            "previous_res_years",
-            "income",
-            "primary_income",
-            "additional_income",
-            "risk_score",
-            "rent",
-            "rent_to_income_ratio_pct",
-            "debt_to_income_ratio_pct",
-            "debt_to_credit_ratio_pct",
-            "student_debt",
-            "medical_debt",
-            "total_scorable_debt",
-            "total_debt",
-            "application_monthly_income",
-            "application_total_debt_policy",
-            "avg_risk_score",
-        ]
-        numeric_cols = [c for c in numeric_cols_expected if c in df.columns]
-        for c in numeric_cols:
-            df[c] = coerce_numeric(df[c])
-
-        bool_like_cols_expected = [
-            "credit_run",
-            "has_checkpoint_msgs",
-            "has_consumer_stmt",
-        ]
-        for c in bool_like_cols_expected:
-            if c in df.columns:
-                df[c] = clean_binary_flag(df[c]).astype("float")
-
-        # --- Feature engineering ---
-        # Tenure in months
-        if "current_emp_years" in df.columns or "current_emp_months" in df.columns:
-            df["current_emp_tenure_months"] = combine_years_months(
-                df, "current_emp_years", "current_emp_months"
-            )
+    # Log transforms for skewed amounts
+    log_cols = [
+        "income",
+        "application_monthly_income",
+        "total_debt",
+        "total_scorable_debt",
+        "student_debt",
+        "medical_debt",
+        "rent",
+    ]
+    for c in log_cols:
+        if c in df.columns:
+            df[f"log_{c}"] = np.log1p(df[c].clip(lower=0))
+
+    # Date parts from screening date
+    date_col_for_features = None
+    if "applicant_credit_date" in df.columns:
+        date_col_for_features = "applicant_credit_date"
+    elif "date" in df.columns:
+        date_col_for_features = "date"
+
+    if date_col_for_features is not None:
+        df[f"{date_col_for_features}_year"] = df[date_col_for_features].dt.year
+        df[f"{date_col_for_features}_month"] = df[date_col_for_features].dt.month
+        df[f"{date_col_for_features}_dayofweek"] = df[
+            date_col_for_features
+        ].dt.dayofweek
+
+    # If we're *only* scoring, align to trained feature set and bail early
+    if not is_train:
+        if trained_feature_cols is None:
+            return None, None, None, None
+
+        for c in trained_feature_cols:
+            if c not in df.columns:
+                df[c] = np.nan
+
+        X = df[trained_feature_cols].copy()
+        return X, None, trained_feature_cols, trained_categorical_cols
 
-        if "current_res_years" in df.columns or "current_res_months" in df.columns:
-            df["current_res_tenure_months"] = combine_years_months(
-                df, "current_res_years", "current_res_months"
-            )
+    # ------------------------------------------------------------------
+    # Training-time feature selection / leakage control (NEW MODEL logic)
+    # ------------------------------------------------------------------
+    id_cols = SCREENING_ID_COLS
+    name_cols = SCREENING_NAME_COLS
+    free_text_cols = SCREENING_FREE_TEXT_COLS
+    leakage_cols = SCREENING_LEAKAGE_COLS
+
+    cols_to_exclude = set()
+    for c in id_cols + name_cols + free_text_cols + leakage_cols + [target_col]:
+        if c in df.columns:
+            cols_to_exclude.add(c)
+    for c in date_cols:
+        if c in df.columns:
+            cols_to_exclude.add(c)
+
+    feature_cols = [c for c in df.columns if c not in cols_to_exclude]
+
+    numeric_feature_candidates = [
+        c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c])
+    ]
+    categorical_feature_candidates = [
+        c for c in feature_cols if not pd.api.types.is_numeric_dtype(df[c])
+    ]
 
-        if "previous_emp_years" in df.columns or "previous_emp_months" in df.columns:
-            df["previous_emp_tenure_months"] = combine_years_months(
-                df, "previous_emp_years", "previous_emp_months"
-            )
+    # Force some numeric-looking cols to categorical
+    force_categorical = [c for c in ["category", "score_model", "zip"]
+                         if c in numeric_feature_candidates]
+    numeric_feature_candidates = [
+        c for c in numeric_feature_candidates if c not in force_categorical
+    ]
+    categorical_feature_candidates = (
+        categorical_feature_candidates + force_categorical
+    )
 
-        if "previous_res_years" in df.columns or "previous_res_months" in df.columns:
-            df["previous_res_tenure_months"] = combine_years_months(
-                df, "previous_res_years", "previous_res_months"
-            )
+    # Drop redundant numeric inputs (keep derived features instead)
+    optional_drop_numeric = [
+        "current_emp_months",
+        "current_emp_years",
+        "current_res_months",
+        "current_res_years",
+        "previous_emp_months",
+        "previous_emp_years",
+        "previous_res_months",
+        "previous_res_years",
+        "rent_to_income_ratio_pct",
+        "debt_to_income_ratio_pct",
+        "debt_to_credit_ratio_pct",
+    ]
+    numeric_feature_candidates = [
+        c for c in numeric_feature_candidates if c not in optional_drop_numeric
+    ]
 
-        # Normalize percentage ratios to 0–1
-        ratio_pct_cols = [
-            "rent_to_income_ratio_pct",
-            "debt_to_income_ratio_pct",
-            "debt_to_credit_ratio_pct",
-        ]
-        for c in ratio_pct_cols:
-            if c in df.columns:
-                df[c.replace("_pct", "_ratio")] = df[c] / 100.0
-
-        # Flags for having student / medical debt
-        if "student_debt" in df.columns:
-            df["has_student_debt"] = (df["student_debt"].fillna(0) > 0).astype(int)
-
-        if "medical_debt" in df.columns:
-            df["has_medical_debt"] = (df["medical_debt"].fillna(0) > 0).astype(int)
-
-        # Primary income share
-        if "primary_income" in df.columns and "income" in df.columns:
-            df["primary_income_share"] = np.where(
-                (df["income"] > 0) & df["income"].notna(),
-                df["primary_income"] / df["income"],
-                np.nan,
-            )
+    feature_cols = numeric_feature_candidates + categorical_feature_candidates
 
-        # Log transforms for skewed amounts
-        log_cols = [
-            "income",
-            "application_monthly_income",
-            "total_debt",
-            "total_scorable_debt",
-            "student_debt",
-            "medical_debt",
-            "rent",
-        ]
-        for c in log_cols:
-            if c in df.columns:
-                df[f"log_{c}"] = np.log1p(df[c].clip(lower=0))
-
-        # Date parts from screening date
-        date_col_for_features = None
-        if "applicant_credit_date" in df.columns:
-            date_col_for_features = "applicant_credit_date"
-        elif "date" in df.columns:
-            date_col_for_features = "date"
-
-        if date_col_for_features is not None:
-            df[f"{date_col_for_features}_year"] = df[date_col_for_features].dt.year
-            df[f"{date_col_for_features}_month"] = df[date_col_for_features].dt.month
-            df[f"{date_col_for_features}_dayofweek"] = df[
-                date_col_for_features
-            ].dt.dayofweek
-
-        # If we're *only* scoring, align to trained feature set and bail early
-        if not is_train:
-            if trained_feature_cols is None:
-                return None, None, None, None
-
-            for c in trained_feature_cols:
-                if c not in df.columns:
-                    df[c] = np.nan
-
-            X = df[trained_feature_cols].copy()
-            return X, None, trained_feature_cols, trained_categorical_cols
-
-        # ------------------------------------------------------------------
-        # Training-time feature selection / leakage control (NEW MODEL logic)
-        # ------------------------------------------------------------------
-        id_cols = [
-            "applicant_credit_applicant_id",
-            "applicant_credit_id",
-            "applicant_id",
-            "voyager_applicant_code",
-            "voyager_property_code",
-            "property_id",
-            "application_id",
-        ]
-        name_cols = [
-            "company_name",
-            "company_code",
-            "property_name",
-            "voyager_property_name",
-        ]
-        free_text_cols = [
-            "reason_1",
-            "reason_2",
-            "reason_3",
-            "checkpoint_message_1",
-            "checkpoint_message_2",
-            "item_to_review_1",
-            "item_to_review_2",
-            "item_to_review_3",
-        ]
-        leakage_cols = ["applicant_status"]
+    X = df[feature_cols].copy()
+    y = df[target_col].astype(int).copy()
 
-        cols_to_exclude = set()
-        for c in id_cols + name_cols + free_text_cols + leakage_cols + [target_col]:
-            if c in df.columns:
-                cols_to_exclude.add(c)
-        for c in date_cols:
-            if c in df.columns:
-                cols_to_exclude.add(c)
+    # Drop degenerate features (all-missing or single level)
+    all_missing_cols = [c for c in X.columns if X[c].isna().all()]
+    single_level_cols = [
+        c for c in X.columns if X[c].dropna().nunique() <= 1
+    ]
+    drop_cols = sorted(set(all_missing_cols + single_level_cols))
+    if drop_cols:
+        X = X.drop(columns=drop_cols)
 
-        feature_cols = [c for c in df.columns if c not in cols_to_exclude]
+    feature_cols = X.columns.tolist()
+    categorical_feature_candidates = [
+        c for c in feature_cols if not pd.api.types.is_numeric_dtype(X[c])
+    ]
 
-        numeric_feature_candidates = [
-            c for c in feature_cols if pd.api.types.is_numeric_dtype(df[c])
-        ]
-        categorical_feature_candidates = [
-            c for c in feature_cols if not pd.api.types.is_numeric_dtype(df[c])
-        ]
+    return X, y, feature_cols, categorical_feature_candidates
 
-        # Force some numeric-looking cols to categorical
-        force_categorical = [c for c in ["category", "score_model", "zip"]
-                             if c in numeric_feature_candidates]
-        numeric_feature_candidates = [
-            c for c in numeric_feature_candidates if c not in force_categorical
-        ]
-        categorical_feature_candidates = (
-            categorical_feature_candidates + force_categorical
-        )
 
-        # Drop redundant numeric inputs (keep derived features instead)
-        optional_drop_numeric = [
-            "current_emp_months",
-            "current_emp_years",
-            "current_res_months",
-            "current_res_years",
-            "previous_emp_months",
-            "previous_emp_years",
-            "previous_res_months",
-            "previous_res_years",
-            "rent_to_income_ratio_pct",
-            "debt_to_income_ratio_pct",
-            "debt_to_credit_ratio_pct",
-        ]
-        numeric_feature_candidates = [
-            c for c in numeric_feature_candidates if c not in optional_drop_numeric
-        ]
+def _prep_catboost_frames(X: pd.DataFrame, cat_cols):
+    X_cb = X.copy()
+    for c in cat_cols or []:
+        if c in X_cb.columns:
+            X_cb[c] = X_cb[c].astype("string").fillna("MISSING")
+    cat_idx = [
+        X_cb.columns.get_loc(c)
+        for c in (cat_cols or [])
+        if c in X_cb.columns
+    ]
+    return X_cb, cat_idx
 
-        feature_cols = numeric_feature_candidates + categorical_feature_candidates
 
-        X = df[feature_cols].copy()
-        y = df[target_col].astype(int).copy()
+def _compute_screening_model_payload(extras=None):
+    """
+    Train a CatBoost model using **screening-only features** (plus sevicted
+    label from transacts) to predict eviction (sevicted), then score the
+    2024+ cohort that has screening data.
 
-        # Drop degenerate features (all-missing or single level)
-        all_missing_cols = [c for c in X.columns if X[c].isna().all()]
-        single_level_cols = [
-            c for c in X.columns if X[c].dropna().nunique() <= 1
-        ]
-        drop_cols = sorted(set(all_missing_cols + single_level_cols))
-        if drop_cols:
-            X = X.drop(columns=drop_cols)
+    In addition to per-tenant eviction_risk_score, this function also
+    computes the top 3 driver features (with comparison to a low-risk
+    baseline) so the frontend at-risk view can show local explanations.
+    The trained bundle and global drivers go into `extras` (cached next to
+    the payload).
+    """
+    import pandas as pd
+    from sklearn.model_selection import train_test_split
+    from catboost import CatBoostClassifier, Pool
+    from datetime import date, datetime as dt
 
-        feature_cols = X.columns.tolist()
-        categorical_feature_candidates = [
-            c for c in feature_cols if not pd.api.types.is_numeric_dtype(X[c])
-        ]
+    extras = {} if extras is None else extras
 
-        return X, y, feature_cols, categorical_feature_candidates
+    def _safe_float(v):
+        return float(v) if v is not None and not pd.isna(v) else None
 
     # ------------------------------------------------------------------
     # 1. Build training set: screening rows with known sevicted label
+    #    (only columns that can become features -- no ids / free text)
     # ------------------------------------------------------------------
-    q_train = """
+    q_train = f"""
         SELECT
-            s.*,
+            {", ".join(f"s.{c}" for c in _screening_train_columns())},
             t.sevicted
         FROM screening s
         INNER JOIN transacts t
             ON t.tscode = s.voyappcode
         WHERE t.sevicted IS NOT NULL;
     """
-    train_df_raw = pd.read_sql(q_train, conn)
+    stages = _StageTimer("screening")
+    train_df_raw = _read_frame("screening_model_train_load", q_train)
+    stages.lap("sql_load")
+
+    # Trained model + feature alignment for out-of-band scoring (batch CSVs);
+    # None unless this run trains one, so a failed retrain never serves a
+    # previous data version.
+    extras["model"] = None
 
     if train_df_raw.empty:
         return {}
@@ -1762,7 +3243,7 @@ def _compute_screening_model_payload():
     baseline_screen = {}
     spread_screen = {}
     try:
-        sev_series = clean_binary_flag(train_df_raw["sevicted"])
+        sev_series = _clean_binary_flag(train_df_raw["sevicted"])
         low_risk_train = train_df_raw[sev_series == 0].copy()
         if not low_risk_train.empty:
             for col in SCREENING_DRIVER_SPECS.keys():
@@ -1778,6 +3259,7 @@ def _compute_screening_model_payload():
     except Exception:
         baseline_screen = {}
         spread_screen = {}
+    stages.lap("drivers")
 
     X_all, y_all, feature_cols, cat_cols = _prepare_screening_features(
         train_df_raw, is_train=True
@@ -1803,21 +3285,10 @@ def _compute_screening_model_payload():
         stratify=y_train_full,
     )  # 0.25 of 0.8 => 0.2 => 60/20/20
 
-    def _prep_catboost_frames(X: pd.DataFrame):
-        X_cb = X.copy()
-        for c in cat_cols or []:
-            if c in X_cb.columns:
-                X_cb[c] = X_cb[c].astype("string").fillna("MISSING")
-        cat_idx = [
-            X_cb.columns.get_loc(c)
-            for c in (cat_cols or [])
-            if c in X_cb.columns
-        ]
-        return X_cb, cat_idx
-
-    X_train_cb, cat_idx = _prep_catboost_frames(X_train)
-    X_val_cb, _ = _prep_catboost_frames(X_val)
-    X_test_cb, _ = _prep_catboost_frames(X_test)
+    X_train_cb, cat_idx = _prep_catboost_frames(X_train, cat_cols)
+    X_val_cb, _ = _prep_catboost_frames(X_val, cat_cols)
+    X_test_cb, _ = _prep_catboost_frames(X_test, cat_cols)
+    stages.lap("feature_prep")
 
     cb_model = CatBoostClassifier(
         loss_function="Logloss",
@@ -1830,6 +3301,7 @@ def _compute_screening_model_payload():
         auto_class_weights="Balanced",
         verbose=False,
         early_stopping_rounds=50,
+        thread_count=ML_TRAIN_THREADS,
     )
 
     cb_model.fit(
@@ -1839,6 +3311,19 @@ def _compute_screening_model_payload():
         eval_set=(X_val_cb, y_val),
         use_best_model=True,
     )
+    stages.lap("train")
+
+    extras["model"] = {
+        "model": cb_model,
+        "feature_cols": feature_cols,
+        "cat_cols": cat_cols,
+        "raw_numeric_cols": [
+            c for c in train_df_raw.columns
+            if c != "sevicted" and pd.api.types.is_numeric_dtype(train_df_raw[c])
+        ],
+        "baseline": baseline_screen,
+        "spread": spread_screen,
+    }
 
     # ------------------------------------------------------------------
     # Global top drivers for the screening model (feature importance)
@@ -1863,15 +3348,17 @@ def _compute_screening_model_payload():
                 }
             )
 
-        _SCREENING_MODEL_CACHE["global_drivers"] = global_screen_drivers
+        extras["global_drivers"] = global_screen_drivers
     except Exception as e:
         print(f"Could not compute global screening drivers: {e}")
-        _SCREENING_MODEL_CACHE["global_drivers"] = []
+        extras["global_drivers"] = []
+    stages.lap("drivers")
 
     # ------------------------------------------------------------------
     # 3. Scoring cohort: 2024+ tenants with screening rows
+    #    (only the inputs of the trained features and the driver columns)
     # ------------------------------------------------------------------
-    q_score = """
+    q_score = f"""
         SELECT
             t.pscode,
             t.tscode,
@@ -1883,17 +3370,20 @@ def _compute_screening_model_payload():
             t.damoutcollections,
             t.drentwrittenoff,
             t.dnonrentwrittenoff,
-            s.*
+            {", ".join(f"s.{c}" for c in _screening_score_columns(feature_cols))}
         FROM transacts t
         INNER JOIN screening s
             ON t.tscode = s.voyappcode
         WHERE t.pscode IS NOT NULL
           AND t.tscode IS NOT NULL
           AND t.dtmovein IS NOT NULL
-          AND t.dtmovein >= DATE '2024-01-01';
+          AND t.dtmovein >= DATE '2024-01-01'
+          -- implied by dtmovein above; lets the planner prune partitions
+          AND t.bucket_month >= DATE '2024-01-01';
     """
 
-    score_df_raw = pd.read_sql(q_score, conn)
+    score_df_raw = _read_frame("screening_model_score_load", q_score)
+    stages.lap("sql_load")
 
     if score_df_raw.empty:
         return {}
@@ -1941,13 +3431,15 @@ def _compute_screening_model_payload():
     if X_score is None or X_score.empty:
         return {}
 
-    X_score_cb, _ = _prep_catboost_frames(X_score)
+    X_score_cb, _ = _prep_catboost_frames(X_score, cat_cols)
+    stages.lap("feature_prep")
 
     # ------------------------------------------------------------------
     # 4. Predict probabilities and convert to 0–100 eviction risk scores
     # ------------------------------------------------------------------
     proba = cb_model.predict_proba(X_score_cb)[:, 1]
     scores_0_100 = (proba * 100.0).round(1)
+    stages.lap("score")
 
     # ------------------------------------------------------------------
     # 5. Build property -> tenants mapping payload
@@ -1976,7 +3468,9 @@ def _compute_screening_model_payload():
                 return None
 
         # Per-tenant top drivers for screening model (based on raw screening cols)
-        top_drivers = _compute_top_drivers(
+        top_drivers = stages.timed(
+            "drivers",
+            _compute_top_drivers,
             row,
             driver_specs=SCREENING_DRIVER_SPECS,
             baseline=baseline_screen,
@@ -2007,6 +3501,7 @@ def _compute_screening_model_payload():
         }
 
         out.setdefault(pscode, []).append(tenant_entry)
+    stages.lap("payload")
 
     return out
 
@@ -2039,6 +3534,9 @@ def _compute_top_drivers(row, driver_specs, baseline, spread, max_drivers=3):
         Only features where the tenant is *worse than* the low-risk baseline
         (according to direction) are returned.
     """
+    import pandas as pd
+    import numpy as np
+
     drivers = []
 
     for feature_key, spec in driver_specs.items():
@@ -2207,6 +3705,8 @@ def _safe_int_value(v):
     """
     Convert a value to a plain Python int for JSON (NaN/None -> 0).
     """
+    import numpy as np
+
     try:
         if v is None or (isinstance(v, (float, np.floating)) and np.isnan(v)):
             return 0
@@ -2222,6 +3722,8 @@ def _safe_float_value(v):
     """
     Convert a value to a plain Python float for JSON (NaN/None -> 0.0).
     """
+    import numpy as np
+
     try:
         if v is None or (isinstance(v, (float, np.floating)) and np.isnan(v)):
             return 0.0
@@ -2361,54 +3863,278 @@ def get_tenants_screening_eviction_risk():
       }
     """
     try:
-        current_ts = _latest_meta_ts()
-
-        if (
-            _SCREENING_MODEL_CACHE.get("payload") is not None
-            and _SCREENING_MODEL_CACHE.get("last_meta_ts") == current_ts
-        ):
-            return jsonify(_SCREENING_MODEL_CACHE["payload"]), 200
-
-        payload = _compute_screening_model_payload()
-        _SCREENING_MODEL_CACHE["payload"] = payload
-        _SCREENING_MODEL_CACHE["last_meta_ts"] = current_ts
-
+        payload = _cached_payload(
+            _SCREENING_MODEL_CACHE, "screening", _compute_screening_model_payload, admit=True
+        )
         return jsonify(payload), 200
+    except _ModelBusy:
+        body, status, headers = _model_busy_reply(_SCREENING_MODEL_CACHE.get("payload"))
+        return jsonify(body), status, headers
     except Exception as e:
         print(f"Screening eviction risk model error: {str(e)}")
         import traceback
 
         traceback.print_exc()
+        _count_handled_error()
         # Fail soft – frontend will just see no tenants for this view.
         return jsonify({}), 200
 
 
+# -------------------------------------------------
+# Batch scoring for pending applicant files
+# -------------------------------------------------
+BATCH_SCORE_CHUNK_ROWS = 5000
+BATCH_SCORE_MAX_DRIVERS = 3
+
+
+def _current_screening_model(admit=False):
+    """
+    Return the trained screening-model bundle for the current data version,
+    retraining (and refreshing the payload cache) if it is stale.
+    Returns None when there isn't enough labelled data to train.
+    """
+    _cached_payload(
+        _SCREENING_MODEL_CACHE, "screening", _compute_screening_model_payload, admit=admit
+    )
+    # The bundle published with the payload just validated (or a newer pair)
+    with _CACHE_PUBLISH_LOCK:
+        return _SCREENING_MODEL_CACHE.get("model")
+
+
+def _iter_screening_chunks(stream, ext, chunk_rows=BATCH_SCORE_CHUNK_ROWS):
+    """
+    Yield DataFrames of at most `chunk_rows` screening rows, with headers
+    mapped to DB column names via SCREEN_MAPPING (same file layouts as
+    /upload). The file is read incrementally and never held in full.
+    """
+    import pandas as pd
+    from openpyxl import load_workbook
+
+    col_map = SCREEN_MAPPING["screening"]
+
+    def _mapped(df):
+        df.columns = [
+            col_map.get(str(c).strip().lower(), str(c).strip().lower())
+            for c in df.columns
+        ]
+        return df.loc[:, ~df.columns.duplicated()]
+
+    if ext == ".csv":
+        reader = pd.read_csv(
+            stream, dtype=str, encoding="utf-8-sig", chunksize=chunk_rows
+        )
+        for chunk in reader:
+            yield _mapped(chunk)
+
+    elif ext == ".xlsx":
+        wb = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            rows = wb.active.iter_rows(values_only=True)
+            # Same layout as /upload: 5 rows of report noise, then headers
+            for _ in range(5):
+                next(rows, None)
+            headers = next(rows, None)
+            if headers is None:
+                return
+            batch = []
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= chunk_rows:
+                    yield _mapped(pd.DataFrame(batch, columns=list(headers)))
+                    batch = []
+            if batch:
+                yield _mapped(pd.DataFrame(batch, columns=list(headers)))
+        finally:
+            wb.close()
+
+    else:
+        raise ValueError(f"Unsupported file type: {ext}")
+
+
+def _score_screening_chunk(chunk, bundle):
+    """
+    Score one mapped screening chunk with the trained screening model.
+    Returns (scores_0_100, drivers) aligned with the chunk rows.
+    """
+    chunk = chunk.copy()
+    # Uploaded values arrive as text; match the dtypes the model trained on
+    for c in bundle["raw_numeric_cols"]:
+        if c in chunk.columns:
+            chunk[c] = _coerce_numeric(chunk[c])
+
+    X, _, _, _ = _prepare_screening_features(
+        chunk,
+        is_train=False,
+        trained_feature_cols=bundle["feature_cols"],
+        trained_categorical_cols=bundle["cat_cols"],
+    )
+    X_cb, _ = _prep_catboost_frames(X, bundle["cat_cols"])
+
+    proba = bundle["model"].predict_proba(X_cb, thread_count=ML_TRAIN_THREADS)[:, 1]
+    scores_0_100 = (proba * 100.0).round(1)
+
+    driver_cols = [c for c in SCREENING_DRIVER_SPECS if c in chunk.columns]
+    drivers = [
+        _compute_top_drivers(
+            row,
+            driver_specs=SCREENING_DRIVER_SPECS,
+            baseline=bundle["baseline"],
+            spread=bundle["spread"],
+            max_drivers=BATCH_SCORE_MAX_DRIVERS,
+        )
+        for _, row in chunk[driver_cols].iterrows()
+    ]
+    return scores_0_100, drivers
+
+
+def _batch_score_csv(chunks, bundle):
+    """Generator of CSV text: one header piece, then one piece per chunk."""
+    import pandas as pd
+
+    header = ["voyappcode", "eviction_risk_score"]
+    for i in range(1, BATCH_SCORE_MAX_DRIVERS + 1):
+        header += [f"driver_{i}", f"driver_{i}_value", f"driver_{i}_baseline"]
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(header)
+    yield buf.getvalue()
+
+    for chunk in chunks:
+        if chunk.empty:
+            continue
+        scores, drivers = _score_screening_chunk(chunk, bundle)
+        app_codes = (
+            chunk["voyappcode"] if "voyappcode" in chunk.columns
+            else [None] * len(chunk)
+        )
+
+        buf.seek(0)
+        buf.truncate()
+        for app_code, score, tenant_drivers in zip(app_codes, scores, drivers):
+            line = [app_code if pd.notna(app_code) else "", float(score)]
+            for i in range(BATCH_SCORE_MAX_DRIVERS):
+                if i < len(tenant_drivers):
+                    d = tenant_drivers[i]
+                    line += [d["feature_label"], d["value"], d["baseline"]]
+                else:
+                    line += ["", "", ""]
+            writer.writerow(line)
+        yield buf.getvalue()
+
+
+@app.route("/score/batch", methods=["POST"])
+def batch_score():
+    """
+    Score a pending-applicant screening export (CSV/XLSX, same headers as
+    /upload) that has not been joined to transacts yet. Rows are streamed
+    through the current screening model in chunks and the response is a
+    streamed CSV of eviction_risk_score + top drivers per applicant. At
+    most ML_SCORE_CONCURRENT streams are scored at once; past that the
+    reply is a 202 with Retry-After, as when the model is retraining.
+    """
+    file = request.files.get("screening")
+    if file is None:
+        return jsonify({"error": "No file uploaded"}), 400
+
+    ext = os.path.splitext(file.filename)[1].lower()
+    if ext not in (".csv", ".xlsx"):
+        return jsonify({"message": "Unsupported file type"}), 400
+
+    # Checked here: once streaming starts the 200 and CSV header are sent
+    chunk_rows = request.args.get("chunksize", BATCH_SCORE_CHUNK_ROWS, type=int)
+    if chunk_rows < 1:
+        return jsonify({"error": "chunksize must be a positive integer"}), 400
+
+    try:
+        bundle = _current_screening_model(admit=True)
+    except _ModelBusy:
+        # Scoring against the previous model would mix data versions
+        body, status, headers = _model_busy_reply()
+        return jsonify(body), status, headers
+    except Exception as e:
+        print(f"Batch scoring model error: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        _count_handled_error()
+        return jsonify({"error": "Screening model unavailable"}), 500
+
+    if bundle is None:
+        return jsonify({"error": "Not enough labelled data to train the screening model"}), 503
+
+    if not _SCORE_SLOTS.acquire(blocking=False):
+        body, status, headers = _model_busy_reply(
+            message="Too many batch scoring jobs are running; retry shortly."
+        )
+        return jsonify(body), status, headers
+
+    out_name = os.path.splitext(os.path.basename(file.filename))[0] + "_scores.csv"
+
+    # Request teardown closes request.files before a streamed body is
+    # generated, so take ownership of the (disk-spooled) upload stream.
+    stream = file.stream
+    file.stream = io.BytesIO()
+
+    def generate():
+        try:
+            chunks = _iter_screening_chunks(stream, ext, chunk_rows)
+            yield from _batch_score_csv(chunks, bundle)
+        finally:
+            stream.close()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f'attachment; filename="{out_name}"'},
+    )
+    # The server closes the response once the stream ends or the client goes
+    # away, even if the generator never started
+    response.call_on_close(_SCORE_SLOTS.release)
+    return response
+
+
+def _cli_score_batch(args):
+    """`python Backend.py score-batch FILE [-o OUT]` – same pipeline as /score/batch."""
+    ext = os.path.splitext(args.input)[1].lower()
+    if args.chunksize < 1:
+        raise SystemExit("--chunksize must be a positive integer")
+    bundle = _current_screening_model()
+    if bundle is None:
+        raise SystemExit("Not enough labelled data to train the screening model")
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        with open(args.input, "rb") as f:
+            for piece in _batch_score_csv(
+                _iter_screening_chunks(f, ext, args.chunksize), bundle
+            ):
+                out.write(piece)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
 @app.route("/features/importance", methods=["GET", "OPTIONS"])
 def feature_importance():
     if request.method == "OPTIONS":
         return ("", 204)
 
     try:
-        current_ts = _latest_meta_ts()
-
-        # If cache is valid, serve instantly
-        if (
-            _FEATURE_IMPORTANCE_CACHE["payload"] is not None
-            and _FEATURE_IMPORTANCE_CACHE["last_meta_ts"] == current_ts
-        ):
-            return jsonify(_FEATURE_IMPORTANCE_CACHE["payload"]), 200
-
-        # Otherwise compute, store, return
-        payload = _compute_feature_importance_payload()
-        _FEATURE_IMPORTANCE_CACHE["payload"] = payload
-        _FEATURE_IMPORTANCE_CACHE["last_meta_ts"] = current_ts
-
+        # Served from cache unless the data changed since the last fit
+        payload = _cached_payload(
+            _FEATURE_IMPORTANCE_CACHE, "feature_importance", _compute_feature_importance_payload,
+            admit=True,
+        )
         return jsonify(payload), 200
+    except _ModelBusy:
+        body, status, headers = _model_busy_reply(_FEATURE_IMPORTANCE_CACHE.get("payload"))
+        return jsonify(body), status, headers
 
     except Exception as e:
         print(f"Feature importance error: {str(e)}")
         import traceback
         traceback.print_exc()
+        _count_handled_error()
         return jsonify({
             "auc": None,
             "top_features": []
@@ -2423,25 +4149,20 @@ def get_tenants_eviction_risk():
     Shape mirrors /tenants/active: { pscode: [ { ... }, ... ] }.
     """
     try:
-        current_ts = _latest_meta_ts()
-
         # Simple cache so we don't retrain the model for every property click
-        if (
-            _TRANSACTION_MODEL_CACHE.get("payload") is not None
-            and _TRANSACTION_MODEL_CACHE.get("last_meta_ts") == current_ts
-        ):
-            return jsonify(_TRANSACTION_MODEL_CACHE["payload"]), 200
-
-        payload = _compute_transaction_model_payload()
-        _TRANSACTION_MODEL_CACHE["payload"] = payload
-        _TRANSACTION_MODEL_CACHE["last_meta_ts"] = current_ts
-
+        payload = _cached_payload(
+            _TRANSACTION_MODEL_CACHE, "transaction", _compute_transaction_model_payload, admit=True
+        )
         return jsonify(payload), 200
+    except _ModelBusy:
+        body, status, headers = _model_busy_reply(_TRANSACTION_MODEL_CACHE.get("payload"))
+        return jsonify(body), status, headers
     except Exception as e:
         print(f"Eviction risk model error: {str(e)}")
         import traceback
 
         traceback.print_exc()
+        _count_handled_error()
         # Fail soft – frontend will simply show "no tenants" for this view.
         return jsonify({}), 200
 
@@ -2450,10 +4171,7 @@ def get_tenants_eviction_risk():
 # Fetch Active Tenants
 # -------------------------------------------------
 
-@app.route('/tenants/active', methods=['GET'])
-@app.route('/tenants/active', methods=['GET'])
-def get_tenants():
-    query = """
+TENANTS_ACTIVE_SQL = """
     SELECT 
         t.pscode,
         t.tscode,
@@ -2471,39 +4189,89 @@ def get_tenants():
       AND t.tscode IS NOT NULL
       AND t.dtmovein IS NOT NULL
       AND t.dtmovein >= DATE '2024-01-01'
+      AND t.bucket_month >= DATE '2024-01-01'  -- partition pruning
       AND (t.dtmoveout IS NULL OR t.dtmoveout > DATE '2025-04-01')
     ORDER BY t.dtmovein DESC, t.tscode;
     """
 
+
+def _tenants_active_payload(tenant_list):
+    """Group TENANTS_ACTIVE_SQL rows (tuples) into { pscode: [tenant, ...] }."""
+    tenant_mapping = {}
+    for row in tenant_list:
+        # unpack all fields returned by the query
+        pscode, tscode, uscode, dtmovein, dtmoveout, riskscore, totdebt, rentincratio, debtincratio = row
+
+        if pscode not in tenant_mapping:
+            tenant_mapping[pscode] = []
+
+        tenant_mapping[pscode].append({
+            'tscode': tscode,
+            'uscode': uscode,
+            'dtmovein': dtmovein.isoformat() if dtmovein else None,
+            'dtmoveout': dtmoveout.isoformat() if dtmoveout else None,
+            'riskscore': riskscore,
+            'totdebt': totdebt,
+            'rentincratio': rentincratio,
+            'debtincratio': debtincratio
+        })
+    return tenant_mapping
+
+
+@app.route('/tenants/active', methods=['GET'])
+@app.route('/tenants/active', methods=['GET'])
+def get_tenants():
     try:
-        cursor.execute(query)
-        tenant_list = cursor.fetchall()
-
-        tenant_mapping = {}
-        for row in tenant_list:
-            # unpack all fields returned by the query
-            pscode, tscode, uscode, dtmovein, dtmoveout, riskscore, totdebt, rentincratio, debtincratio = row
-
-
-            if pscode not in tenant_mapping:
-                tenant_mapping[pscode] = []
-            
-            tenant_mapping[pscode].append({
-                'tscode': tscode,
-                'uscode': uscode,
-                'dtmovein': dtmovein.isoformat() if dtmovein else None,
-                'dtmoveout': dtmoveout.isoformat() if dtmoveout else None,
-                'riskscore': riskscore,
-                'totdebt': totdebt,
-                'rentincratio': rentincratio,
-                'debtincratio': debtincratio
-            })
+        _execute(get_cursor(), "tenants_active", TENANTS_ACTIVE_SQL)
+        return jsonify(_tenants_active_payload(get_cursor().fetchall()))
 
-        return jsonify(tenant_mapping)
-    
     except Exception as e:
         return jsonify({'Error': str(e)}), 500
 
+
+def _global_drivers_payload(admit=False):
+    # Warm both model caches if needed
+    models = (
+        (_TRANSACTION_MODEL_CACHE, "transaction", _compute_transaction_model_payload),
+        (_SCREENING_MODEL_CACHE, "screening", _compute_screening_model_payload),
+    )
+    if not admit:
+        for cache, name, compute in models:
+            _cached_payload(cache, name, compute)
+        return _global_drivers_from_caches()
+
+    # Admitted retrains are queued side by side, then waited on together, so
+    # one still training (_ModelBusy) doesn't hold back the other's retrain
+    with ThreadPoolExecutor(max_workers=len(models), thread_name_prefix="global-drivers") as pool:
+        waits = [pool.submit(_cached_payload, cache, name, compute, admit=True) for cache, name, compute in models]
+    busy = None
+    for wait in waits:
+        try:
+            wait.result()
+        except _ModelBusy as e:
+            busy = busy or e
+    if busy is not None:
+        raise busy
+    return _global_drivers_from_caches()
+
+
+def _global_drivers_from_caches():
+    screening_drivers = _SCREENING_MODEL_CACHE.get("global_drivers", []) or []
+    tx_drivers = _TRANSACTION_MODEL_CACHE.get("global_drivers", []) or []
+
+    return {
+        "screening": {"top_drivers": screening_drivers},
+        "transactions": {"top_drivers": tx_drivers},
+    }
+
+
+def _stale_global_drivers():
+    """Drivers of whatever models are cached, or None if neither is."""
+    if _TRANSACTION_MODEL_CACHE.get("payload") is None and _SCREENING_MODEL_CACHE.get("payload") is None:
+        return None
+    return _global_drivers_from_caches()
+
+
 @app.route("/models/global-drivers", methods=["GET"])
 def models_global_drivers():
     """
@@ -2527,40 +4295,17 @@ def models_global_drivers():
       }
     """
     try:
-        current_ts = _latest_meta_ts()
-
-        # Warm transaction model cache if needed
-        if (
-            _TRANSACTION_MODEL_CACHE.get("payload") is None
-            or _TRANSACTION_MODEL_CACHE.get("last_meta_ts") != current_ts
-        ):
-            tx_payload = _compute_transaction_model_payload()
-            _TRANSACTION_MODEL_CACHE["payload"] = tx_payload
-            _TRANSACTION_MODEL_CACHE["last_meta_ts"] = current_ts
-
-        # Warm screening model cache if needed
-        if (
-            _SCREENING_MODEL_CACHE.get("payload") is None
-            or _SCREENING_MODEL_CACHE.get("last_meta_ts") != current_ts
-        ):
-            sc_payload = _compute_screening_model_payload()
-            _SCREENING_MODEL_CACHE["payload"] = sc_payload
-            _SCREENING_MODEL_CACHE["last_meta_ts"] = current_ts
-
-        screening_drivers = _SCREENING_MODEL_CACHE.get("global_drivers", []) or []
-        tx_drivers = _TRANSACTION_MODEL_CACHE.get("global_drivers", []) or []
+        return jsonify(_global_drivers_payload(admit=True)), 200
 
-        return jsonify(
-            {
-                "screening": {"top_drivers": screening_drivers},
-                "transactions": {"top_drivers": tx_drivers},
-            }
-        ), 200
+    except _ModelBusy:
+        body, status, headers = _model_busy_reply(_stale_global_drivers())
+        return jsonify(body), status, headers
 
     except Exception as e:
         print(f"Global drivers error: {e}")
         import traceback
         traceback.print_exc()
+        _count_handled_error()
         return jsonify(
             {
                 "screening": {"top_drivers": []},
@@ -2568,6 +4313,238 @@ def models_global_drivers():
             }
         ), 200
 
+# -------------------------------------------------
+# Admin: slow-query log
+# -------------------------------------------------
+@app.route("/admin/slow-queries", methods=["GET"])
+def admin_slow_queries():
+    """
+    Slow-query fingerprints over the last ?hours= (default 24), worst total
+    time first, up to ?limit= (default 20). With ?fingerprint=<id>, lists
+    that fingerprint's recent entries including parameters and any captured
+    EXPLAIN (ANALYZE, BUFFERS) plans. Requires X-Admin-Token.
+    """
+    denied = _require_admin()
+    if denied is not None:
+        return denied
+
+    try:
+        hours = float(request.args.get("hours", 24))
+        limit = max(1, min(int(request.args.get("limit", 20)), 200))
+    except ValueError:
+        return jsonify({"error": "hours and limit must be numbers"}), 400
+    fingerprint = request.args.get("fingerprint")
+
+    with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+        if fingerprint:
+            _execute(cur, "admin_slow_query_entries", """
+                SELECT logged_at, query_name, statement, params, duration_ms, plan
+                FROM slow_queries
+                WHERE fingerprint = %s
+                  AND logged_at >= NOW() - make_interval(secs => %s)
+                ORDER BY logged_at DESC
+                LIMIT %s
+            """, (fingerprint, hours * 3600, limit))
+            entries = [
+                {
+                    "logged_at": r["logged_at"].isoformat(),
+                    "query_name": r["query_name"],
+                    "statement": r["statement"],
+                    "params": json.loads(r["params"]) if r["params"] else None,
+                    "duration_ms": r["duration_ms"],
+                    "plan": r["plan"],
+                }
+                for r in cur.fetchall()
+            ]
+            return jsonify({"fingerprint": fingerprint, "entries": entries}), 200
+
+        _execute(cur, "admin_slow_queries", """
+            SELECT
+                fingerprint,
+                array_agg(DISTINCT query_name) AS query_names,
+                COUNT(*) AS count,
+                SUM(duration_ms) AS total_ms,
+                AVG(duration_ms) AS mean_ms,
+                percentile_cont(0.95) WITHIN GROUP (ORDER BY duration_ms) AS p95_ms,
+                MAX(duration_ms) AS max_ms,
+                MAX(logged_at) AS last_seen,
+                COUNT(plan) AS plans_captured,
+                MIN(statement) AS statement
+            FROM slow_queries
+            WHERE logged_at >= NOW() - make_interval(secs => %s)
+            GROUP BY fingerprint
+            ORDER BY total_ms DESC
+            LIMIT %s
+        """, (hours * 3600, limit))
+        rows = cur.fetchall()
+
+    return jsonify({
+        "threshold_ms": SLOW_QUERY_MS,
+        "hours": hours,
+        "fingerprints": [
+            {
+                "fingerprint": r["fingerprint"],
+                "query_names": r["query_names"],
+                "count": r["count"],
+                "total_ms": r["total_ms"],
+                "mean_ms": r["mean_ms"],
+                "p95_ms": r["p95_ms"],
+                "max_ms": r["max_ms"],
+                "last_seen": r["last_seen"].isoformat(),
+                "plans_captured": r["plans_captured"],
+                "statement": r["statement"],
+            }
+            for r in rows
+        ],
+    }), 200
+
+
+# -------------------------------------------------
+# Admin: ingest rejects
+# -------------------------------------------------
+@app.route("/admin/ingest-rejects", methods=["GET"])
+def admin_ingest_rejects():
+    """
+    Upload cells that failed typed parsing (stored as NULL) over the last
+    ?hours= (default 24): counts per source file / column, plus the most
+    recent ?limit= (default 50) entries. Requires X-Admin-Token.
+    """
+    denied = _require_admin()
+    if denied is not None:
+        return denied
+
+    try:
+        hours = float(request.args.get("hours", 24))
+        limit = max(1, min(int(request.args.get("limit", 50)), 500))
+    except ValueError:
+        return jsonify({"error": "hours and limit must be numbers"}), 400
+
+    with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+        _execute(cur, "admin_ingest_reject_counts", """
+            SELECT source, table_name, column_name, COUNT(*) AS count, MAX(logged_at) AS last_seen
+            FROM ingest_rejects
+            WHERE logged_at >= NOW() - make_interval(secs => %s)
+            GROUP BY source, table_name, column_name
+            ORDER BY last_seen DESC, count DESC
+        """, (hours * 3600,))
+        counts = cur.fetchall()
+
+        _execute(cur, "admin_ingest_reject_entries", """
+            SELECT logged_at, source, table_name, row_key, column_name, raw_value
+            FROM ingest_rejects
+            WHERE logged_at >= NOW() - make_interval(secs => %s)
+            ORDER BY logged_at DESC, id DESC
+            LIMIT %s
+        """, (hours * 3600, limit))
+        entries = cur.fetchall()
+
+    return jsonify({
+        "hours": hours,
+        "counts": [
+            {
+                "source": r["source"],
+                "table": r["table_name"],
+                "column": r["column_name"],
+                "count": r["count"],
+                "last_seen": r["last_seen"].isoformat(),
+            }
+            for r in counts
+        ],
+        "entries": [
+            {
+                "logged_at": r["logged_at"].isoformat(),
+                "source": r["source"],
+                "table": r["table_name"],
+                "row_key": r["row_key"],
+                "column": r["column_name"],
+                "raw_value": r["raw_value"],
+            }
+            for r in entries
+        ],
+    }), 200
+
+
+# -------------------------------------------------
+# Admin: table maintenance
+# -------------------------------------------------
+@app.route("/admin/maintenance", methods=["GET"])
+def admin_maintenance():
+    """
+    Planner-statistics freshness and bloat of transacts and screening (row
+    estimate, live / dead rows, rows modified since the last ANALYZE, last
+    (auto)analyze and (auto)vacuum, table size and estimated index bloat),
+    plus the latest ?limit= (default 50) maintenance_log entries. Requires
+    X-Admin-Token.
+    """
+    denied = _require_admin()
+    if denied is not None:
+        return denied
+
+    try:
+        limit = max(1, min(int(request.args.get("limit", 50)), 500))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+
+    def ts(value):
+        return value.isoformat() if value is not None else None
+
+    tables = {}
+    with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+        for table in MAINTENANCE_TABLES:
+            health = _table_health(cur, table)
+            for key in ("analyzed_at", "vacuumed_at"):
+                health[key] = ts(health[key])
+            for part in health.get("partitions", []):
+                part["analyzed_at"], part["vacuumed_at"] = ts(part["analyzed_at"]), ts(part["vacuumed_at"])
+            _execute(cur, "index_bloat", INDEX_BLOAT_SQL, {"table": table})
+            health["indexes"] = [
+                {
+                    "name": r["index_name"],
+                    "bytes": r["bytes"],
+                    "estimated_bytes": r["estimated_bytes"],
+                    "bloat_fraction": (
+                        max(0.0, 1.0 - r["estimated_bytes"] / r["bytes"])
+                        if r["estimated_bytes"] is not None and r["bytes"] else None
+                    ),
+                }
+                for r in cur.fetchall()
+            ]
+            tables[table] = health
+
+        _execute(cur, "admin_maintenance_history", """
+            SELECT ran_at, table_name, action, reason, rows_changed, live_rows, dead_rows,
+                   table_bytes, index_bytes, duration_ms
+            FROM maintenance_log
+            ORDER BY ran_at DESC, id DESC
+            LIMIT %s
+        """, (limit,))
+        history = cur.fetchall()
+
+    return jsonify({
+        "thresholds": {
+            "analyze_change_fraction": ANALYZE_CHANGE_FRACTION,
+            "vacuum_dead_fraction": VACUUM_DEAD_FRACTION,
+            "vacuum_min_dead_rows": VACUUM_MIN_DEAD_ROWS,
+        },
+        "tables": tables,
+        "history": [
+            {
+                "ran_at": r["ran_at"].isoformat(),
+                "table": r["table_name"],
+                "action": r["action"],
+                "reason": r["reason"],
+                "rows_changed": r["rows_changed"],
+                "live_rows": r["live_rows"],
+                "dead_rows": r["dead_rows"],
+                "table_bytes": r["table_bytes"],
+                "index_bytes": r["index_bytes"],
+                "duration_ms": r["duration_ms"],
+            }
+            for r in history
+        ],
+    }), 200
+
+
 # -------------------------------------------------
 # Health
 # -------------------------------------------------
@@ -2576,5 +4553,260 @@ def health():
     return jsonify({"ok": True})
 
 
+# -------------------------------------------------
+# Offline CLI: train / score / warm / ingest
+# -------------------------------------------------
+# The work the endpoints otherwise do lazily, for cron jobs and deploys.
+# Trained caches land in model_artifacts, so web workers load them instead
+# of training inside a request. Progress and stage timings go to stderr.
+MODEL_PIPELINES = {
+    "transaction": (_TRANSACTION_MODEL_CACHE, _compute_transaction_model_payload),
+    "screening": (_SCREENING_MODEL_CACHE, _compute_screening_model_payload),
+    "feature_importance": (_FEATURE_IMPORTANCE_CACHE, _compute_feature_importance_payload),
+}
+SCORED_MODELS = ("transaction", "screening")
+
+# Read endpoints `warm --url` requests on a running server
+WARM_PATHS = (
+    "/kpis/snapshot",
+    "/kpis/timeseries",
+    "/filters/options",
+    "/features/importance",
+    "/tenants/eviction-risk",
+    "/tenants/screening-eviction-risk",
+    "/models/global-drivers",
+)
+
+
+def _print_stage(pipeline, stage, seconds, peak):
+    print(f"  {pipeline:<20} {stage:<14} {seconds * 1000.0:10.1f} ms", file=sys.stderr)
+
+
+def _stored_artifacts(version):
+    """
+    {model: row} of model_artifacts stored for `version` that this process
+    would load: same library versions and a valid signature.
+    """
+    if not MODEL_ARTIFACT_KEY:
+        return {}
+    with get_conn().cursor(cursor_factory=RealDictCursor) as cur:
+        _execute(
+            cur, "model_artifact_list",
+            """
+            SELECT model, created_at, source, train_seconds, libraries, artifact, signature
+            FROM model_artifacts WHERE data_version = %s
+            """,
+            (version,),
+        )
+        return {
+            r["model"]: r for r in cur.fetchall()
+            if r["libraries"] == _artifact_library_versions()
+            and _artifact_signed(r["model"], version, r["artifact"], r["signature"])
+        }
+
+
+def _cli_model_names(text, allowed):
+    names = [n.strip() for n in text.split(",") if n.strip()]
+    unknown = [n for n in names if n not in allowed]
+    if unknown:
+        raise SystemExit(f"unknown model(s): {', '.join(unknown)}; use {', '.join(allowed)}")
+    return names
+
+
+def _cli_ensure_models(names, force=False):
+    """Train and store each model unless this data version already has it."""
+    version = _latest_meta_ts()
+    stored = _stored_artifacts(version) if version is not None else {}
+    print(f"Data version {version}", file=sys.stderr)
+    if not MODEL_ARTIFACT_KEY:
+        print("MODEL_ARTIFACT_KEY is not set: trained models are not stored for other processes",
+              file=sys.stderr)
+    STAGE_LISTENERS.append(_print_stage)
+    try:
+        for name in names:
+            if name in stored and not force:
+                row = stored[name]
+                print(
+                    f"{name}: stored {row['created_at']:%Y-%m-%d %H:%M:%S} by {row['source']}",
+                    file=sys.stderr,
+                )
+                continue
+            cache, compute = MODEL_PIPELINES[name]
+            t0 = time.perf_counter()
+            _train_payload(cache, name, compute, version, source="cli")
+            print(f"{name}: trained in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    finally:
+        STAGE_LISTENERS.remove(_print_stage)
+
+
+def _cli_train(args):
+    """`python Backend.py train [--models ...] [--force]`"""
+    _cli_ensure_models(_cli_model_names(args.models, MODEL_PIPELINES), force=args.force)
+
+
+def _cli_score(args):
+    """
+    `python Backend.py score [-o OUT]` – per-tenant eviction risk scores and
+    top drivers of the current models as CSV (training them if needed).
+    """
+    names = _cli_model_names(args.models, SCORED_MODELS)
+    _cli_ensure_models(names)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        writer = csv.writer(out)
+        header = ["model", "pscode", "tscode", "uscode", "eviction_risk_score"]
+        for i in range(1, BATCH_SCORE_MAX_DRIVERS + 1):
+            header += [f"driver_{i}", f"driver_{i}_value", f"driver_{i}_baseline"]
+        writer.writerow(header)
+        for name in names:
+            cache, compute = MODEL_PIPELINES[name]
+            payload = _cached_payload(cache, name, compute) or {}
+            for pscode, tenants in payload.items():
+                for t in tenants:
+                    line = [name, pscode, t.get("tscode"), t.get("uscode"), t.get("eviction_risk_score")]
+                    drivers = t.get("drivers") or []
+                    for i in range(BATCH_SCORE_MAX_DRIVERS):
+                        d = drivers[i] if i < len(drivers) else {}
+                        line += [d.get("feature_label"), d.get("value"), d.get("baseline")]
+                    writer.writerow(line)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+def _cli_warm(args):
+    """
+    `python Backend.py warm [--url URL ...]` – store every model for the
+    current data version (training what's missing), then request the read
+    endpoints on each running server so its in-process caches (and KPI
+    mirror) are loaded before users arrive. Exits 1 if a request fails.
+    """
+    import urllib.error
+    import urllib.request
+
+    _cli_ensure_models(list(MODEL_PIPELINES))
+
+    failed = False
+    for base in args.url or []:
+        for path in WARM_PATHS:
+            t0 = time.perf_counter()
+            try:
+                with urllib.request.urlopen(base.rstrip("/") + path, timeout=args.timeout) as resp:
+                    resp.read()
+                    status = resp.status
+            except (urllib.error.URLError, OSError) as e:
+                status = getattr(e, "code", None) or str(getattr(e, "reason", e))
+            ok = status == 200
+            failed = failed or not ok
+            print(f"{base}{path}: {status} in {(time.perf_counter() - t0) * 1000.0:.0f} ms", file=sys.stderr)
+    if failed:
+        raise SystemExit(1)
+
+
+def _cli_ingest(args):
+    """
+    `python Backend.py ingest FILE ...` – the /upload (one file) or
+    /upload/batch (several files or a .zip) handler, run in-process.
+    Prints the JSON response; exits 1 if the upload was rejected.
+    """
+    query = {"force": "1"} if args.force else {}
+    single = len(args.files) == 1 and not args.files[0].lower().endswith(".zip")
+    if single:
+        kind = args.kind or _upload_kind_for(args.files[0])
+        if kind is None:
+            raise SystemExit(f"Can't tell whether {args.files[0]} is transaction or screening data; pass --kind")
+        field = "transact" if kind == "transacts" else "screening"
+        if args.replace:
+            query["mode"] = "replace"
+        url = "/upload"
+    else:
+        if args.replace:
+            raise SystemExit("--replace takes a single file")
+        field = {"transacts": "transact", "screening": "screening"}.get(args.kind, "file")
+        url = "/upload/batch"
+
+    handles = [open(path, "rb") for path in args.files]
+    try:
+        data = {field: [(f, os.path.basename(f.name)) for f in handles]}
+        resp = app.test_client().post(
+            url, query_string=query, data=data, content_type="multipart/form-data",
+            environ_base={CLI_ENVIRON_KEY: True},
+        )
+    finally:
+        for f in handles:
+            f.close()
+    print(json.dumps(resp.get_json(), indent=2, default=str))
+    if resp.status_code >= 400:
+        raise SystemExit(1)
+
+
 if __name__ == "__main__":
-    app.run(port=5000, debug=True)
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Eviction risk dashboard backend")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("serve", help="run the Flask API (default)")
+
+    p_migrate = sub.add_parser("migrate", help="create / upgrade the database schema")
+    p_migrate.add_argument(
+        "--status", action="store_true", help="list pending migrations without applying them"
+    )
+
+    p_score = sub.add_parser(
+        "score-batch", help="score a screening CSV/XLSX export of pending applicants"
+    )
+    p_score.add_argument("input", help="screening .csv or .xlsx file")
+    p_score.add_argument("-o", "--output", help="output CSV (default: stdout)")
+    p_score.add_argument("--chunksize", type=int, default=BATCH_SCORE_CHUNK_ROWS)
+
+    p_train = sub.add_parser("train", help="train the models for the current data version and store them")
+    p_train.add_argument("--models", default=",".join(MODEL_PIPELINES), help="comma list of models")
+    p_train.add_argument("--force", action="store_true", help="retrain models already stored for this version")
+
+    p_scores = sub.add_parser("score", help="write per-tenant eviction risk scores as CSV")
+    p_scores.add_argument("--models", default=",".join(SCORED_MODELS), help="comma list of models")
+    p_scores.add_argument("-o", "--output", help="output CSV (default: stdout)")
+
+    p_warm = sub.add_parser("warm", help="store all models, then warm running servers' caches")
+    p_warm.add_argument(
+        "--url", action="append", help="base URL of a running server, e.g. http://localhost:5000 (repeatable)"
+    )
+    p_warm.add_argument("--timeout", type=float, default=600.0, help="seconds per request")
+
+    p_ingest = sub.add_parser("ingest", help="ingest export files like /upload and /upload/batch")
+    p_ingest.add_argument("files", nargs="+", help="transaction / screening exports or .zip archives")
+    p_ingest.add_argument("--kind", choices=("transacts", "screening"), help="default: from the file name")
+    p_ingest.add_argument("--replace", action="store_true", help="full refresh of the table (one file)")
+    p_ingest.add_argument("--force", action="store_true", help="ingest even if the uploads ledger has the file")
+
+    args = parser.parse_args()
+
+    if args.command == "score-batch":
+        _cli_score_batch(args)
+    elif args.command == "train":
+        _cli_train(args)
+    elif args.command == "score":
+        _cli_score(args)
+    elif args.command == "warm":
+        _cli_warm(args)
+    elif args.command == "ingest":
+        _cli_ingest(args)
+    elif args.command == "migrate":
+        if args.status:
+            pending = schema.pending_migrations(get_conn())
+            for version, description in pending:
+                print(f"pending {version}: {description}")
+            if not pending:
+                print("Schema is up to date")
+        elif not schema.migrate(get_conn()):
+            print("Schema is up to date")
+    else:
+        pending = schema.pending_migrations(get_conn())
+        if pending:
+            print(
+                f"WARNING: {len(pending)} pending schema migration(s); "
+                "run `python Backend.py migrate`",
+                file=sys.stderr,
+            )
+        app.run(port=5000, debug=True)
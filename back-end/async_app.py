@@ -0,0 +1,259 @@
+"""
+Async (ASGI) variant of the dashboard's read-only API.
+
+Serves /kpis/snapshot, /kpis/timeseries, /filters/options, /tenants/active,
+/tenants/eviction-risk, /tenants/screening-eviction-risk and
+/models/global-drivers from Starlette on a psycopg 3 AsyncConnectionPool, so
+one process keeps many dashboard requests in flight while their queries run
+instead of parking a thread per round trip.
+
+The SQL and response shapes come from Backend.py (_build_filter_sql,
+_snapshot_sql, TENANTS_ACTIVE_SQL, ...), so both apps return the same JSON.
+The model-backed endpoints reuse Backend's cached payloads; the meta-version
+check runs in a worker thread, off the event loop, and a retrain goes
+through Backend's bounded ML pool: past ML_ADMISSION_WAIT_S the request gets
+the previous payload or a 202 with Retry-After, as on the Flask side. The
+KPI endpoints also run in a worker thread when KPI_ENGINE=duckdb routes them
+to the columnar mirror.
+Identical KPI queries in flight at once share one round trip, and /metrics
+exposes this process's counters. Uploads, auth, batch scoring and admin
+endpoints stay on the Flask app.
+
+Run (from back-end/, after `python Backend.py migrate`):
+    pip install starlette uvicorn "psycopg[binary]" psycopg_pool
+    uvicorn async_app:app --port 5001
+"""
+
+import asyncio
+import decimal
+import json
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+
+from psycopg.conninfo import make_conninfo
+from psycopg.rows import dict_row, tuple_row
+from psycopg_pool import AsyncConnectionPool
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Route
+
+import Backend
+import metrics
+
+POOL_MIN_SIZE = int(os.getenv("ASYNC_POOL_MIN", "2"))
+POOL_MAX_SIZE = int(os.getenv("ASYNC_POOL_MAX", "20"))
+
+pool = AsyncConnectionPool(
+    make_conninfo(**{k: v for k, v in Backend.DB_PARAMS.items() if v}),
+    min_size=POOL_MIN_SIZE,
+    max_size=POOL_MAX_SIZE,
+    kwargs={"autocommit": True, "row_factory": dict_row},
+    open=False,
+)
+
+
+def _json_default(o):
+    # Same conversions as Flask's jsonify for what these payloads contain
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def _json(payload, status=200, headers=None):
+    body = json.dumps(payload, default=_json_default, separators=(",", ":"))
+    return Response(body, status_code=status, headers=headers, media_type="application/json")
+
+
+def _model_busy(stale=None):
+    body, status, headers = Backend._model_busy_reply(stale)
+    return _json(body, status=status, headers=headers)
+
+
+async def _fetch(sql, params=None, one=False, row_factory=dict_row):
+    async with pool.connection() as conn:
+        cur = conn.cursor(row_factory=row_factory)
+        await cur.execute(sql, params)
+        return await (cur.fetchone() if one else cur.fetchall())
+
+
+# Identical KPI queries in flight at the same time share one round trip,
+# like Backend._single_flight on the Flask side (same metric). The query
+# runs as its own task, so a client that disconnects (cancelling its
+# request) doesn't cancel it for the others waiting on the same result.
+_flights = {}
+
+
+def _land(key, task):
+    if _flights.get(key) is task:
+        del _flights[key]
+    if not task.cancelled():
+        task.exception()  # retrieved, even if nobody was waiting
+
+
+async def _fetch_shared(group, sql, params=None, one=False):
+    key = (sql, Backend._flight_key(params), one)
+    flight = _flights.get(key)
+    if flight is not None:
+        Backend.SINGLEFLIGHT_REQUESTS.inc(group=group, result="shared")
+    else:
+        flight = _flights[key] = asyncio.ensure_future(_fetch(sql, params, one=one))
+        flight.add_done_callback(lambda task: _land(key, task))
+        Backend.SINGLEFLIGHT_REQUESTS.inc(group=group, result="executed")
+    return await asyncio.shield(flight)
+
+
+# -------------------------------------------------
+# KPIs / filters
+# -------------------------------------------------
+async def kpi_snapshot(request):
+    try:
+        if Backend.KPI_ENGINE == "duckdb":
+            # In-process columnar mirror; its scans don't yield, so off the loop
+            return _json(await run_in_threadpool(Backend._kpi_snapshot, request.query_params))
+
+        where1, vals1 = Backend._build_filter_sql(request.query_params, allow_dates=True)
+        row = await _fetch_shared("kpi_snapshot", Backend._snapshot_sql(where1), vals1, one=True)
+
+        if not row or (row["total_rows"] or 0) == 0:
+            where2, vals2 = Backend._build_filter_sql(request.query_params, allow_dates=False)
+            row = await _fetch_shared("kpi_snapshot", Backend._snapshot_sql(where2), vals2, one=True)
+
+        return _json(Backend._snapshot_payload(row))
+    except Exception as e:
+        print(f"Error in async kpi_snapshot: {e}")
+        return _json(Backend.EMPTY_SNAPSHOT)
+
+
+async def kpi_timeseries(request):
+    try:
+        if Backend.KPI_ENGINE == "duckdb":
+            return _json(await run_in_threadpool(Backend._kpi_timeseries, request.query_params))
+
+        where1, vals1 = Backend._build_filter_sql(request.query_params, allow_dates=True)
+        rows = await _fetch_shared("kpi_timeseries", Backend._timeseries_sql(where1), vals1)
+
+        if len(rows) == 0:
+            where2, vals2 = Backend._build_filter_sql(request.query_params, allow_dates=False)
+            rows = await _fetch_shared("kpi_timeseries", Backend._timeseries_sql(where2), vals2)
+
+        return _json(Backend._timeseries_payload(rows))
+    except Exception as e:
+        print(f"Error in async kpi_timeseries: {e}")
+        return _json([])
+
+
+async def filter_options(request):
+    counts = request.query_params.get("counts") in ("1", "true", "yes")
+    try:
+        rows = await _fetch(Backend.FILTER_OPTIONS_SQL)
+        return _json(Backend._filter_options_payload(rows, counts))
+    except Exception as e:
+        print(f"Error in async filter_options: {e}")
+        return _json(Backend._filter_options_payload([], counts))
+
+
+# -------------------------------------------------
+# Tenants / models
+# -------------------------------------------------
+async def tenants_active(request):
+    try:
+        rows = await _fetch(Backend.TENANTS_ACTIVE_SQL, row_factory=tuple_row)
+        return _json(Backend._tenants_active_payload(rows))
+    except Exception as e:
+        return _json({"Error": str(e)}, status=500)
+
+
+async def tenants_eviction_risk(request):
+    try:
+        payload = await run_in_threadpool(
+            Backend._cached_payload,
+            Backend._TRANSACTION_MODEL_CACHE,
+            "transaction",
+            Backend._compute_transaction_model_payload,
+            admit=True,
+        )
+        return _json(payload)
+    except Backend._ModelBusy:
+        return _model_busy(Backend._TRANSACTION_MODEL_CACHE.get("payload"))
+    except Exception as e:
+        print(f"Async eviction risk model error: {e}")
+        return _json({})
+
+
+async def tenants_screening_eviction_risk(request):
+    try:
+        payload = await run_in_threadpool(
+            Backend._cached_payload,
+            Backend._SCREENING_MODEL_CACHE,
+            "screening",
+            Backend._compute_screening_model_payload,
+            admit=True,
+        )
+        return _json(payload)
+    except Backend._ModelBusy:
+        return _model_busy(Backend._SCREENING_MODEL_CACHE.get("payload"))
+    except Exception as e:
+        print(f"Async screening eviction risk model error: {e}")
+        return _json({})
+
+
+async def models_global_drivers(request):
+    try:
+        return _json(await run_in_threadpool(Backend._global_drivers_payload, admit=True))
+    except Backend._ModelBusy:
+        return _model_busy(Backend._stale_global_drivers())
+    except Exception as e:
+        print(f"Async global drivers error: {e}")
+        return _json({
+            "screening": {"top_drivers": []},
+            "transactions": {"top_drivers": []},
+        })
+
+
+async def health(request):
+    return _json({"ok": True})
+
+
+async def metrics_endpoint(request):
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await pool.open()
+    try:
+        yield
+    finally:
+        await pool.close()
+
+
+app = Starlette(
+    routes=[
+        Route("/kpis/snapshot", kpi_snapshot),
+        Route("/kpis/timeseries", kpi_timeseries),
+        Route("/filters/options", filter_options),
+        Route("/tenants/active", tenants_active),
+        Route("/tenants/eviction-risk", tenants_eviction_risk),
+        Route("/tenants/screening-eviction-risk", tenants_screening_eviction_risk),
+        Route("/models/global-drivers", models_global_drivers),
+        Route("/health", health),
+        Route("/metrics", metrics_endpoint),
+    ],
+    middleware=[
+        Middleware(
+            CORSMiddleware,
+            allow_origins=Backend.ALLOWED_ORIGINS,
+            allow_credentials=True,
+            allow_methods=["GET", "OPTIONS"],
+            allow_headers=["Content-Type", "Authorization"],
+            expose_headers=["Retry-After", "X-Data-Stale"],
+        ),
+    ],
+    lifespan=lifespan,
+)
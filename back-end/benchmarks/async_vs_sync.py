@@ -0,0 +1,149 @@
+"""
+Read-path benchmark: the Flask app (Backend.py, threaded Werkzeug) against the
+async ASGI app (async_app.py, uvicorn + psycopg AsyncConnectionPool).
+
+Both servers run side by side against the same benchmark database. Every
+endpoint is called once on each server first, so model training is not part
+of the measurement. Then the read-only dashboard mix from http_load.py is
+replayed against each server in turn at every --concurrency level. Per level
+the results file records per-endpoint latency percentiles, errors and total
+throughput for both servers, and the summary prints them next to each other.
+
+Usage (from back-end/):
+    pip install starlette uvicorn "psycopg[binary]" psycopg_pool
+    python benchmarks/async_vs_sync.py --sizes 100k --concurrency 8,32,128 --duration 20
+    python benchmarks/async_vs_sync.py --skip-seed --concurrency 64 --compare bench_results/async_prev.json
+"""
+
+import argparse
+import datetime
+import json
+import os
+
+from common import (
+    BACKEND_DIR,
+    DEFAULT_BENCH_DB,
+    ensure_database,
+    load_results,
+    parse_sizes,
+    print_comparison,
+    run_metadata,
+    seed,
+    size_label,
+    write_results,
+)
+from http_load import ENDPOINT_MIX, replay, request, start_server
+
+SERVER_NAMES = ("sync", "async")
+
+
+def flatten(results):
+    flat = {}
+    for run in results.get("runs", []):
+        for level in run.get("levels", []):
+            for server, r in level["servers"].items():
+                prefix = f"{server} c={level['concurrency']}"
+                flat[(run["rows"], f"{prefix} total")] = {"throughput_rps": r["throughput_rps"]}
+                for path, stats in r["endpoints"].items():
+                    flat[(run["rows"], f"{prefix} {path}")] = stats
+    return flat
+
+
+def print_level(level):
+    c = level["concurrency"]
+    sync, async_ = level["servers"]["sync"], level["servers"]["async"]
+    print(
+        f"\n  concurrency {c}: sync {sync['throughput_rps']:.1f} rps, "
+        f"async {async_['throughput_rps']:.1f} rps"
+    )
+    print(f"  {'endpoint':<36} {'sync p50':>9} {'async p50':>10} {'sync p95':>9} {'async p95':>10} {'err s/a':>8}")
+    for path, _, _ in ENDPOINT_MIX:
+        s, a = sync["endpoints"][path], async_["endpoints"][path]
+
+        def fmt(stats, key, width):
+            return f"{stats[key]:>{width}.1f}" if stats["count"] else f"{'-':>{width}}"
+
+        print(
+            f"  {path:<36} {fmt(s, 'p50', 9)} {fmt(a, 'p50', 10)} {fmt(s, 'p95', 9)} "
+            f"{fmt(a, 'p95', 10)} {str(s['errors']) + '/' + str(a['errors']):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync (Flask) vs async (ASGI) read-path benchmark")
+    parser.add_argument("--sizes", default="100k", help="comma list of transacts row counts, e.g. 100k,1M")
+    parser.add_argument("--concurrency", default="8,32,128", help="comma list of client counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of mixed traffic per server and level")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB)
+    parser.add_argument("--sync-port", type=int, default=5055)
+    parser.add_argument("--async-port", type=int, default=5056)
+    parser.add_argument("--skip-seed", action="store_true", help="use whatever data the DB already holds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating seed data")
+    parser.add_argument("--output", help="results JSON (default: bench_results/async_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    sizes = parse_sizes(args.sizes)
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join(BACKEND_DIR, "bench_results", f"async_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    ensure_database(args.db_name)
+
+    procs, urls = {}, {}
+    try:
+        for server, port in (("sync", args.sync_port), ("async", args.async_port)):
+            log_path = os.path.splitext(output)[0] + f"_{server}.log"
+            procs[server], urls[server] = start_server(args.db_name, port, log_path, server=server)
+            print(f"{server} server up at {urls[server]} (log: {log_path})")
+
+        results = {
+            "meta": run_metadata(
+                benchmark="async_vs_sync",
+                concurrency=levels,
+                duration_s=args.duration,
+                db_name=args.db_name,
+                mix={path: weight for path, weight, _ in ENDPOINT_MIX},
+            ),
+            "runs": [],
+        }
+
+        for rows in (sizes if not args.skip_seed else [None]):
+            run = {"rows": rows, "levels": []}
+            if rows is not None:
+                print(f"\n=== {size_label(rows)} tenants ===")
+                run["seed_seconds"] = seed(args.db_name, rows, seed=args.seed, workers=args.workers)
+                print(f"Seeded in {run['seed_seconds']:.1f}s")
+
+            _, body, _ = request(urls["sync"], "GET", "/filters/options")
+            options = json.loads(body or b"{}")
+
+            # Train / warm the model caches in both processes before measuring
+            for server in SERVER_NAMES:
+                for path, _, _ in ENDPOINT_MIX:
+                    request(urls[server], "GET", path)
+
+            for c in levels:
+                level = {"concurrency": c, "servers": {}}
+                for server in SERVER_NAMES:
+                    endpoints, total_rps = replay(urls[server], options, c, args.duration, args.seed)
+                    level["servers"][server] = {"endpoints": endpoints, "throughput_rps": total_rps}
+                print_level(level)
+                run["levels"].append(level)
+            results["runs"].append(run)
+    finally:
+        for proc in procs.values():
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    write_results(output, results)
+    if args.compare:
+        print_comparison(
+            flatten(load_results(args.compare)), flatten(results), ["p50", "p95", "throughput_rps"]
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Cold-start benchmark: how long a fresh worker process takes to serve its
+first KPI request.
+
+Each run starts a new interpreter that imports Backend and answers
+/kpis/snapshot, /kpis/timeseries and /filters/options through Flask's test
+client (no socket), recording import time, first-request time and whether
+the ML stack (pandas, numpy, scikit-learn, catboost) got loaded along the
+way. It should not be. The run fails (exit 1) when the median time from
+process start to the first /kpis/snapshot response exceeds --target-ms
+(default 1000 ms).
+
+Usage (from back-end/):
+    python benchmarks/cold_start.py
+    python benchmarks/cold_start.py --runs 10 --target-ms 500 --db-name eviction_bench
+"""
+
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import (
+    BACKEND_DIR,
+    DEFAULT_BENCH_DB,
+    bench_env,
+    ensure_database,
+    load_results,
+    percentiles,
+    print_comparison,
+    run_metadata,
+    write_results,
+)
+
+ML_MODULES = ("pandas", "numpy", "sklearn", "catboost")
+FIRST_REQUESTS = ("/kpis/snapshot", "/kpis/timeseries", "/filters/options")
+
+# Runs inside the fresh interpreter; prints one JSON line.
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import Backend
+out = {"import_ms": (time.perf_counter() - t0) * 1000.0, "requests": {}}
+client = Backend.app.test_client()
+for path in %(paths)r:
+    t = time.perf_counter()
+    status = client.get(path).status_code
+    out["requests"][path] = {"ms": (time.perf_counter() - t) * 1000.0, "status": status}
+out["since_import_ms"] = (time.perf_counter() - t0) * 1000.0
+out["ml_loaded"] = sorted(m for m in %(ml)r if m in sys.modules)
+print(json.dumps(out))
+"""
+
+
+def probe(env):
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-c", _PROBE % {"paths": FIRST_REQUESTS, "ml": ML_MODULES}],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000.0
+    if proc.returncode != 0:
+        raise SystemExit(f"Probe failed:\n{proc.stderr}")
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    # interpreter start-up = process wall time not spent importing/serving
+    result["process_ms"] = wall_ms
+    result["interpreter_ms"] = wall_ms - result["since_import_ms"]
+    result["to_first_kpi_ms"] = (
+        result["interpreter_ms"] + result["import_ms"]
+        + result["requests"][FIRST_REQUESTS[0]]["ms"]
+    )
+    return result
+
+
+def flatten(results):
+    return {(None, name): stats for name, stats in results.get("summary", {}).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start time of a fresh Backend worker")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=1000.0,
+                        help="fail if median process start -> first /kpis/snapshot exceeds this")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB)
+    parser.add_argument("--output", help="results JSON (default: bench_results/cold_start_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join(BACKEND_DIR, "bench_results", f"cold_start_{stamp}.json")
+
+    ensure_database(args.db_name)
+    env = bench_env(args.db_name)
+
+    runs = []
+    for i in range(args.runs):
+        r = probe(env)
+        runs.append(r)
+        reqs = "  ".join(f"{p} {v['ms']:.0f}ms" for p, v in r["requests"].items())
+        print(
+            f"run {i + 1}: interpreter {r['interpreter_ms']:.0f}ms  import {r['import_ms']:.0f}ms  "
+            f"{reqs}  -> first KPI {r['to_first_kpi_ms']:.0f}ms"
+            + (f"  (loaded {', '.join(r['ml_loaded'])})" if r["ml_loaded"] else "")
+        )
+
+    summary = {
+        "to_first_kpi_ms": percentiles([r["to_first_kpi_ms"] for r in runs]),
+        "import_ms": percentiles([r["import_ms"] for r in runs]),
+        "interpreter_ms": percentiles([r["interpreter_ms"] for r in runs]),
+    }
+    for path in FIRST_REQUESTS:
+        summary[f"first {path}"] = percentiles([r["requests"][path]["ms"] for r in runs])
+
+    median = summary["to_first_kpi_ms"]["p50"]
+    ml_loaded = sorted({m for r in runs for m in r["ml_loaded"]})
+    passed = median <= args.target_ms and not ml_loaded
+    print(
+        f"\nmedian process start -> first /kpis/snapshot: {median:.0f} ms "
+        f"(target {args.target_ms:.0f} ms) {'PASS' if passed else 'FAIL'}"
+    )
+    if ml_loaded:
+        print(f"ML modules loaded during cold start: {', '.join(ml_loaded)}")
+
+    results = {
+        "meta": run_metadata(benchmark="cold_start", db_name=args.db_name, target_ms=args.target_ms),
+        "runs": runs,
+        "summary": summary,
+        "passed": passed,
+    }
+    write_results(output, results)
+    if args.compare:
+        print_comparison(flatten(load_results(args.compare)), flatten(results), ["p50", "p95"])
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+Shared helpers for the benchmark scripts: a dedicated benchmark database,
+seeding it from synthetic_data.py via COPY, latency stats and JSON results
+files that can be compared run-over-run.
+
+Benchmarks never touch DB_NAME: they use BENCH_DB_NAME (default
+"eviction_bench") on the same server, creating and migrating it if needed,
+because seeding truncates transacts / screening.
+"""
+
+import datetime
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import pandas as pd
+import psycopg2
+from dotenv import load_dotenv
+
+import schema
+import synthetic_data
+from schema import BUCKET_DATE_COLUMNS, BUCKET_MONTH_SENTINEL, SCREEN_HEADERS, TRANSACTS_COLUMNS
+
+load_dotenv(os.path.join(BACKEND_DIR, ".env"))
+
+DEFAULT_BENCH_DB = os.getenv("BENCH_DB_NAME", "eviction_bench")
+
+
+def parse_sizes(text):
+    """'100k,1M,10M' -> [100000, 1000000, 10000000]"""
+    mult = {"k": 1_000, "m": 1_000_000}
+    sizes = []
+    for part in text.split(","):
+        part = part.strip().lower()
+        if not part:
+            continue
+        if part[-1] in mult:
+            sizes.append(int(float(part[:-1]) * mult[part[-1]]))
+        else:
+            sizes.append(int(part))
+    return sizes
+
+
+def size_label(rows):
+    if rows is None:
+        return "-"
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}M"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+def db_params(db_name):
+    return dict(
+        dbname=db_name,
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+    )
+
+
+def bench_env(db_name):
+    """Environment for a Backend process pointed at the benchmark DB."""
+    env = dict(os.environ)
+    env["DB_NAME"] = db_name
+    return env
+
+
+def ensure_database(db_name):
+    """CREATE DATABASE db_name if it doesn't exist yet, then apply migrations."""
+    if db_name == os.getenv("DB_NAME"):
+        raise SystemExit(
+            f"Refusing to benchmark against DB_NAME={db_name!r}: seeding truncates "
+            "transacts/screening. Set BENCH_DB_NAME or --db-name to a scratch database."
+        )
+    conn = psycopg2.connect(**db_params("postgres"))
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (db_name,))
+            if cur.fetchone() is None:
+                cur.execute(f'CREATE DATABASE "{db_name}"')
+    finally:
+        conn.close()
+
+    conn = psycopg2.connect(**db_params(db_name))
+    try:
+        schema.migrate(conn, log=None)
+    finally:
+        conn.close()
+
+
+def _copy_frame(cur, table, df, columns):
+    buf = io.StringIO()
+    df.to_csv(buf, index=False, header=False, date_format="%Y-%m-%d")
+    buf.seek(0)
+    cur.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buf
+    )
+
+
+def _with_bucket_month(tx):
+    """tx plus its transacts partition key, as schema.bucket_month() would set it."""
+    first = tx[BUCKET_DATE_COLUMNS[0]]
+    for col in BUCKET_DATE_COLUMNS[1:]:
+        first = first.fillna(tx[col])
+    months = first.dt.to_period("M").dt.to_timestamp()
+    return tx.assign(bucket_month=months.fillna(pd.Timestamp(BUCKET_MONTH_SENTINEL)))
+
+
+def seed(db_name, rows, seed=42, chunk_rows=synthetic_data.DEFAULT_CHUNK_ROWS, workers=1):
+    """
+    Replace transacts / screening in the benchmark DB with `rows` synthetic
+    tenants and bump meta_updates so every model cache goes stale.
+    Returns elapsed seconds.
+    """
+    t0 = time.perf_counter()
+    conn = psycopg2.connect(**db_params(db_name))
+    try:
+        with conn.cursor() as cur:
+            cur.execute("TRUNCATE transacts, screening")
+            for tx, sc in synthetic_data.iter_chunks(
+                rows, chunk_rows=chunk_rows, workers=workers, seed=seed
+            ):
+                tx = _with_bucket_month(tx)
+                schema.ensure_transacts_partitions(cur, tx["bucket_month"].dt.year.unique())
+                _copy_frame(cur, "transacts", tx, TRANSACTS_COLUMNS + ["bucket_month"])
+                _copy_frame(cur, "screening", sc, list(SCREEN_HEADERS.values()))
+            schema.rebuild_dimensions(cur)
+            cur.execute("INSERT INTO meta_updates (updated_at) VALUES (NOW())")
+        conn.commit()
+
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("ANALYZE transacts")
+            cur.execute("ANALYZE screening")
+    finally:
+        conn.close()
+    return time.perf_counter() - t0
+
+
+def percentiles(samples):
+    """Nearest-rank p50/p95/p99 (+ mean/max) of a list of numbers."""
+    if not samples:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "mean": None, "max": None}
+    ordered = sorted(samples)
+    n = len(ordered)
+
+    def rank(p):
+        return ordered[min(n - 1, max(0, int(round(p / 100.0 * n + 0.5)) - 1))]
+
+    return {
+        "count": n,
+        "p50": rank(50),
+        "p95": rank(95),
+        "p99": rank(99),
+        "mean": sum(ordered) / n,
+        "max": ordered[-1],
+    }
+
+
+def run_metadata(**extra):
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        rev = None
+    meta = {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    meta.update(extra)
+    return meta
+
+
+def write_results(path, results):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"Results written to {path}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def print_comparison(previous, current, metrics):
+    """
+    Print current vs previous for flattened results of the form
+    {(size, name): {metric: value}}; negative deltas are improvements.
+    """
+    print(f"\n{'size':>6}  {'name':<40} {'metric':<10} {'before':>10} {'after':>10} {'delta':>8}")
+    for key in sorted(current, key=lambda k: (k[0] or 0, k[1])):
+        if key not in previous:
+            continue
+        for metric in metrics:
+            before = previous[key].get(metric)
+            after = current[key].get(metric)
+            if before is None or after is None:
+                continue
+            delta = (after - before) / before * 100 if before else 0.0
+            print(
+                f"{size_label(key[0]):>6}  {key[1]:<40} {metric:<10} "
+                f"{before:>10.1f} {after:>10.1f} {delta:>+7.1f}%"
+            )
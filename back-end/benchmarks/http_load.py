@@ -0,0 +1,358 @@
+"""
+End-to-end HTTP latency benchmark for the dashboard API.
+
+Stands up Backend.py against the benchmark database, then for each dataset
+size: seeds it with synthetic data, calls every endpoint once (the "cold"
+call, which includes model training for /tenants/* and
+/models/global-drivers), and replays a weighted mix of realistic dashboard
+requests from concurrent clients. /upload is measured last by re-uploading
+already-seeded tenants, so the data set is unchanged.
+
+Per endpoint the results file records count, errors, p50/p95/p99/mean/max
+latency (ms) and throughput, so runs can be compared with --compare.
+
+Usage (from back-end/):
+    python benchmarks/http_load.py --sizes 100k,1M,10M --concurrency 8 --duration 30
+    python benchmarks/http_load.py --url http://127.0.0.1:5000 --skip-seed
+    python benchmarks/http_load.py --sizes 100k --compare bench_results/http_prev.json
+"""
+
+import argparse
+import datetime
+import http.client
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from urllib.parse import urlencode, urlsplit
+
+from common import (
+    BACKEND_DIR,
+    DEFAULT_BENCH_DB,
+    bench_env,
+    ensure_database,
+    load_results,
+    parse_sizes,
+    percentiles,
+    print_comparison,
+    run_metadata,
+    seed,
+    size_label,
+    write_results,
+)
+import synthetic_data
+
+# (path, weight, takes dashboard filters)
+ENDPOINT_MIX = [
+    ("/kpis/snapshot", 30, True),
+    ("/kpis/timeseries", 30, True),
+    ("/filters/options", 10, False),
+    ("/tenants/active", 10, False),
+    ("/tenants/eviction-risk", 8, False),
+    ("/tenants/screening-eviction-risk", 7, False),
+    ("/models/global-drivers", 5, False),
+]
+
+FIRST_MONTH = (2021, 1)
+LAST_MONTH = (2025, 6)
+
+
+# -------------------------------------------------
+# Server
+# -------------------------------------------------
+SERVERS = {
+    # Flask app on Werkzeug's threaded server
+    "sync": (
+        "import Backend; from werkzeug.serving import run_simple; "
+        "run_simple('127.0.0.1', {port}, Backend.app, threaded=True)"
+    ),
+    # read-only ASGI app (async_app.py) on uvicorn
+    "async": (
+        "import uvicorn; "
+        "uvicorn.run('async_app:app', host='127.0.0.1', port={port}, log_level='warning')"
+    ),
+}
+
+
+def start_server(db_name, port, log_path, server="sync"):
+    code = SERVERS[server].format(port=port)
+    log = open(log_path, "ab")
+    proc = subprocess.Popen(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        env=bench_env(db_name),
+        stdout=log,
+        stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"Backend exited with {proc.returncode}; see {log_path}")
+        try:
+            status, _, _ = request(base_url, "GET", "/health", timeout=2)
+            if status == 200:
+                return proc, base_url
+        except OSError:
+            pass
+        time.sleep(0.5)
+    proc.terminate()
+    raise SystemExit(f"Backend did not become healthy; see {log_path}")
+
+
+def request(base_url, method, path, body=None, headers=None, conn=None, timeout=600):
+    """One HTTP request; returns (status, body_bytes, elapsed_ms)."""
+    parts = urlsplit(base_url)
+    own = conn is None
+    if own:
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+    try:
+        t0 = time.perf_counter()
+        conn.request(method, path, body=body, headers=headers or {})
+        resp = conn.getresponse()
+        data = resp.read()
+        return resp.status, data, (time.perf_counter() - t0) * 1000.0
+    finally:
+        if own:
+            conn.close()
+
+
+# -------------------------------------------------
+# Request mix
+# -------------------------------------------------
+def _month_add(ym, months):
+    y, m = ym
+    total = y * 12 + (m - 1) + months
+    return (total // 12, total % 12 + 1)
+
+
+def random_filters(rng, options):
+    """Query params resembling what the dashboard filter bar sends."""
+    params = []
+    if rng.random() < 0.7:
+        span = (LAST_MONTH[0] - FIRST_MONTH[0]) * 12 + LAST_MONTH[1] - FIRST_MONTH[1]
+        start = _month_add(FIRST_MONTH, rng.randint(0, span))
+        end = min(_month_add(start, rng.randint(0, 24)), LAST_MONTH)
+        params += [("start", "%04d-%02d" % start), ("end", "%04d-%02d" % end)]
+    pscodes = options.get("pscodes") or []
+    if pscodes and rng.random() < 0.5:
+        for code in rng.sample(pscodes, min(len(pscodes), rng.randint(1, 3))):
+            params.append(("pscode", code))
+    screens = options.get("screenresults") or []
+    if screens and rng.random() < 0.2:
+        params.append(("screenresult", rng.choice(screens)))
+    r = rng.random()
+    if r < 0.15:
+        params.append(("collections", "with"))
+    elif r < 0.25:
+        params.append(("collections", "without"))
+    if rng.random() < 0.1:
+        params.append(("evicted", rng.choice(["Yes", "No"])))
+    return params
+
+
+def replay(base_url, options, concurrency, duration, seed_value):
+    """Run the weighted mix from `concurrency` clients for `duration` seconds."""
+    samples = {path: [] for path, _, _ in ENDPOINT_MIX}
+    errors = {path: 0 for path, _, _ in ENDPOINT_MIX}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+    parts = urlsplit(base_url)
+
+    def worker(worker_id):
+        rng = random.Random(seed_value * 1000 + worker_id)
+        paths = [p for p, _, _ in ENDPOINT_MIX]
+        weights = [w for _, w, _ in ENDPOINT_MIX]
+        takes_filters = {p: f for p, _, f in ENDPOINT_MIX}
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=600)
+        while time.perf_counter() < deadline:
+            path = rng.choices(paths, weights)[0]
+            url = path
+            if takes_filters[path]:
+                query = urlencode(random_filters(rng, options))
+                url = f"{path}?{query}" if query else path
+            try:
+                status, _, ms = request(base_url, "GET", url, conn=conn)
+                ok = status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=600)
+                ok, ms = False, None
+            with lock:
+                if ok:
+                    samples[path].append(ms)
+                else:
+                    errors[path] += 1
+        conn.close()
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - t0
+
+    endpoints = {}
+    for path in samples:
+        stats = percentiles(samples[path])
+        stats["errors"] = errors[path]
+        stats["throughput_rps"] = stats["count"] / wall if wall else 0.0
+        endpoints[path] = stats
+    total = sum(len(v) for v in samples.values())
+    return endpoints, total / wall if wall else 0.0
+
+
+# -------------------------------------------------
+# Upload
+# -------------------------------------------------
+def _multipart(field, filename, payload):
+    boundary = uuid.uuid4().hex
+    body = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        "Content-Type: text/csv\r\n\r\n"
+    ).encode() + payload + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def measure_uploads(base_url, rows, repeats, seed_value):
+    """Re-upload the first `rows` seeded tenants (same values) `repeats` times."""
+    tx, sc = synthetic_data.generate_chunk(0, rows, seed=seed_value)
+    files = {}
+    for field, kind, df in (("transact", "transacts", tx), ("screening", "screening", sc)):
+        buf = io.StringIO()
+        synthetic_data.to_upload_frame(df, kind).to_csv(buf, index=False)
+        files[field] = buf.getvalue().encode()
+
+    out = {}
+    for field, payload in files.items():
+        timings, errors = [], 0
+        for _ in range(repeats):
+            body, headers = _multipart(field, f"bench_{field}.csv", payload)
+            # force: identical re-uploads are otherwise skipped by the uploads ledger
+            status, _, ms = request(base_url, "POST", "/upload?force=1", body=body, headers=headers)
+            if status < 400:
+                timings.append(ms)
+            else:
+                errors += 1
+        stats = percentiles(timings)
+        stats["errors"] = errors
+        stats["rows"] = rows
+        stats["rows_per_s"] = rows / (stats["mean"] / 1000.0) if stats["mean"] else None
+        out[f"/upload ({field})"] = stats
+    return out
+
+
+# -------------------------------------------------
+# Main
+# -------------------------------------------------
+def flatten(results):
+    flat = {}
+    for run in results.get("runs", []):
+        for name, stats in run.get("endpoints", {}).items():
+            flat[(run["rows"], name)] = stats
+        for name, ms in run.get("cold_ms", {}).items():
+            flat[(run["rows"], f"{name} [cold]")] = {"p50": ms}
+    return flat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP load test for the dashboard API")
+    parser.add_argument("--sizes", default="100k", help="comma list of transacts row counts, e.g. 100k,1M,10M")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of mixed traffic per size")
+    parser.add_argument("--upload-rows", type=int, default=5000)
+    parser.add_argument("--upload-repeats", type=int, default=3)
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB)
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--url", help="benchmark an already running server instead of starting one")
+    parser.add_argument("--skip-seed", action="store_true", help="use whatever data the DB already holds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating seed data")
+    parser.add_argument("--output", help="results JSON (default: bench_results/http_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    sizes = parse_sizes(args.sizes)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join(BACKEND_DIR, "bench_results", f"http_{stamp}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+
+    if not args.skip_seed:
+        ensure_database(args.db_name)
+
+    proc = None
+    if args.url:
+        base_url = args.url.rstrip("/")
+    else:
+        log_path = os.path.splitext(output)[0] + "_server.log"
+        proc, base_url = start_server(args.db_name, args.port, log_path)
+        print(f"Backend up at {base_url} (log: {log_path})")
+
+    results = {
+        "meta": run_metadata(
+            benchmark="http_load",
+            concurrency=args.concurrency,
+            duration_s=args.duration,
+            db_name=args.db_name,
+            mix={path: weight for path, weight, _ in ENDPOINT_MIX},
+        ),
+        "runs": [],
+    }
+
+    try:
+        for rows in (sizes if not args.skip_seed else [None]):
+            run = {"rows": rows}
+            if rows is not None:
+                print(f"\n=== {size_label(rows)} tenants ===")
+                run["seed_seconds"] = seed(args.db_name, rows, seed=args.seed, workers=args.workers)
+                print(f"Seeded in {run['seed_seconds']:.1f}s")
+
+            _, body, _ = request(base_url, "GET", "/filters/options")
+            options = json.loads(body or b"{}")
+
+            # Cold calls: first request after a data-version bump
+            run["cold_ms"] = {}
+            for path, _, _ in ENDPOINT_MIX:
+                _, _, ms = request(base_url, "GET", path)
+                run["cold_ms"][path] = ms
+                print(f"  cold {path:<36} {ms:10.1f} ms")
+
+            endpoints, total_rps = replay(
+                base_url, options, args.concurrency, args.duration, args.seed
+            )
+            if rows is not None and args.upload_rows:
+                endpoints.update(
+                    measure_uploads(base_url, min(args.upload_rows, rows), args.upload_repeats, args.seed)
+                )
+            run["endpoints"] = endpoints
+            run["throughput_rps"] = total_rps
+
+            print(f"  {'endpoint':<36} {'n':>6} {'err':>4} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>8}")
+            for path, s in endpoints.items():
+                if not s["count"]:
+                    print(f"  {path:<36} {0:>6} {s['errors']:>4}")
+                    continue
+                print(
+                    f"  {path:<36} {s['count']:>6} {s['errors']:>4} {s['p50']:>9.1f} "
+                    f"{s['p95']:>9.1f} {s['p99']:>9.1f} {s.get('throughput_rps', 0):>8.1f}"
+                )
+            results["runs"].append(run)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    write_results(output, results)
+    if args.compare:
+        print_comparison(flatten(load_results(args.compare)), flatten(results), ["p50", "p95", "p99"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+KPI engine parity check: the DuckDB columnar mirror (KPI_ENGINE=duckdb,
+columnar.py) against Postgres.
+
+For each dataset size the benchmark database is seeded, then a matrix of
+filter cases built from the filter dropdown values (date windows, pscodes,
+screen result, collections, eviction, and combinations of them, including
+windows with no rows so the all-dates fallback runs) is sent through
+Backend._kpi_rows with each engine, for both the snapshot and the timeseries
+query, with and without the date window. Rows must match: counts, months
+and integers exactly, dollar and rate columns within --rel-tol (the mirror
+keeps dollars as DECIMAL(38,10), so in practice they match exactly too).
+Every case is also timed on both engines (--repeat passes, after one warm-up
+that loads the mirror).
+
+Exits 1 on any mismatch. The same matrix (tests/kpi_cases.py) runs under
+pytest as tests/test_kpi_parity.py on a small seeded database; this script
+adds the larger sizes and the timings.
+
+Usage (from back-end/):
+    pip install duckdb
+    python benchmarks/kpi_parity.py --sizes 100k,1M
+    python benchmarks/kpi_parity.py --skip-seed --repeat 5 --compare bench_results/kpi_prev.json
+"""
+
+import argparse
+import datetime
+import os
+import sys
+import time
+
+from common import (
+    BACKEND_DIR,
+    DEFAULT_BENCH_DB,
+    ensure_database,
+    load_results,
+    parse_sizes,
+    percentiles,
+    print_comparison,
+    run_metadata,
+    seed,
+    size_label,
+    write_results,
+)
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, "tests"))
+from kpi_cases import diff_rows, filter_cases  # noqa: E402
+
+ENGINES = ("postgres", "duckdb")
+KINDS = ("snapshot", "timeseries")
+
+
+def run_cases(backend, cases, repeat, rel_tol):
+    mismatches = []
+    timings = {engine: {kind: [] for kind in KINDS} for engine in ENGINES}
+    # Warm-up: the first duckdb call loads the mirror
+    t0 = time.perf_counter()
+    backend._kpi_rows("snapshot", {}, True, engine="duckdb")
+    load_ms = (time.perf_counter() - t0) * 1000.0
+
+    for label, params in cases:
+        for kind in KINDS:
+            for allow_dates in (True, False):
+                rows = {}
+                for engine in ENGINES:
+                    rows[engine] = backend._kpi_rows(kind, params, allow_dates, engine=engine)
+                problem = diff_rows(rows["postgres"], rows["duckdb"], rel_tol)
+                if problem:
+                    mismatches.append({
+                        "case": label, "kind": kind, "allow_dates": allow_dates, "problem": problem,
+                    })
+            for engine in ENGINES:
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    backend._kpi_rows(kind, params, True, engine=engine)
+                    timings[engine][kind].append((time.perf_counter() - t0) * 1000.0)
+
+    latency = {
+        f"{engine}/{kind}": percentiles(samples)
+        for engine, kinds in timings.items()
+        for kind, samples in kinds.items()
+    }
+    return mismatches, latency, load_ms
+
+
+def flatten(results):
+    flat = {}
+    for run in results.get("runs", []):
+        flat[(run["rows"], "mirror_load")] = {"p50": run["mirror_load_ms"]}
+        for key, stats in run["latency"].items():
+            flat[(run["rows"], key)] = stats
+    return flat
+
+
+def print_run(run):
+    print(f"  mirror load {run['mirror_load_ms']:.0f} ms, {run['cases']} filter cases")
+    print(f"  {'query':<12} {'pg p50':>9} {'duck p50':>9} {'pg p95':>9} {'duck p95':>9} {'speedup':>8}")
+    for kind in KINDS:
+        pg, duck = run["latency"][f"postgres/{kind}"], run["latency"][f"duckdb/{kind}"]
+        speedup = pg["p50"] / duck["p50"] if duck["p50"] else float("nan")
+        print(
+            f"  {kind:<12} {pg['p50']:9.1f} {duck['p50']:9.1f} {pg['p95']:9.1f} {duck['p95']:9.1f} "
+            f"{speedup:7.1f}x"
+        )
+    for m in run["mismatches"]:
+        print(f"  MISMATCH {m['case']} / {m['kind']} (dates={m['allow_dates']}): {m['problem']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DuckDB KPI mirror vs Postgres: parity and latency")
+    parser.add_argument("--sizes", default="100k", help="comma list of transacts row counts, e.g. 100k,1M")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per case and engine")
+    parser.add_argument("--rel-tol", type=float, default=1e-9, help="tolerance for dollar / rate columns")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB)
+    parser.add_argument("--skip-seed", action="store_true", help="use whatever data the DB already holds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating seed data")
+    parser.add_argument("--output", help="results JSON (default: bench_results/kpi_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    sizes = parse_sizes(args.sizes)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join(BACKEND_DIR, "bench_results", f"kpi_{stamp}.json")
+
+    if not args.skip_seed:
+        ensure_database(args.db_name)
+
+    # Backend reads DB_NAME at import, so point it at the benchmark DB first.
+    # load_dotenv() does not override this.
+    os.environ["DB_NAME"] = args.db_name
+    import Backend
+
+    results = {
+        "meta": run_metadata(benchmark="kpi_parity", db_name=args.db_name, repeat=args.repeat, rel_tol=args.rel_tol),
+        "runs": [],
+    }
+
+    failed = False
+    for rows in (sizes if not args.skip_seed else [None]):
+        run = {"rows": rows}
+        if rows is not None:
+            print(f"\n=== {size_label(rows)} tenants ===")
+            run["seed_seconds"] = seed(args.db_name, rows, seed=args.seed, workers=args.workers)
+            print(f"Seeded in {run['seed_seconds']:.1f}s")
+
+        cases = filter_cases(Backend)
+        mismatches, latency, load_ms = run_cases(Backend, cases, args.repeat, args.rel_tol)
+        run.update(cases=len(cases), mismatches=mismatches, latency=latency, mirror_load_ms=load_ms)
+        print_run(run)
+        results["runs"].append(run)
+        failed = failed or bool(mismatches)
+
+    write_results(output, results)
+    if args.compare:
+        print_comparison(flatten(load_results(args.compare)), flatten(results), ["p50", "p95"])
+    if failed:
+        print("\nParity check FAILED", file=sys.stderr)
+        sys.exit(1)
+    print("\nParity check passed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Per-stage benchmark of the model pipelines behind the dashboard:
+_compute_transaction_model_payload, _compute_screening_model_payload and
+_compute_feature_importance_payload.
+
+For each dataset size the benchmark database is seeded with synthetic data and
+every pipeline is run in-process, with Backend's stage hooks (STAGE_LISTENERS)
+reporting each stage as it finishes:
+
+    sql_load      loading the training / scoring rows (pd.read_sql, or the
+                  data version's Arrow snapshot once written; see SNAPSHOT_DIR)
+    feature_prep  cleaning, derived features, splits, CatBoost frames
+    train         model fit
+    score         predict_proba on the scored cohort / test split
+    drivers       baselines, global importances and per-tenant top drivers
+    payload       assembling the JSON payload
+
+A stage that occurs more than once in a pipeline (screening loads SQL twice)
+is summed. With SNAPSHOT_DIR set, the first pass over a data version also
+writes its training snapshots; leave it unset to time Postgres loads every
+pass.
+Wall time comes from a pass with tracemalloc off. Peak memory comes from a
+second pass under tracemalloc (skip it with --no-memory), so tracing
+overhead never shows up in the timings. tracemalloc sees Python, numpy
+and pandas allocations but not CatBoost's native buffers, so the process
+max RSS after each pipeline is recorded as well.
+
+Usage (from back-end/):
+    python benchmarks/ml_stages.py --sizes 100k,1M,10M
+    python benchmarks/ml_stages.py --sizes 100k --pipelines screening --no-memory
+    python benchmarks/ml_stages.py --sizes 100k --compare bench_results/ml_prev.json
+"""
+
+import argparse
+import datetime
+import os
+import resource
+import time
+import tracemalloc
+
+from common import (
+    BACKEND_DIR,
+    DEFAULT_BENCH_DB,
+    ensure_database,
+    load_results,
+    parse_sizes,
+    print_comparison,
+    run_metadata,
+    seed,
+    size_label,
+    write_results,
+)
+
+STAGES = ("sql_load", "feature_prep", "train", "score", "drivers", "payload")
+
+PIPELINES = {
+    "transaction": "_compute_transaction_model_payload",
+    "screening": "_compute_screening_model_payload",
+    "feature_importance": "_compute_feature_importance_payload",
+}
+
+
+def _max_rss_mb():
+    # ru_maxrss is KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def run_pipeline(backend, name, trace_memory):
+    """Run one pipeline; returns (total_ms, {stage: {wall_ms, calls, peak_mb}})."""
+    stages = {}
+
+    def listener(pipeline, stage, seconds, peak):
+        if pipeline != name:
+            return
+        s = stages.setdefault(stage, {"wall_ms": 0.0, "calls": 0, "peak_mb": None})
+        s["wall_ms"] += seconds * 1000.0
+        s["calls"] += 1
+        if peak is not None:
+            s["peak_mb"] = max(s["peak_mb"] or 0.0, peak / (1024.0 * 1024.0))
+
+    backend.STAGE_LISTENERS.append(listener)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        t0 = time.perf_counter()
+        getattr(backend, PIPELINES[name])()
+        total_ms = (time.perf_counter() - t0) * 1000.0
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        backend.STAGE_LISTENERS.remove(listener)
+    return total_ms, stages
+
+
+def flatten(results):
+    flat = {}
+    for run in results.get("runs", []):
+        for name, p in run.get("pipelines", {}).items():
+            flat[(run["rows"], f"{name}/total")] = {"wall_ms": p["total_ms"]}
+            for stage, s in p["stages"].items():
+                flat[(run["rows"], f"{name}/{stage}")] = s
+    return flat
+
+
+def print_run(run):
+    print(f"  {'pipeline':<20} {'stage':<14} {'wall ms':>11} {'calls':>6} {'peak MB':>9}")
+    for name, p in run["pipelines"].items():
+        ordered = [s for s in STAGES if s in p["stages"]]
+        ordered += [s for s in p["stages"] if s not in STAGES]
+        for stage in ordered:
+            s = p["stages"][stage]
+            peak = f"{s['peak_mb']:9.1f}" if s["peak_mb"] is not None else f"{'-':>9}"
+            print(f"  {name:<20} {stage:<14} {s['wall_ms']:11.1f} {s['calls']:6d} {peak}")
+        print(
+            f"  {name:<20} {'TOTAL':<14} {p['total_ms']:11.1f} {'':6} "
+            f"{'':9}  max RSS {p['max_rss_mb']:.0f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage timings of the model pipelines")
+    parser.add_argument("--sizes", default="100k", help="comma list of transacts row counts, e.g. 100k,1M,10M")
+    parser.add_argument(
+        "--pipelines", default=",".join(PIPELINES),
+        help=f"comma list from {', '.join(PIPELINES)}",
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--db-name", default=DEFAULT_BENCH_DB)
+    parser.add_argument("--skip-seed", action="store_true", help="use whatever data the DB already holds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes generating seed data")
+    parser.add_argument("--output", help="results JSON (default: bench_results/ml_<timestamp>.json)")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.pipelines.split(",") if n.strip()]
+    unknown = [n for n in names if n not in PIPELINES]
+    if unknown:
+        parser.error(f"unknown pipeline(s): {', '.join(unknown)}")
+
+    sizes = parse_sizes(args.sizes)
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    output = args.output or os.path.join(BACKEND_DIR, "bench_results", f"ml_{stamp}.json")
+
+    if not args.skip_seed:
+        ensure_database(args.db_name)
+
+    # Backend reads DB_NAME at import, so point it at the benchmark DB first.
+    # load_dotenv() does not override this.
+    os.environ["DB_NAME"] = args.db_name
+    os.chdir(BACKEND_DIR)  # CatBoost writes catboost_info/ into the cwd
+    import Backend
+
+    # Backend imports the ML stack lazily; load it up front so the import cost
+    # isn't charged to whichever pipeline happens to run first.
+    import catboost, pandas, sklearn.ensemble  # noqa: F401
+
+    results = {
+        "meta": run_metadata(
+            benchmark="ml_stages",
+            db_name=args.db_name,
+            pipelines=names,
+            memory_pass=not args.no_memory,
+        ),
+        "runs": [],
+    }
+
+    for rows in (sizes if not args.skip_seed else [None]):
+        run = {"rows": rows, "pipelines": {}}
+        if rows is not None:
+            print(f"\n=== {size_label(rows)} tenants ===")
+            run["seed_seconds"] = seed(args.db_name, rows, seed=args.seed, workers=args.workers)
+            print(f"Seeded in {run['seed_seconds']:.1f}s")
+
+        for name in names:
+            total_ms, stages = run_pipeline(Backend, name, trace_memory=False)
+            if not args.no_memory:
+                _, traced = run_pipeline(Backend, name, trace_memory=True)
+                for stage, s in stages.items():
+                    s["peak_mb"] = traced.get(stage, {}).get("peak_mb")
+            run["pipelines"][name] = {
+                "total_ms": total_ms,
+                "max_rss_mb": _max_rss_mb(),
+                "stages": stages,
+            }
+            print(f"  {name}: {total_ms / 1000.0:.1f}s")
+
+        print_run(run)
+        results["runs"].append(run)
+
+    write_results(output, results)
+    if args.compare:
+        print_comparison(flatten(load_results(args.compare)), flatten(results), ["wall_ms", "peak_mb"])
+
+
+if __name__ == "__main__":
+    main()
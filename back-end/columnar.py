@@ -0,0 +1,141 @@
+"""
+Columnar mirror of transacts for the KPI endpoints.
+
+With KPI_ENGINE=duckdb, /kpis/snapshot and /kpis/timeseries run the same
+_snapshot_sql / _timeseries_sql text against an in-process DuckDB copy of the
+columns they read, instead of scanning the row-oriented Postgres table.
+
+The mirror follows the meta_updates data version. When a request sees a new
+version (ensure_version), the mirrored columns are COPYed out of Postgres as
+CSV, loaded into a fresh DuckDB table sorted by bucket_month (so date windows
+skip whole row groups) and swapped in, so readers keep the previous mirror
+until the new one is complete. pscode is mirrored already cleaned
+(pcode_clean), and _build_filter_sql compares against that column instead of
+running the regexp per row.
+
+Needs `pip install duckdb`; it is imported on first load only. No Flask or
+Backend imports.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+import schema
+
+# (mirror column, DuckDB type, Postgres expression)
+MIRROR_COLUMNS = (
+    ("bucket_month", "DATE", "bucket_month"),
+    ("pcode_clean", "VARCHAR", schema.PSCODE_CLEAN_SQL.format("pscode")),
+    ("screenresult", "VARCHAR", "screenresult"),
+    ("sevicted", "VARCHAR", "sevicted"),
+    ("dnumlate", "INTEGER", "dnumlate"),
+    ("dnumnsf", "INTEGER", "dnumnsf"),
+    ("damoutcollections", "DECIMAL(38,10)", "damoutcollections"),
+    ("drentwrittenoff", "DECIMAL(38,10)", "drentwrittenoff"),
+    ("dnonrentwrittenoff", "DECIMAL(38,10)", "dnonrentwrittenoff"),
+)
+
+# How _build_filter_sql has to spell things for the mirror
+PLACEHOLDER = "?"
+PSCODE_COLUMN = "pcode_clean"
+
+_NOT_LOADED = object()
+
+_state = {"con": None, "version": _NOT_LOADED, "rows": 0, "loaded_at": None, "load_seconds": None}
+_load_lock = threading.Lock()
+
+
+def _connection(path):
+    if _state["con"] is None:
+        try:
+            import duckdb
+        except ImportError:
+            raise ImportError("KPI_ENGINE=duckdb needs duckdb (pip install duckdb)") from None
+        _state["con"] = duckdb.connect(path)
+    return _state["con"]
+
+
+def load(pg_connect, path=":memory:"):
+    """
+    Rebuild the mirror from Postgres; pg_connect() returns a new psycopg2
+    connection, which is closed afterwards. Returns the mirrored row count.
+    """
+    con = _connection(path)
+    t0 = time.perf_counter()
+    select = ", ".join(expr for _, _, expr in MIRROR_COLUMNS)
+    columns = ", ".join(f"'{name}': '{kind}'" for name, kind, _ in MIRROR_COLUMNS)
+
+    fd, csv_path = tempfile.mkstemp(prefix="kpi_mirror_", suffix=".csv")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            conn = pg_connect()
+            try:
+                with conn.cursor() as cur:
+                    cur.copy_expert(f"COPY (SELECT {select} FROM transacts) TO STDOUT WITH (FORMAT csv)", f)
+            finally:
+                conn.close()
+
+        cur = con.cursor()
+        try:
+            # Postgres CSV writes NULL unquoted and '' quoted
+            cur.execute(f"""
+                CREATE OR REPLACE TABLE transacts_load AS
+                SELECT * FROM read_csv('{csv_path}', header = false, columns = {{{columns}}},
+                                       allow_quoted_nulls = false)
+                ORDER BY bucket_month
+            """)
+            cur.execute("BEGIN TRANSACTION")
+            cur.execute("DROP TABLE IF EXISTS transacts")
+            cur.execute("ALTER TABLE transacts_load RENAME TO transacts")
+            cur.execute("COMMIT")
+            rows = cur.execute("SELECT COUNT(*) FROM transacts").fetchone()[0]
+        finally:
+            cur.close()
+    finally:
+        os.unlink(csv_path)
+
+    _state["rows"] = rows
+    _state["loaded_at"] = time.time()
+    _state["load_seconds"] = time.perf_counter() - t0
+    return rows
+
+
+def ensure_version(version, pg_connect, path=":memory:"):
+    """
+    Reload the mirror unless it was built for `version` (the meta_updates
+    timestamp). One caller loads; concurrent callers wait for it.
+    Returns True if this call reloaded.
+    """
+    if _state["version"] is not _NOT_LOADED and _state["version"] == version:
+        return False
+    with _load_lock:
+        if _state["version"] is not _NOT_LOADED and _state["version"] == version:
+            return False
+        load(pg_connect, path)
+        _state["version"] = version
+        return True
+
+
+def fetch(sql, params=None):
+    """Run sql on the mirror; rows as dicts, like RealDictCursor."""
+    cur = _state["con"].cursor()
+    try:
+        cur.execute(sql, params or [])
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur.fetchall()]
+    finally:
+        cur.close()
+
+
+def status():
+    """Row count, data version and load time of the current mirror."""
+    loaded = _state["version"] is not _NOT_LOADED
+    return {
+        "loaded": loaded,
+        "version": _state["version"] if loaded else None,
+        "rows": _state["rows"],
+        "loaded_at": _state["loaded_at"],
+        "load_seconds": _state["load_seconds"],
+    }
@@ -0,0 +1,793 @@
+"""
+Upload ingest: row preparation, parallel CSV parsing and the staged merge
+into transacts / screening.
+
+Large CSVs are split into byte ranges that end on record boundaries. Each
+range is parsed and normalized in a worker process, which hands back the
+chunk already rendered as COPY text. The caller merges the chunks in file
+order on one connection (merge_packed), so results match a serial parse.
+
+Each batch is COPYed into a temp staging table shaped like the target, then
+merged in two statements:
+
+    UPDATE target ... FROM stage WHERE (target cols) IS DISTINCT FROM (stage cols)
+    INSERT INTO target SELECT ... FROM stage ON CONFLICT (key) DO NOTHING
+
+so rows whose values didn't change are never rewritten: no dead tuples, WAL
+or index churn, and the caller can tell a redundant upload (nothing inserted
+or updated) from a real change. Batch uploads stage each file into its own
+unlogged table first (create_upload_stage, copy_packed) and merge them all
+later in one transaction (merge_staged). Every merge also keeps the
+transacts dimension tables (schema.TRANSACTS_DIMENSIONS) counted.
+
+A full refresh skips the merge: the rows are COPYed into an index-free
+shadow table which, once indexed and analyzed, replaces the live table
+(create_shadow ... swap_shadow). Runs on the caller's cursor and
+transaction; no Flask or Backend imports, so worker processes stay light.
+"""
+
+import csv
+import io
+import re
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import psycopg2.errors
+
+import schema
+
+DATE_COLUMNS = ['dtleasefrom', 'dtleaseto', 'dtmovein', 'dtmoveout', 'dtroomearlyout']
+
+# COPY text format escapes
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# How much of the file the chunker reads at a time while looking for boundaries
+_SCAN_BLOCK_BYTES = 1024 * 1024
+
+# What a worker needs to turn raw CSV records into merge-ready rows:
+#   kind        "transacts" or "screening"
+#   fieldnames  header names, stripped and lowercased
+#   col_map     header -> column renames (SCREEN_MAPPING for screening)
+#   columns     output column order (upload_columns())
+#   row_key     rows without a value here are dropped
+#   dedupe_key  identity of a logical row within a batch (last one wins)
+RowSpec = namedtuple("RowSpec", "kind fieldnames col_map columns row_key dedupe_key")
+
+
+def new_stats():
+    return {"staged": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+
+
+# -------------------------------------------------
+# Row preparation
+# -------------------------------------------------
+def normalize_row(row: dict):
+    """Trim keys/values, empty->None, and parse dates (mm/dd/yyyy)."""
+    clean = {}
+    for k, v in row.items():
+        if v is not None:
+            v = str(v).strip()
+        clean[str(k).strip().lower()] = v or None
+    row = clean
+    for col in DATE_COLUMNS:
+        if row.get(col):
+            try:
+                row[col] = datetime.strptime(row[col], "%m/%d/%Y").date()
+            except Exception:
+                try:
+                    # Try ISO style if already clean
+                    if isinstance(row[col], (datetime, date)):
+                        row[col] = row[col]
+                    else:
+                        row[col] = datetime.fromisoformat(str(row[col])).date()
+                except Exception:
+                    row[col] = None
+    return row
+
+
+def parse_screening_numerics(row, rejects):
+    """
+    Parse the numeric screening cells of a mapped row in place. Values that
+    aren't numbers become NULL and are queued in `rejects` as
+    (row_key, column, raw_value) for ingest_rejects.
+    """
+    for col in schema.SCREENING_NUMERIC_COLUMNS:
+        if col in row:
+            value, ok = schema.parse_numeric(row[col], integer=col in schema.SCREENING_INTEGER_COLUMNS)
+            if not ok:
+                rejects.append((row.get("voyappcode"), col, row[col]))
+            row[col] = value
+    return row
+
+
+def prepare_row(kind, row, col_map, rejects):
+    """Normalize one raw upload record into a row dict for `kind`."""
+    row = normalize_row(row)
+    if kind == "screening":
+        row = {col_map.get(k, k): v for k, v in row.items()}
+        parse_screening_numerics(row, rejects)
+    else:
+        row["bucket_month"] = schema.bucket_month(row)
+    return row
+
+
+def upload_columns(kind, fieldnames, col_map):
+    """Column order of the rows prepare_row() builds from these headers."""
+    names = [str(h).strip().lower() for h in fieldnames]
+    if kind == "screening":
+        names = [col_map.get(h, h) for h in names]
+    else:
+        names.append("bucket_month")
+    return list(dict.fromkeys(names))
+
+
+# -------------------------------------------------
+# Chunked CSV parsing
+# -------------------------------------------------
+def read_csv_header(path):
+    """(fieldnames stripped and lowercased, byte offset of the first record)."""
+    with open(path, "rb") as f:
+        line = f.readline()
+        offset = f.tell()
+    header = next(csv.reader([line.decode("utf-8-sig")]), None)
+    if not header:
+        return None, offset
+    return [h.strip().lower() for h in header], offset
+
+
+def csv_chunks(path, start, chunk_bytes):
+    """
+    Split the records from byte `start` to the end of the file into
+    (start, end) ranges of roughly `chunk_bytes`. Every range ends just after
+    a newline that sits outside quotes (an even number of '"' so far), so a
+    quoted field with embedded newlines is never cut in half. Assumes RFC
+    4180 quoting; a stray quote inside an unquoted field can shift later
+    boundaries.
+    """
+    ranges = []
+    in_quotes = False
+    target = start + chunk_bytes
+    with open(path, "rb") as f:
+        f.seek(start)
+        pos = start  # file offset of block[0]
+        while True:
+            block = f.read(_SCAN_BLOCK_BYTES)
+            if not block:
+                break
+            end = pos + len(block)
+            i = 0
+            while target < end:
+                cut = max(target - pos, i)
+                in_quotes ^= block.count(b'"', i, cut) & 1
+                i = cut
+                nl = block.find(b"\n", i)
+                if nl < 0:
+                    break
+                in_quotes ^= block.count(b'"', i, nl) & 1
+                i = nl + 1
+                if not in_quotes:
+                    ranges.append((start, pos + i))
+                    start = pos + i
+                    target = start + chunk_bytes
+            in_quotes ^= block.count(b'"', i) & 1
+            pos = end
+    if pos > start:
+        ranges.append((start, pos))
+    return ranges
+
+
+def _parse_chunk(path, start, end, spec):
+    """Parse one byte range into a packed batch (see pack_rows) plus rejects."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    rejects, rows, parsed = [], [], 0
+    for raw in csv.DictReader(io.StringIO(text), fieldnames=spec.fieldnames):
+        parsed += 1
+        r = prepare_row(spec.kind, raw, spec.col_map, rejects)
+        if not r.get(spec.row_key):
+            continue
+        rows.append([r.get(c) for c in spec.columns])
+    packed = pack_rows(spec.columns, rows, spec.dedupe_key)
+    packed["parsed"] = parsed
+    packed["rejects"] = rejects
+    return packed
+
+
+def parse_csv(path, ranges, spec, workers=1):
+    """
+    Yield the packed batch for each range, in file order. With workers > 1
+    the ranges are parsed in a process pool, at most two per worker ahead of
+    the consumer so a slow merge doesn't pile parsed chunks up in memory.
+    """
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield _parse_chunk(path, start, end, spec)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        todo = iter(ranges)
+        for start, end in todo:
+            pending.append(pool.submit(_parse_chunk, path, start, end, spec))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            packed = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(_parse_chunk, path, *nxt, spec))
+            yield packed
+
+
+# -------------------------------------------------
+# Parquet / Arrow IPC
+# -------------------------------------------------
+# Typed exports skip text parsing. The file is memory-mapped, every column
+# is cleaned once with Arrow compute kernels, following the same rules as
+# prepare_row (trimmed strings, blanks -> NULL, native date casts, text
+# dates and screening numerics parsed only where the export left them as
+# text), and zero-copy slices of the result are rendered straight to COPY
+# text. pyarrow is optional and only imported here.
+ARROW_EXTENSIONS = (".parquet", ".arrow", ".feather", ".ipc")
+# Text date formats accepted in Arrow string columns (CSV: normalize_row)
+_ARROW_DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+
+def read_arrow(path, ext):
+    """
+    Memory-map a Parquet or Arrow IPC (file or stream format) upload as a
+    pyarrow Table. Unreadable files raise pyarrow.ArrowInvalid, a ValueError.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if ext == ".parquet":
+        return pq.read_table(path, memory_map=True)
+    source = pa.memory_map(path)
+    try:
+        return pa.ipc.open_file(source).read_all()
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source).read_all()
+
+
+def _arrow_text(col):
+    """String column: trimmed, blanks -> NULL."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    col = pc.utf8_trim_whitespace(col.cast(pa.string()))
+    return pc.if_else(pc.equal(col, ""), pa.scalar(None, pa.string()), col)
+
+
+def _arrow_date(col):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if pa.types.is_date(col.type) or pa.types.is_timestamp(col.type):
+        return col.cast(pa.date32())
+    if not pa.types.is_string(col.type):
+        return pa.nulls(len(col), pa.date32())
+    parsed = [pc.strptime(col, format=f, unit="s", error_is_null=True) for f in _ARROW_DATE_FORMATS]
+    return pc.coalesce(*parsed).cast(pa.date32())
+
+
+def _arrow_numeric(col, name, keys, rejects):
+    """
+    Screening numeric column (parse_screening_numerics): numbers pass
+    through; text has '%', '$' and ',' dropped and anything that still
+    isn't a number becomes NULL and is queued in `rejects`. INTEGER
+    columns go through schema.parse_numeric value by value, so fractions
+    and out-of-range numbers are rejected whatever the column's type.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    if name in schema.SCREENING_INTEGER_COLUMNS:
+        values = []
+        for key, raw in zip(keys.to_pylist(), col.to_pylist()):
+            value, ok = schema.parse_numeric(raw, integer=True)
+            if not ok:
+                rejects.append((key, name, raw))
+            values.append(value)
+        return pa.array(values, pa.int64())
+    if not pa.types.is_string(col.type):
+        return col
+    clean = _arrow_text(pc.replace_substring_regex(col, "[%$,]", ""))
+    ok = pc.match_substring_regex(clean, schema.NUMERIC_TEXT_PATTERN)
+    # Exponents can overflow NUMERIC; check those (rare) values one by one
+    scientific = pc.and_kleene(ok, pc.match_substring_regex(clean, "[eE]")).fill_null(False)
+    if pc.any(scientific).as_py():
+        fits = [
+            not sci or schema.parse_numeric(text)[1]
+            for text, sci in zip(clean.to_pylist(), scientific.to_pylist())
+        ]
+        ok = pc.and_kleene(ok, pa.array(fits))
+    bad = pc.and_kleene(pc.is_valid(clean), pc.invert(ok))
+    if pc.any(bad).as_py():
+        rejects.extend(
+            (key, name, raw)
+            for key, raw in zip(keys.filter(bad).to_pylist(), col.filter(bad).to_pylist())
+        )
+    return pc.if_else(ok, clean, pa.scalar(None, pa.string()))
+
+
+def prepare_arrow(table, kind, col_map, row_key, rejects):
+    """
+    Clean an upload Table column by column into the rows prepare_row()
+    would build: columns renamed (lowercased, `col_map`), values normalized,
+    bucket_month added for transacts, and rows without `row_key` dropped.
+    Returns (columns, table).
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    cols = {}
+    for name, col in zip(table.column_names, table.columns):
+        name = str(name).strip().lower()
+        if kind == "screening":
+            name = col_map.get(name, name)
+        col = col.combine_chunks()
+        if pa.types.is_dictionary(col.type):
+            col = col.dictionary_decode()
+        if pa.types.is_string(col.type) or pa.types.is_large_string(col.type):
+            col = _arrow_text(col)
+        elif pa.types.is_floating(col.type):
+            col = pc.if_else(pc.is_nan(col), pa.scalar(None, col.type), col)
+        if name in DATE_COLUMNS:
+            col = _arrow_date(col)
+        cols[name] = col  # a repeated header keeps the last column, as in prepare_row
+
+    if kind == "screening":
+        keys = cols.get(row_key, pa.nulls(table.num_rows, pa.string()))
+        for name in schema.SCREENING_NUMERIC_COLUMNS:
+            if name in cols:
+                cols[name] = _arrow_numeric(cols[name], name, keys, rejects)
+    else:
+        dates = [cols[c] for c in schema.BUCKET_DATE_COLUMNS if c in cols]
+        month = pc.floor_temporal(pc.coalesce(*dates), unit="month") if dates else pa.nulls(table.num_rows, pa.date32())
+        cols.pop("bucket_month", None)
+        cols["bucket_month"] = month.fill_null(schema.BUCKET_MONTH_SENTINEL)
+
+    prepared = pa.table(cols)
+    if row_key not in cols:
+        return list(cols), prepared.slice(0, 0)
+    return list(cols), prepared.filter(pc.is_valid(prepared[row_key]))
+
+
+def _arrow_copy_text(table):
+    """COPY text (bytes) for a prepared Table, built by Arrow kernels."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    fields = []
+    for col in table.columns:
+        if pa.types.is_string(col.type):
+            for raw, escaped in (("\\", "\\\\"), ("\t", "\\t"), ("\n", "\\n"), ("\r", "\\r")):
+                col = pc.replace_substring(col, raw, escaped)
+        else:
+            col = col.cast(pa.string())
+        fields.append(col.fill_null("\\N"))
+    fields[-1] = pc.binary_join_element_wise(fields[-1], "", "\n")  # row terminator
+    lines = pc.binary_join_element_wise(*fields, "\t")
+    if isinstance(lines, pa.ChunkedArray):
+        lines = lines.combine_chunks()
+    offsets = lines.buffers()[1]
+    start, end = (
+        int.from_bytes(offsets[4 * i:4 * i + 4], "little", signed=True)
+        for i in (lines.offset, lines.offset + len(lines))
+    )
+    return lines.buffers()[2][start:end].to_pybytes()
+
+
+def arrow_batches(columns, table, dedupe_key, batch_rows):
+    """
+    Yield packed batches (the pack_rows shape) of up to `batch_rows` rows of
+    a prepare_arrow() Table, in file order. Within a batch the last row for
+    each `dedupe_key` wins; later batches merge after earlier ones.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    for start in range(0, table.num_rows, batch_rows):
+        chunk = table.slice(start, batch_rows)
+        given = chunk.num_rows
+        last = (
+            chunk.append_column("_row", pa.array(range(given), pa.int64()))
+            .group_by(list(dedupe_key), use_threads=False)
+            .aggregate([("_row", "max")])
+            .column("_row_max")
+        )
+        if len(last) < given:
+            chunk = chunk.take(last.take(pc.sort_indices(last)))
+        years = set()
+        if "bucket_month" in columns:
+            years = set(pc.unique(pc.year(chunk["bucket_month"])).to_pylist())
+        yield {
+            "copy": _arrow_copy_text(chunk),
+            "rows": chunk.num_rows,
+            "duplicates": given - chunk.num_rows,
+            "years": years,
+        }
+
+
+# -------------------------------------------------
+# Staged merge
+# -------------------------------------------------
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value).translate(_COPY_ESCAPES)
+
+
+def _copy_text(rows):
+    return "".join("\t".join(_copy_value(v) for v in row) + "\n" for row in rows)
+
+
+def pack_rows(columns, rows, key):
+    """
+    Deduplicate `rows` on the `key` columns (the last row wins, like
+    sequential upserts) and render them as COPY text. Returns
+    {"copy": text, "rows": count, "duplicates": rows dropped,
+     "years": bucket_month years or empty}.
+    """
+    key_idx = [columns.index(k) for k in key]
+    given = len(rows)
+    rows = list({tuple(r[i] for i in key_idx): r for r in rows}.values())
+    years = set()
+    if "bucket_month" in columns:
+        i_bm = columns.index("bucket_month")
+        years = {r[i_bm].year for r in rows}
+    return {"copy": _copy_text(rows), "rows": len(rows), "duplicates": given - len(rows), "years": years}
+
+
+def stage_table(cur, target):
+    """(Re)create the session's staging table for `target`; returns its name."""
+    stage = f"stage_{target}"
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {stage} (LIKE {target} INCLUDING DEFAULTS)")
+    cur.execute(f"TRUNCATE {stage}")
+    return stage
+
+
+def copy_packed(cur, table, columns, packed, freeze=False):
+    """
+    COPY a packed batch (pack_rows, arrow_batches) into `table`. freeze=True
+    writes the rows already frozen; only valid for a plain table created (or
+    truncated) in the current transaction.
+    """
+    options = " WITH (FREEZE)" if freeze else ""
+    text = packed["copy"]
+    source = io.BytesIO(text) if isinstance(text, bytes) else io.StringIO(text)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN{options}", source)
+
+
+# Batch upload stages are named upload_stage_<unix time>_<batch>_<i>, so a
+# sweep can tell the ones a killed worker left behind from live ones.
+UPLOAD_STAGE_PREFIX = "upload_stage_"
+_UPLOAD_STAGE_NAME = re.compile(rf"^{UPLOAD_STAGE_PREFIX}(\d+)_\w+$")
+
+
+def upload_stage_name(batch_id, i):
+    """Table name for file `i` of a batch upload (create_upload_stage)."""
+    return f"{UPLOAD_STAGE_PREFIX}{int(time.time())}_{batch_id}_{i}"
+
+
+def create_upload_stage(cur, target, name):
+    """
+    Create the unlogged table `name` (upload_stage_name) shaped like
+    `target`, plus a stage_seq column that records arrival order. Used by
+    batch uploads to stage a file on one connection (copy_packed) and merge
+    it on another (merge_staged); the caller drops it, and
+    drop_stale_upload_stages() catches the ones it never got to.
+    """
+    cur.execute(f"CREATE UNLOGGED TABLE {name} (LIKE {target} INCLUDING DEFAULTS)")
+    cur.execute(f"ALTER TABLE {name} ADD COLUMN stage_seq bigint GENERATED ALWAYS AS IDENTITY")
+
+
+def drop_stale_upload_stages(cur, max_age_seconds):
+    """
+    Drop batch upload stages older than `max_age_seconds`, i.e. left behind
+    by a worker that died before its cleanup ran. Tables with the prefix but
+    no creation time in the name are dropped too. Returns the names dropped.
+    """
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_class c
+        WHERE c.relkind = 'r'
+          AND c.relnamespace = current_schema()::regnamespace
+          AND c.relname LIKE %s
+        """,
+        (UPLOAD_STAGE_PREFIX.replace("_", r"\_") + "%",),
+    )
+    cutoff = time.time() - max_age_seconds
+    dropped = []
+    for (name,) in cur.fetchall():
+        m = _UPLOAD_STAGE_NAME.match(name)
+        if m and int(m.group(1)) >= cutoff:
+            continue
+        cur.execute(f'DROP TABLE IF EXISTS "{name}"')
+        dropped.append(name)
+    return dropped
+
+
+def merge_packed(cur, target, columns, packed, key, stats=None, moved_key=None):
+    """
+    Merge one packed batch (pack_rows) into `target` on the conflict `key`
+    columns and add the counts to `stats` (new_stats() shape), which is
+    returned.
+
+    moved_key: for partitioned targets, the key column(s) that identify a
+    logical row when the partition key is part of `key`. Rows whose
+    partition key changed are deleted from their old partition first and
+    counted as updated. The batch must already be unique on moved_key.
+    """
+    stats = stats if stats is not None else new_stats()
+    if not packed["rows"]:
+        return stats
+
+    stage = stage_table(cur, target)
+    copy_packed(cur, stage, columns, packed)
+    return _merge_stage(cur, target, stage, columns, packed["rows"], key, stats, moved_key)
+
+
+def merge_staged(cur, target, staged, columns, key, stats=None, moved_key=None):
+    """
+    merge_packed() for a whole create_upload_stage() table. The last staged
+    row for each moved_key (or key) wins, as in a serial upload.
+    """
+    stats = stats if stats is not None else new_stats()
+    stage = stage_table(cur, target)
+    ident = ", ".join(moved_key or key)
+    cols = ", ".join(columns)
+    cur.execute(
+        f"""
+        INSERT INTO {stage} ({cols})
+        SELECT DISTINCT ON ({ident}) {cols}
+        FROM {staged}
+        ORDER BY {ident}, stage_seq DESC
+        """
+    )
+    rows = cur.rowcount
+    if not rows:
+        return stats
+    return _merge_stage(cur, target, stage, columns, rows, key, stats, moved_key)
+
+
+# pg_advisory_xact_lock(key, hashtext(table)): one dimension-counted merge
+# per table at a time (see _update_dimensions)
+_MERGE_LOCK_KEY = 727_014
+
+
+def _update_dimensions(cur, target, stage, columns, key, moved_key):
+    """
+    Apply the merge of `stage` to the dimension counts of `target`
+    (schema.TRANSACTS_DIMENSIONS), before the merge runs: +1 for the value
+    each staged row will carry, -1 for the value of each row it replaces.
+    Unchanged rows cancel out. A column the upload doesn't have keeps its
+    value on rows updated in place and is NULL on new or moved rows, as in
+    _merge_stage.
+
+    The deltas are only right if no other merge changes the same rows
+    between this read and the caller's commit, so merges into `target` are
+    serialised on a transaction-level advisory lock (held until commit).
+    """
+    if target != "transacts":
+        return
+    cur.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (_MERGE_LOCK_KEY, target))
+    dims = schema.TRANSACTS_DIMENSIONS
+    keep = any(column not in columns for _, column, _ in dims.values())
+    new_values = [
+        schema.dimension_value_sql(table, "s" if column in columns else "t")
+        for table, (_, column, _) in dims.items()
+    ]
+    old_values = [schema.dimension_value_sql(table, "t") for table in dims]
+    names = [f"v{i}" for i in range(len(dims))]
+    kept = f"LEFT JOIN {target} t ON {' AND '.join(f't.{k} = s.{k}' for k in key)}" if keep else ""
+    cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS dim_delta ({', '.join(f'{n} text' for n in names)}, n int)")
+    cur.execute("TRUNCATE dim_delta")
+    cur.execute(
+        f"""
+        INSERT INTO dim_delta
+        SELECT {", ".join(new_values)}, 1 FROM {stage} s {kept}
+        UNION ALL
+        SELECT {", ".join(old_values)}, -1
+        FROM {target} t
+        JOIN {stage} s ON {" AND ".join(f"t.{k} = s.{k}" for k in moved_key or key)}
+        """
+    )
+    for name, (table, (value_col, _, _)) in zip(names, dims.items()):
+        # ORDER BY: concurrent uploads lock dimension rows in the same order
+        cur.execute(
+            f"""
+            INSERT INTO {table} AS d ({value_col}, row_count)
+            SELECT {name}, SUM(n) FROM dim_delta
+            WHERE {name} IS NOT NULL
+            GROUP BY {name}
+            HAVING SUM(n) <> 0
+            ORDER BY {name}
+            ON CONFLICT ({value_col}) DO UPDATE SET row_count = d.row_count + EXCLUDED.row_count
+            """
+        )
+        if cur.rowcount:
+            cur.execute(f"DELETE FROM {table} WHERE row_count <= 0")
+
+
+def _merge_stage(cur, target, stage, columns, rows, key, stats, moved_key):
+    _update_dimensions(cur, target, stage, columns, key, moved_key)
+
+    moved = 0
+    if moved_key:
+        cur.execute(
+            f"""
+            DELETE FROM {target} t
+            USING {stage} s
+            WHERE {" AND ".join(f"t.{k} = s.{k}" for k in moved_key)}
+              AND ({", ".join(f"t.{k}" for k in key)}) IS DISTINCT FROM ({", ".join(f"s.{k}" for k in key)})
+            """
+        )
+        moved = cur.rowcount
+
+    updated = 0
+    value_cols = [c for c in columns if c not in key]
+    if value_cols:
+        cur.execute(
+            f"""
+            UPDATE {target} t
+            SET {", ".join(f"{c} = s.{c}" for c in value_cols)}
+            FROM {stage} s
+            WHERE {" AND ".join(f"t.{k} = s.{k}" for k in key)}
+              AND ({", ".join(f"t.{c}" for c in value_cols)})
+                  IS DISTINCT FROM ({", ".join(f"s.{c}" for c in value_cols)})
+            """
+        )
+        updated = cur.rowcount
+
+    cols = ", ".join(columns)
+    cur.execute(
+        f"""
+        INSERT INTO {target} ({cols})
+        SELECT {cols} FROM {stage}
+        ON CONFLICT ({", ".join(key)}) DO NOTHING
+        """
+    )
+    inserted = cur.rowcount
+
+    stats["staged"] += rows
+    stats["inserted"] += inserted - moved
+    stats["updated"] += updated + moved
+    stats["unchanged"] += rows - inserted - updated
+    return stats
+
+
+# -------------------------------------------------
+# Full refresh: load a shadow table, then swap it in
+# -------------------------------------------------
+# Every object of the shadow copy is named after its live counterpart plus
+# SHADOW_SUFFIX (transacts_shadow, transacts_y2024_shadow,
+# idx_transacts_pscode_shadow, ...); the swap strips it again.
+SHADOW_SUFFIX = "_shadow"
+# pg_try_advisory_xact_lock(key, hashtext(table)): one full refresh per table
+_REFRESH_LOCK_KEY = 727_013
+
+_INDEX_DEF_HEAD = re.compile(r"^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ")
+
+
+class RefreshInProgress(RuntimeError):
+    """Another session is already running a full refresh of the table."""
+
+
+def create_shadow(cur, target):
+    """
+    Create the empty shadow of `target`: same columns, defaults and
+    partitioning (with just a DEFAULT partition), but no indexes or primary
+    key, so COPY into it runs at full speed. Returns (shadow name,
+    partitioned). Everything happens in the caller's transaction, so a
+    failed refresh leaves nothing behind.
+    """
+    cur.execute("SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))", (_REFRESH_LOCK_KEY, target))
+    if not cur.fetchone()[0]:
+        raise RefreshInProgress(f"A full refresh of {target} is already running")
+
+    shadow = f"{target}{SHADOW_SUFFIX}"
+    cur.execute(
+        """
+        SELECT pg_get_partkeydef(c.oid)
+        FROM pg_class c
+        WHERE c.oid = %s::regclass AND c.relkind = 'p'
+        """,
+        (target,),
+    )
+    row = cur.fetchone()
+    like = f"(LIKE {target} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+    if row is None:
+        cur.execute(f"CREATE TABLE {shadow} {like}")
+        return shadow, False
+    cur.execute(f"CREATE TABLE {shadow} {like} PARTITION BY {row[0]}")
+    cur.execute(f"CREATE TABLE {target}_default{SHADOW_SUFFIX} PARTITION OF {shadow} DEFAULT")
+    return shadow, True
+
+
+def shadow_duplicate(cur, shadow, ident):
+    """One `ident` value that occurs on more than one shadow row, else None."""
+    cols = ", ".join(ident)
+    cur.execute(f"SELECT {cols} FROM {shadow} GROUP BY {cols} HAVING count(*) > 1 LIMIT 1")
+    return cur.fetchone()
+
+
+def build_shadow_indexes(cur, target):
+    """
+    Recreate the primary key / unique constraints and indexes of `target` on
+    its shadow, after the load. On a partitioned shadow they cascade to
+    every partition.
+    """
+    shadow = f"{target}{SHADOW_SUFFIX}"
+    cur.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(x.indexrelid), c.conname, pg_get_constraintdef(c.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = %s::regclass
+        ORDER BY c.conname IS NULL, i.relname
+        """,
+        (target,),
+    )
+    for name, indexdef, conname, condef in cur.fetchall():
+        if conname is not None:
+            cur.execute(f"ALTER TABLE {shadow} ADD CONSTRAINT {conname}{SHADOW_SUFFIX} {condef}")
+        else:
+            head = f"CREATE \\1INDEX {name}{SHADOW_SUFFIX} ON {shadow} "
+            cur.execute(_INDEX_DEF_HEAD.sub(head, indexdef, count=1))
+
+
+def swap_shadow(cur, target, lock_timeout_ms=2000, attempts=10):
+    """
+    Replace `target` with its shadow: drop the live table and rename the
+    shadow, its partitions and all their indexes to the live names. Readers
+    only wait for the ACCESS EXCLUSIVE lock taken here, held until the
+    caller commits. To avoid queueing every new reader behind a long-running
+    query, the lock is tried with a timeout, backing off between attempts.
+    Grants on the live table are not carried over.
+    """
+    shadow = f"{target}{SHADOW_SUFFIX}"
+    cur.execute("SELECT set_config('lock_timeout', %s, true)", (f"{int(lock_timeout_ms)}ms",))
+    for attempt in range(attempts):
+        cur.execute("SAVEPOINT swap_lock")
+        try:
+            cur.execute(f"LOCK TABLE {target} IN ACCESS EXCLUSIVE MODE")
+            break
+        except psycopg2.errors.LockNotAvailable:
+            cur.execute("ROLLBACK TO SAVEPOINT swap_lock")
+            if attempt == attempts - 1:
+                raise
+            time.sleep(min(0.1 * 2 ** attempt, 5.0))
+    cur.execute("RELEASE SAVEPOINT swap_lock")
+    cur.execute("SELECT set_config('lock_timeout', '0', true)")
+
+    # pg_partition_tree() is empty for a plain table, hence the UNION
+    cur.execute(
+        """
+        WITH t AS (
+            SELECT %s::regclass AS relid
+            UNION SELECT relid FROM pg_partition_tree(%s::regclass)
+        )
+        SELECT c.relname, false FROM t JOIN pg_class c ON c.oid = t.relid
+        UNION ALL
+        SELECT i.relname, true
+        FROM t
+        JOIN pg_index x ON x.indrelid = t.relid
+        JOIN pg_class i ON i.oid = x.indexrelid
+        """,
+        (shadow, shadow),
+    )
+    renames = [(name, is_index) for name, is_index in cur.fetchall() if SHADOW_SUFFIX in name]
+    cur.execute(f"DROP TABLE {target}")
+    for name, is_index in renames:
+        kind = "INDEX" if is_index else "TABLE"
+        cur.execute(f"ALTER {kind} {name} RENAME TO {name.replace(SHADOW_SUFFIX, '', 1)}")
@@ -0,0 +1,740 @@
+"""
+Column layouts and DDL shared by the API (Backend.py) and the offline tools
+(synthetic data, benchmarks). Kept free of Flask / DB imports so tools can
+use them without opening a database connection; migrate() takes an open
+DB-API connection from the caller.
+"""
+
+import re
+from datetime import date
+from decimal import Decimal
+
+# transacts columns, in table order. The transaction export's CSV header
+# uses these names directly (case-insensitive).
+TRANSACTS_COLUMNS = [
+    "pscode",
+    "tscode",
+    "uscode",
+    "screenresult",
+    "screenvendor",
+    "dnumnsf",
+    "dnumlate",
+    "davgdayslate",
+    "sevicted",
+    "smoveoutreason",
+    "drentwrittenoff",
+    "dnonrentwrittenoff",
+    "damoutcollections",
+    "srenewed",
+    "srent",
+    "sfulfilledterm",
+    "dincome",
+    "dtleasefrom",
+    "dtleaseto",
+    "dtmovein",
+    "dtmoveout",
+    "dwocount",
+    "dtroomearlyout",
+    "sempcompany",
+    "sempposition",
+    "sflex",
+    "sleap",
+    "sprevzip",
+    "daypaid",
+    "spaymentsource",
+    "dpaysourcechange",
+]
+
+# Screening export display headers -> screening table columns, in table order
+SCREEN_HEADERS = {
+    "Applicant Credit Applicant ID": "appcredid",
+    "Applicant Credit Date": "appcreddate",
+    "Applicant ID": "appid",
+    "Category": "category",
+    "City": "city",
+    "Company Code": "companycode",
+    "Company Name": "companyname",
+    "Credit Run": "creditrun",
+    "Date": "date",
+    "Property ID": "propertyid",
+    "Policy": "policy",
+    "Positive Employment": "posemployment",
+    "Positive Housing": "poshousing",
+    "Property Name": "propname",
+    "Reason 1": "reasonone",
+    "Reason 2": "reasontwo",
+    "Reason 3": "reasonthree",
+    "Rent Own History": "rentownhist",
+    "Original Score": "origscore",
+    "Final Score": "finscore",
+    "Score Category": "scorecat",
+    "Score Model": "scoremodel",
+    "Market Source": "marketsource",
+    "State": "state",
+    "Zip": "zip",
+    "Age" : "age",
+    "Current Emp (Months)": "currempmon",
+    "Current Emp (Years)": "currempyear",
+    "Current Res (Months)": "currresmon",
+    "Current Res (Years)": "currresyear",
+    "Income": "income",
+    "Primary Income": "primincome",
+    "Additional Income": "addincome",
+    "Risk Score": "riskscore",
+    "Previous Emp (Months)": "prevempmon",
+    "Previous Emp (Years)": "prevempyear",
+    "Previous Res (Months)": "prevresmon",
+    "Previous Res (Years)": "prevresyear",
+    "Rent": "rent",
+    "Rent To Income Ratio (%)": "rentincratio",
+    "Debt To Income Ratio (%)": "debtincratio",
+    "Debt To Credit Ratio (%)": "debtcredratio",
+    "Voyager Applicant Code": "voyappcode",
+    "Voyager Property Name": "voypropname",
+    "Voyager Property Code" : "voypropcode",
+    "Has CheckPoint Msgs": "hascpmess",
+    "Checkpoint Message 1": "checkmes1",
+    "Checkpoint Message 2": "checkmes2",
+    "Has Consumer Stmt": "hasconsstmt",
+    "Student Debt": "studdebt",
+    "Medical Debt": "meddebt",
+    "Total Scorable Debt": "totscordebt",
+    "Total Debt": "totdebt",
+    "Item To Review 1": "itemrev1",
+    "Item To Review 2": "itemrev2",
+    "Item To Review 3": "itemrev3",
+    "Review Report Acknowledgement": "revrepack",
+    "Application ID": "appid2",
+    "Application Score": "appscore",
+    "Application Monthly Income": "appmoninc",
+    "Application Total Debt (Policy)": "apptotdebt",
+    "Avg Risk Score": "avgriskscore",
+    "TWN Report Found": "twnreport",
+    "Applicant Status": "appstatus",
+}
+
+
+# -------------------------------------------------
+# Migrations
+# -------------------------------------------------
+# Schema changes are applied explicitly (`python Backend.py migrate`), never at
+# import. Each entry is (version, description, statements), where a statement
+# is SQL text or a callable taking the migration's cursor; applied versions
+# are recorded in schema_migrations, so re-running migrate is a no-op. Never
+# edit a released migration -- append a new one.
+
+TRANSACTS_DDL = """
+CREATE TABLE IF NOT EXISTS transacts (
+    pscode TEXT,
+    tscode TEXT PRIMARY KEY,
+    uscode TEXT,
+    screenresult TEXT,
+    screenvendor TEXT,
+    dnumnsf INTEGER,
+    dnumlate INTEGER,
+    davgdayslate INTEGER,
+    sevicted TEXT,
+    smoveoutreason TEXT,
+    drentwrittenoff NUMERIC,
+    dnonrentwrittenoff NUMERIC,
+    damoutcollections NUMERIC,
+    srenewed TEXT,
+    srent NUMERIC,
+    sfulfilledterm TEXT,
+    dincome NUMERIC,
+    dtleasefrom DATE,
+    dtleaseto DATE,
+    dtmovein DATE,
+    dtmoveout DATE,
+    dwocount INTEGER,
+    dtroomearlyout DATE,
+    sempcompany TEXT,
+    sempposition TEXT,
+    sflex TEXT,
+    sleap TEXT,
+    sprevzip TEXT,
+    daypaid INTEGER,
+    spaymentsource TEXT,
+    dpaysourcechange INTEGER
+);
+"""
+
+SCREENING_DDL = """
+CREATE TABLE IF NOT EXISTS screening (
+    appcredid TEXT,
+    appcreddate DATE,
+    appid TEXT,
+    category TEXT,
+    city TEXT,
+    companycode TEXT,
+    companyname TEXT,
+    creditrun BOOLEAN,
+    date DATE,
+    propertyid TEXT,
+    policy TEXT,
+    posemployment TEXT,
+    poshousing TEXT,
+    propname TEXT,
+    reasonone TEXT,
+    reasontwo TEXT,
+    reasonthree TEXT,
+    rentownhist TEXT,
+    origscore TEXT,
+    finscore TEXT,
+    scorecat TEXT,
+    scoremodel INTEGER,
+    marketsource TEXT,
+    state TEXT,
+    zip TEXT,
+    age NUMERIC,
+    currempmon NUMERIC,
+    currempyear NUMERIC,
+    currresmon NUMERIC,
+    currresyear NUMERIC,
+    income NUMERIC,
+    primincome NUMERIC,
+    addincome NUMERIC,
+    riskscore NUMERIC,
+    prevempmon NUMERIC,
+    prevempyear NUMERIC,
+    prevresmon NUMERIC,
+    prevresyear NUMERIC,
+    rent NUMERIC,
+    rentincratio NUMERIC,
+    debtincratio NUMERIC,
+    debtcredratio NUMERIC,
+    voyappcode TEXT PRIMARY KEY,
+    voypropname TEXT,
+    voypropcode TEXT,
+    hascpmess TEXT,
+    checkmes1 TEXT,
+    checkmes2 TEXT,
+    hasconsstmt TEXT,
+    studdebt TEXT,
+    meddebt TEXT,
+    totscordebt NUMERIC,
+    totdebt NUMERIC,
+    itemrev1 TEXT,
+    itemrev2 TEXT,
+    itemrev3 TEXT,
+    revrepack TEXT,
+    appid2 TEXT,
+    appscore TEXT,
+    appmoninc TEXT,
+    apptotdebt NUMERIC,
+    avgriskscore NUMERIC,
+    twnreport TEXT,
+    appstatus TEXT
+);
+"""
+
+META_UPDATES_DDL = """
+CREATE TABLE IF NOT EXISTS meta_updates (
+    id SERIAL PRIMARY KEY,
+    updated_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+USERS_DDL = """
+CREATE TABLE IF NOT EXISTS users (
+    id SERIAL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    password_hash VARCHAR(255) NOT NULL,
+    role VARCHAR(50) DEFAULT 'end-user',
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Helpful indexes for WHERE clauses in KPI queries / filters. The date indexes
+# help the planner even with the coalesce/date_trunc month bucket.
+TRANSACTS_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_transacts_pscode ON transacts (pscode)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_screenresult ON transacts (screenresult)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_sevicted ON transacts (sevicted)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_dates_movein ON transacts (dtmovein)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_dates_leasefrom ON transacts (dtleasefrom)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_dates_roomout ON transacts (dtroomearlyout)",
+    "CREATE INDEX IF NOT EXISTS idx_transacts_dates_leaseto ON transacts (dtleaseto)",
+]
+
+SLOW_QUERIES_DDL = """
+CREATE TABLE IF NOT EXISTS slow_queries (
+    id BIGSERIAL PRIMARY KEY,
+    logged_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    query_name TEXT,
+    fingerprint TEXT NOT NULL,
+    statement TEXT NOT NULL,
+    params TEXT,
+    duration_ms DOUBLE PRECISION NOT NULL,
+    plan JSONB
+);
+CREATE INDEX IF NOT EXISTS idx_slow_queries_fp_time ON slow_queries (fingerprint, logged_at);
+"""
+
+# -------------------------------------------------
+# transacts partitioning
+# -------------------------------------------------
+# transacts is range-partitioned by bucket_month: the month a row counts
+# toward on the dashboard (first of coalesce(dtmovein, dtleasefrom,
+# dtroomearlyout, dtleaseto)). Rows with none of those dates get the
+# 1900-01-01 sentinel, because a partition key can't be NULL. The key is
+# stored rather than generated (Postgres can't partition on a generated
+# column), so writers fill it in with bucket_month() / BUCKET_MONTH_SQL.
+# It is part of the primary key, which Postgres requires for partitioned tables.
+BUCKET_DATE_COLUMNS = ("dtmovein", "dtleasefrom", "dtroomearlyout", "dtleaseto")
+BUCKET_MONTH_SENTINEL = date(1900, 1, 1)
+BUCKET_MONTH_SQL = (
+    f"coalesce(date_trunc('month', coalesce({', '.join(BUCKET_DATE_COLUMNS)}))::date, "
+    f"DATE '{BUCKET_MONTH_SENTINEL.isoformat()}')"
+)
+
+# One partition per lease year in this window; anything else (the sentinel,
+# typo'd years) lives in transacts_default.
+PARTITION_MIN_YEAR = 2000
+PARTITION_MAX_YEARS_AHEAD = 5
+_PARTITION_LOCK_KEY = 727_012
+
+TRANSACTS_PARTITIONED_DDL = """
+CREATE TABLE transacts (
+    pscode TEXT,
+    tscode TEXT NOT NULL,
+    uscode TEXT,
+    screenresult TEXT,
+    screenvendor TEXT,
+    dnumnsf INTEGER,
+    dnumlate INTEGER,
+    davgdayslate INTEGER,
+    sevicted TEXT,
+    smoveoutreason TEXT,
+    drentwrittenoff NUMERIC,
+    dnonrentwrittenoff NUMERIC,
+    damoutcollections NUMERIC,
+    srenewed TEXT,
+    srent NUMERIC,
+    sfulfilledterm TEXT,
+    dincome NUMERIC,
+    dtleasefrom DATE,
+    dtleaseto DATE,
+    dtmovein DATE,
+    dtmoveout DATE,
+    dwocount INTEGER,
+    dtroomearlyout DATE,
+    sempcompany TEXT,
+    sempposition TEXT,
+    sflex TEXT,
+    sleap TEXT,
+    sprevzip TEXT,
+    daypaid INTEGER,
+    spaymentsource TEXT,
+    dpaysourcechange INTEGER,
+    bucket_month DATE NOT NULL,
+    PRIMARY KEY (tscode, bucket_month)
+) PARTITION BY RANGE (bucket_month);
+CREATE TABLE transacts_default PARTITION OF transacts DEFAULT;
+"""
+
+
+def bucket_month(row):
+    """bucket_month for a transacts row dict whose date columns are dates."""
+    for col in BUCKET_DATE_COLUMNS:
+        value = row.get(col)
+        if value:
+            return date(value.year, value.month, 1)
+    return BUCKET_MONTH_SENTINEL
+
+
+def transacts_partition_years(cur, suffix=""):
+    """
+    Years that already have their own transacts partition. With `suffix`,
+    those of the transacts{suffix} copy, whose partitions are named
+    transacts_y<year>{suffix}.
+    """
+    cur.execute(
+        """
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass
+        """,
+        (f"transacts{suffix}",),
+    )
+    pattern = re.compile(rf"^transacts_y(\d{{4}}){re.escape(suffix)}$")
+    years = set()
+    for (name,) in cur.fetchall():
+        m = pattern.match(name)
+        if m:
+            years.add(int(m.group(1)))
+    return years
+
+
+def ensure_transacts_partitions(cur, years, suffix=""):
+    """
+    Create the yearly transacts partitions missing for `years`, moving any of
+    their rows out of transacts_default first (ATTACH refuses otherwise).
+    Indexes defined on transacts are created on each new partition by ATTACH.
+    Runs in the caller's transaction and returns the years created. `suffix`
+    works on a copy instead (transacts{suffix}, transacts_y<year>{suffix},
+    transacts_default{suffix}), e.g. the shadow table of a full refresh.
+    """
+    last = date.today().year + PARTITION_MAX_YEARS_AHEAD
+    wanted = {int(y) for y in years if PARTITION_MIN_YEAR <= int(y) <= last}
+    if not wanted:
+        return []
+    cur.execute("SELECT pg_advisory_xact_lock(%s)", (_PARTITION_LOCK_KEY,))
+    parent, default = f"transacts{suffix}", f"transacts_default{suffix}"
+    missing = sorted(wanted - transacts_partition_years(cur, suffix))
+    for year in missing:
+        name = f"transacts_y{year}{suffix}"
+        bounds = (date(year, 1, 1), date(year + 1, 1, 1))
+        cur.execute(f"CREATE TABLE {name} (LIKE {parent} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cur.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default}
+                WHERE bucket_month >= %s AND bucket_month < %s
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+            """,
+            bounds,
+        )
+        cur.execute(f"ALTER TABLE {parent} ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)", bounds)
+    return missing
+
+
+def _partition_transacts(cur):
+    # Swap the heap for a partitioned table and copy the rows across. Indexes
+    # are built on the parent after the load (they cascade to every partition).
+    cur.execute("ALTER TABLE transacts RENAME TO transacts_unpartitioned")
+    cur.execute("ALTER INDEX IF EXISTS transacts_pkey RENAME TO transacts_unpartitioned_pkey")
+    cur.execute(TRANSACTS_PARTITIONED_DDL)
+
+    cur.execute(
+        f"SELECT DISTINCT extract(year FROM {BUCKET_MONTH_SQL})::int FROM transacts_unpartitioned"
+    )
+    this_year = date.today().year
+    years = {row[0] for row in cur.fetchall()} | {this_year, this_year + 1}
+    ensure_transacts_partitions(cur, years)
+
+    cols = ", ".join(TRANSACTS_COLUMNS)
+    cur.execute(
+        f"""
+        INSERT INTO transacts ({cols}, bucket_month)
+        SELECT {cols}, {BUCKET_MONTH_SQL} FROM transacts_unpartitioned
+        """
+    )
+    cur.execute("DROP TABLE transacts_unpartitioned")
+    for statement in TRANSACTS_INDEXES:
+        cur.execute(statement)
+    # month windows narrower than a partition
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_transacts_bucket_month ON transacts (bucket_month)")
+
+
+# -------------------------------------------------
+# Typed screening numerics / ingest rejects
+# -------------------------------------------------
+# Screening fields the export carries as text but that hold numbers;
+# migration 4 converts them to NUMERIC.
+SCREENING_TEXT_NUMERIC_COLUMNS = ["origscore", "finscore", "studdebt", "meddebt", "appscore", "appmoninc"]
+
+# Every numeric screening column (table order). Uploads parse these with
+# parse_numeric(), so a bad cell becomes NULL plus an ingest_rejects row
+# instead of failing the whole batch.
+SCREENING_NUMERIC_COLUMNS = [
+    c for c in SCREEN_HEADERS.values()
+    if c in SCREENING_TEXT_NUMERIC_COLUMNS
+    or re.search(rf"^\s+{c} (NUMERIC|INTEGER)", SCREENING_DDL, re.M)
+]
+# The INTEGER ones: parse_numeric(..., integer=True) also rejects fractions
+# and values outside int4, which the COPY would otherwise fail on.
+SCREENING_INTEGER_COLUMNS = frozenset(
+    c for c in SCREENING_NUMERIC_COLUMNS if re.search(rf"^\s+{c} INTEGER", SCREENING_DDL, re.M)
+)
+INT4_MIN, INT4_MAX = -2**31, 2**31 - 1
+# NUMERIC holds at most 131072 digits before the point and 16383 after;
+# '1e200000' is a number but overflows the COPY.
+NUMERIC_MAX_ADJUSTED, NUMERIC_MIN_EXPONENT = 131071, -16383
+
+# A plain decimal number once '%', '$' and thousands separators are removed.
+# POSIX-compatible, so the migration applies the same rule in SQL.
+NUMERIC_TEXT_PATTERN = r"^[+-]?([0-9]+[.]?[0-9]*|[.][0-9]+)([eE][+-]?[0-9]+)?$"
+_NUMERIC_TEXT = re.compile(NUMERIC_TEXT_PATTERN)
+_NUMERIC_NOISE = str.maketrans("", "", "%$,")
+
+INGEST_REJECTS_DDL = """
+CREATE TABLE IF NOT EXISTS ingest_rejects (
+    id BIGSERIAL PRIMARY KEY,
+    logged_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    source TEXT,
+    table_name TEXT NOT NULL,
+    row_key TEXT,
+    column_name TEXT NOT NULL,
+    raw_value TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_ingest_rejects_time ON ingest_rejects (logged_at);
+"""
+
+INSERT_REJECT_SQL = """
+    INSERT INTO ingest_rejects (source, table_name, row_key, column_name, raw_value)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+
+def parse_numeric(value, integer=False):
+    """
+    Parse an upload cell bound for a numeric column. Returns (value, ok):
+    '%', '$' and ',' are ignored, blanks give (None, True) and anything else
+    that isn't a number gives (None, False). With integer=True (INTEGER
+    columns) the number must also be whole and fit in int4; it comes back
+    as an int ('1e3' -> 1000, '2.0' -> 2, '1.5' -> rejected).
+    """
+    if value is None:
+        return None, True
+    if isinstance(value, (int, float, Decimal)) and not isinstance(value, bool):
+        if value != value:
+            return None, True  # NaN -> NULL
+        number = value
+    else:
+        text = str(value).translate(_NUMERIC_NOISE).strip()
+        if not text:
+            return None, True
+        if not _NUMERIC_TEXT.match(text):
+            return None, False
+        number = Decimal(text)
+        if (number.adjusted() > NUMERIC_MAX_ADJUSTED and not number.is_zero()) \
+                or number.as_tuple().exponent < NUMERIC_MIN_EXPONENT:
+            return None, False
+    if not integer:
+        return number, True
+    if isinstance(number, Decimal) and number.adjusted() > 18 and not number.is_zero():
+        return None, False  # far outside int4; don't build the int
+    try:
+        whole = int(number)
+    except (OverflowError, ValueError):  # infinities
+        return None, False
+    if whole != number or not INT4_MIN <= whole <= INT4_MAX:
+        return None, False
+    return whole, True
+
+
+def _type_screening_numerics(cur):
+    # Log the values that won't convert, then convert (those become NULL).
+    for col in SCREENING_TEXT_NUMERIC_COLUMNS:
+        clean = f"btrim(translate({col}, '%%$,', ''))"
+        cur.execute(
+            f"""
+            INSERT INTO ingest_rejects (source, table_name, row_key, column_name, raw_value)
+            SELECT 'migration 4', 'screening', voyappcode, %s, {col}
+            FROM screening
+            WHERE {clean} <> '' AND {clean} !~ %s
+            """,
+            (col, NUMERIC_TEXT_PATTERN),
+        )
+        cur.execute(
+            f"""
+            ALTER TABLE screening ALTER COLUMN {col} TYPE NUMERIC
+            USING CASE WHEN {clean} ~ %s THEN {clean}::numeric END
+            """,
+            (NUMERIC_TEXT_PATTERN,),
+        )
+
+
+# Ledger of ingested upload files, keyed by content hash, so re-uploading the
+# same export is a no-op (see Backend.upload_file).
+UPLOADS_DDL = """
+CREATE TABLE IF NOT EXISTS uploads (
+    id BIGSERIAL PRIMARY KEY,
+    kind TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    filename TEXT,
+    size_bytes BIGINT NOT NULL,
+    rows_written INTEGER NOT NULL DEFAULT 0,
+    rejected_values INTEGER NOT NULL DEFAULT 0,
+    uploaded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (kind, sha256)
+);
+CREATE INDEX IF NOT EXISTS idx_uploads_kind_time ON uploads (kind, uploaded_at);
+"""
+
+
+# ANALYZE / VACUUM runs on the data tables, after ingests (Backend
+# _maintain_after_ingest) and full refreshes; reported by /admin/maintenance.
+MAINTENANCE_LOG_DDL = """
+CREATE TABLE IF NOT EXISTS maintenance_log (
+    id BIGSERIAL PRIMARY KEY,
+    ran_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    table_name TEXT NOT NULL,
+    action TEXT NOT NULL,
+    reason TEXT,
+    rows_changed BIGINT,
+    live_rows BIGINT,
+    dead_rows BIGINT,
+    table_bytes BIGINT,
+    index_bytes BIGINT,
+    duration_ms DOUBLE PRECISION
+);
+CREATE INDEX IF NOT EXISTS idx_maintenance_log_time ON maintenance_log (ran_at);
+"""
+
+
+# Trained model caches, one row per model and data version (meta_updates
+# timestamp): the JSON payload, the fitted model bundle and global drivers,
+# pickled. Written by `python Backend.py train` or by whichever web worker
+# retrains first, and loaded by every other worker instead of retraining.
+# Unpickling an artifact runs code from this table, so each row carries an
+# HMAC (signature, migration 10) keyed by the app's MODEL_ARTIFACT_KEY, and
+# loaders only unpickle rows whose signature checks out; a role that can
+# write here but doesn't hold the key can't get code run. libraries
+# (migration 9) records the catboost / scikit-learn / pandas / numpy /
+# Python versions an artifact was pickled under; loaders treat any other
+# versions as a miss.
+MODEL_ARTIFACTS_DDL = """
+CREATE TABLE IF NOT EXISTS model_artifacts (
+    model TEXT NOT NULL,
+    data_version TIMESTAMP NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    source TEXT NOT NULL,
+    train_seconds DOUBLE PRECISION,
+    artifact BYTEA NOT NULL,
+    PRIMARY KEY (model, data_version)
+);
+"""
+MODEL_ARTIFACT_LIBRARIES_DDL = """
+ALTER TABLE model_artifacts ADD COLUMN IF NOT EXISTS libraries JSONB;
+"""
+MODEL_ARTIFACT_SIGNATURE_DDL = """
+ALTER TABLE model_artifacts ADD COLUMN IF NOT EXISTS signature BYTEA;
+"""
+
+
+# Dimension tables behind /filters/options: one row per distinct value of a
+# transacts column, with how many transacts rows carry it. Upload merges
+# apply count deltas as they go (ingest.py); full refreshes and seeding
+# rebuild them (rebuild_dimensions).
+#   table -> (value column, transacts column, SQL template around it)
+PSCODE_CLEAN_SQL = "regexp_replace({}, '\\.0+$', '')"  # "121.0" -> "121"
+TRANSACTS_DIMENSIONS = {
+    "dim_properties": ("pcode_clean", "pscode", PSCODE_CLEAN_SQL),
+    "dim_screenresults": ("screenresult", "screenresult", "{}"),
+    "dim_payment_sources": ("spaymentsource", "spaymentsource", "{}"),
+    "dim_screen_vendors": ("screenvendor", "screenvendor", "{}"),
+}
+
+
+def dimension_value_sql(table, source=None):
+    """The dimension's value expression over transacts (or `source`, e.g. "t")."""
+    _, column, template = TRANSACTS_DIMENSIONS[table]
+    return template.format(f"{source}.{column}" if source else column)
+
+
+def rebuild_dimensions(cur):
+    """Recount every transacts dimension from scratch (in the caller's transaction)."""
+    for table, (value_col, _, _) in TRANSACTS_DIMENSIONS.items():
+        expr = dimension_value_sql(table)
+        cur.execute(f"DELETE FROM {table}")
+        cur.execute(
+            f"""
+            INSERT INTO {table} ({value_col}, row_count)
+            SELECT {expr}, COUNT(*) FROM transacts
+            WHERE {expr} IS NOT NULL
+            GROUP BY 1
+            """
+        )
+
+
+def _create_dimensions(cur):
+    for table, (value_col, _, _) in TRANSACTS_DIMENSIONS.items():
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                {value_col} TEXT PRIMARY KEY,
+                row_count BIGINT NOT NULL
+            )
+            """
+        )
+    rebuild_dimensions(cur)
+
+
+MIGRATIONS = [
+    # Everything Backend.py used to create at import. IF NOT EXISTS keeps it
+    # safe on databases that already have these tables.
+    (1, "base tables, KPI indexes and users",
+     [TRANSACTS_DDL, SCREENING_DDL, META_UPDATES_DDL, *TRANSACTS_INDEXES, USERS_DDL]),
+    (2, "slow query log", [SLOW_QUERIES_DDL]),
+    (3, "partition transacts by bucket_month", [_partition_transacts]),
+    (4, "numeric screening scores/debts and ingest rejects",
+     [INGEST_REJECTS_DDL, _type_screening_numerics]),
+    (5, "uploads ledger", [UPLOADS_DDL]),
+    (6, "maintenance log", [MAINTENANCE_LOG_DDL]),
+    (7, "filter dimension tables", [_create_dimensions]),
+    (8, "model artifacts", [MODEL_ARTIFACTS_DDL]),
+    (9, "model artifact library versions", [MODEL_ARTIFACT_LIBRARIES_DDL]),
+    (10, "model artifact signatures", [MODEL_ARTIFACT_SIGNATURE_DDL]),
+]
+
+_MIGRATIONS_TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+"""
+# pg_advisory_xact_lock key so concurrent `migrate` runs apply each step once
+_MIGRATE_LOCK_KEY = 727_011
+
+
+def applied_versions(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_migrations')")
+        if cur.fetchone()[0] is None:
+            return set()
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row[0] for row in cur.fetchall()}
+
+
+def pending_migrations(conn):
+    """[(version, description)] not yet applied to conn's database."""
+    done = applied_versions(conn)
+    return [(v, desc) for v, desc, _ in MIGRATIONS if v not in done]
+
+
+def migrate(conn, log=print):
+    """
+    Apply pending MIGRATIONS to conn's database, each in its own transaction.
+    Returns the list of versions applied (empty when already up to date).
+    """
+    autocommit = conn.autocommit
+    conn.autocommit = False
+    applied = []
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_MIGRATIONS_TABLE_DDL)
+        conn.commit()
+
+        for version, description, statements in MIGRATIONS:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATE_LOCK_KEY,))
+                cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                if cur.fetchone() is not None:
+                    conn.rollback()
+                    continue
+                for statement in statements:
+                    if callable(statement):
+                        statement(cur)
+                    else:
+                        cur.execute(statement)
+                cur.execute(
+                    "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                    (version, description),
+                )
+            conn.commit()
+            applied.append(version)
+            if log:
+                log(f"Applied migration {version}: {description}")
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.autocommit = autocommit
+    return applied
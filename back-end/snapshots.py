@@ -0,0 +1,127 @@
+"""
+On-disk Arrow snapshots of the model training / scoring frames.
+
+The first model run for a data version writes each frame it loads from
+Postgres to an uncompressed Arrow IPC file under
+
+    <root>/<database>/<data version>/<query name>-<query hash>.arrow
+
+and every later run for the same version (a retrain after a restart, another
+worker process, a hyperparameter experiment) memory-maps that file instead
+of re-running the query. Numeric columns without nulls come back zero-copy
+over the mapped pages, which the OS page cache shares between processes;
+text, date and NUMERIC columns are rebuilt as the same Python objects
+pd.read_sql returns, so the frames are identical either way.
+
+The query hash covers the SQL and its parameters, so changing a query never
+reads a stale file. Writes go to a temp file that is renamed into place;
+older data versions are deleted once a newer one is written. The frames hold
+tenant-level data, so directories are created 0700 and files 0600, and a
+directory owned by another user is refused.
+
+Needs pyarrow (optional; callers fall back to pd.read_sql without it).
+No Flask or Backend imports.
+"""
+
+import hashlib
+import os
+import re
+import shutil
+
+SUFFIX = ".arrow"
+
+
+def _safe(part):
+    return re.sub(r"[^\w.+-]", "_", part)
+
+
+def _version_dir(root, database, version):
+    # "2025-03-01 12:00:00.123+00:00" -> "20250301T120000.123000+0000"
+    stamp = version.strftime("%Y%m%dT%H%M%S.%f%z") if hasattr(version, "strftime") else str(version)
+    return os.path.join(root, _safe(database or "default"), _safe(stamp))
+
+
+def _private_dir(path):
+    """mkdir -p `path` and make sure only this user can list or enter it."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid") and os.stat(path).st_uid != os.getuid():
+        raise PermissionError(f"{path} is owned by another user")
+    os.chmod(path, 0o700)
+
+
+def snapshot_path(root, database, version, name, q, params=None):
+    """Where the frame for (data version, query name, SQL, params) lives."""
+    digest = hashlib.sha1(repr((q, params)).encode("utf-8")).hexdigest()[:12]
+    return os.path.join(_version_dir(root, database, version), f"{name}-{digest}{SUFFIX}")
+
+
+def read(path):
+    """
+    DataFrame from a snapshot, memory-mapped, or None if there isn't one
+    (or it can't be read).
+    """
+    import pyarrow as pa
+
+    try:
+        source = pa.memory_map(path)
+    except FileNotFoundError:
+        return None
+    try:
+        table = pa.ipc.open_file(source).read_all()
+    except (pa.ArrowInvalid, OSError) as e:
+        print(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+    # split_blocks keeps one block per column, so zero-copy columns stay mapped
+    return table.to_pandas(split_blocks=True)
+
+
+def write(path, df):
+    """Write df as an uncompressed Arrow IPC file (atomically) and drop older versions."""
+    import pyarrow as pa
+
+    version_dir = os.path.dirname(path)
+    database_dir = os.path.dirname(version_dir)
+    for d in (os.path.dirname(database_dir), database_dir, version_dir):
+        _private_dir(d)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        # Created 0600 here; OSFile then truncates it, keeping the mode
+        os.close(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600))
+        with pa.OSFile(tmp, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+    prune(database_dir, keep=os.path.basename(version_dir))
+
+
+def prune(database_dir, keep):
+    """
+    Delete the data-version directories under database_dir older than
+    `keep` (directory names sort by version), so a worker still on an older
+    version never removes a newer one's snapshots. Processes still mapping
+    a deleted file keep their pages until they unmap.
+    """
+    for entry in os.listdir(database_dir):
+        if entry < keep:
+            shutil.rmtree(os.path.join(database_dir, entry), ignore_errors=True)
+
+
+def latest(root, database, name):
+    """
+    Path of the newest snapshot written for query `name`, or None. For
+    experiments outside the app: read(latest(...)) gives the frame the last
+    model run trained on.
+    """
+    database_dir = os.path.join(root, _safe(database or "default"))
+    best = None
+    for dirpath, _, files in os.walk(database_dir):
+        for f in files:
+            if f.startswith(f"{name}-") and f.endswith(SUFFIX):
+                candidate = os.path.join(dirpath, f)
+                if best is None or os.path.getmtime(candidate) > os.path.getmtime(best):
+                    best = candidate
+    return best
@@ -0,0 +1,422 @@
+"""
+Synthetic transacts / screening data for load tests, benchmarks and demos.
+
+Produces files in the exact layouts /upload accepts:
+  - transacts CSV: lowercase DB column headers, dates as mm/dd/yyyy
+  - screening CSV: SCREEN_HEADERS display names (mapped by SCREEN_MAPPING)
+  - XLSX: 5 rows of report noise, then the header row (as /upload skips)
+
+Every tenant gets a latent risk score that drives both its payment history
+and its screening fields, so the models have real signal to learn. Lease
+starts span the 2023 / 2024 train/score split, and screening rows join back
+with `voyappcode` = `tscode`.
+
+Everything is vectorized NumPy and generated in independent chunks, so
+10M rows take seconds to build (writing CSV dominates the runtime).
+
+Usage:
+    python synthetic_data.py --rows 1000000 --out-dir synthetic
+    python synthetic_data.py --rows 50000 --format xlsx --out-dir synthetic
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from schema import SCREEN_HEADERS, TRANSACTS_COLUMNS
+
+DEFAULT_CHUNK_ROWS = 1_000_000
+XLSX_MAX_ROWS = 1_048_576 - 6  # Excel sheet limit minus noise + header rows
+
+TRANSACT_DATE_COLUMNS = ["dtleasefrom", "dtleaseto", "dtmovein", "dtmoveout", "dtroomearlyout"]
+SCREENING_DATE_COLUMNS = ["appcreddate", "date"]
+
+SCREEN_RESULTS = ["Accept", "Accept with Conditions", "Deny", "Pending"]
+SCREEN_VENDORS = ["RentGrow", "TransUnion", "SafeRent", "Experian"]
+PAYMENT_SOURCES = ["ACH", "Credit Card", "Check", "Money Order", "Portal", "Cash"]
+MOVEOUT_REASONS = ["Lease End", "Relocation", "Purchased Home", "Skip", "Transfer", "Eviction"]
+EMPLOYERS = ["Amazon", "H-E-B", "Dell", "State of Texas", "UT Austin", "Self-Employed", "Walmart", "Tesla"]
+POSITIONS = ["Associate", "Manager", "Engineer", "Nurse", "Driver", "Teacher", "Analyst", "Technician"]
+CITIES = ["Austin", "Round Rock", "Dallas", "Houston", "San Antonio", "Plano"]
+REASONS = ["Insufficient credit history", "Delinquent accounts", "High debt ratio", "Collections", "Prior eviction"]
+CHECKPOINT_MSGS = ["Address mismatch", "SSN issued recently", "Multiple inquiries", "OFAC review"]
+REVIEW_ITEMS = ["Verify income", "Verify employment", "Landlord reference", "Co-signer required"]
+SCORE_CATS = ["A", "B", "C", "D", "E"]
+APP_STATUSES = ["Approved", "Denied", "Cancelled", "Resident", "Former"]
+MARKET_SOURCES = ["Zillow", "Apartments.com", "Referral", "Drive-by", "Website"]
+
+# Text columns are built as pandas Categoricals (int codes + a small list of
+# labels): building millions of Python strings is what makes naive
+# generators slow, and to_csv renders categoricals as plain text anyway.
+
+
+def _cat(codes, labels, null_mask=None):
+    codes = np.asarray(codes, dtype=np.int32)
+    if null_mask is not None:
+        codes = np.where(null_mask, -1, codes)
+    return pd.Categorical.from_codes(codes, categories=labels)
+
+
+def _pick(rng, labels, n, p=None, null_rate=0.0):
+    codes = rng.choice(len(labels), size=n, p=p)
+    nulls = rng.random(n) < null_rate if null_rate else None
+    return _cat(codes, labels, nulls)
+
+
+def _flag(mask, yes="Y", no="N"):
+    return _cat(mask.astype(np.int32), [no, yes])
+
+
+@lru_cache(maxsize=None)
+def _int_labels(lo, hi):
+    return pd.Index([str(v) for v in range(lo, hi + 1)])
+
+
+def _int_text(values, lo, hi):
+    """Integers in [lo, hi] rendered as text columns (e.g. TEXT score fields)."""
+    values = np.clip(np.asarray(values, dtype=np.int64), lo, hi)
+    return _cat(values - lo, _int_labels(lo, hi))
+
+
+def _ids(prefix, idx, width=8):
+    """Zero-padded string ids ('t00000042') via a digit matrix, not str.format."""
+    digits = (idx[:, None] // 10 ** np.arange(width - 1, -1, -1)) % 10 + ord("0")
+    head = np.frombuffer(prefix.encode(), dtype=np.uint8)
+    raw = np.concatenate(
+        [np.broadcast_to(head, (len(idx), len(head))), digits.astype(np.uint8)], axis=1
+    )
+    raw = np.ascontiguousarray(raw)
+    text = raw.view(f"S{raw.shape[1]}").ravel().astype(f"U{raw.shape[1]}")
+    return pd.Series(text.astype(object), dtype=object)
+
+
+def _days(rng, start, end, n):
+    start_d = np.datetime64(start, "D")
+    span = (np.datetime64(end, "D") - start_d).astype(int)
+    return start_d + rng.integers(0, span + 1, size=n).astype("timedelta64[D]")
+
+
+def _nat_where(arr, mask):
+    out = arr.copy()
+    out[mask] = np.datetime64("NaT")
+    return out
+
+
+def generate_chunk(
+    offset,
+    n,
+    seed=42,
+    eviction_rate=0.08,
+    screening_coverage=0.85,
+    n_properties=60,
+    start="2021-01-01",
+    end="2025-06-30",
+):
+    """
+    Build rows [offset, offset + n) as (transacts_df, screening_df) with DB
+    column names and native dtypes. Each chunk has its own RNG stream, so
+    chunks are reproducible and can be generated independently.
+    """
+    rng = np.random.default_rng([seed, offset])
+    idx = np.arange(offset, offset + n)
+
+    # Latent tenant risk; eviction is a thresholded noisy view of it, which
+    # pins the label rate to `eviction_rate` in expectation.
+    risk = rng.standard_normal(n)
+    liability = 0.8 * risk + 0.6 * rng.standard_normal(n)
+    evicted = liability > NormalDist().inv_cdf(1 - eviction_rate)
+
+    # --- property / ids ---
+    props = 100 + np.arange(n_properties)
+    prop_weights = 1.0 / np.arange(1, n_properties + 1) ** 0.7  # a few large communities
+    prop_idx = rng.choice(n_properties, size=n, p=prop_weights / prop_weights.sum())
+    units = rng.integers(0, 900, size=n)
+    unit_labels = [f"{p}-{u}" for p in props for u in range(100, 1000)]
+    tscode = _ids("t", idx)
+
+    # --- lease timeline ---
+    movein = _days(rng, start, end, n)
+    leasefrom = movein.copy()
+    renewed = rng.random(n) < 0.2
+    leasefrom[renewed] += rng.integers(300, 400, size=renewed.sum()).astype("timedelta64[D]")
+    lease_days = rng.choice([180, 365, 365, 365, 455], size=n).astype("timedelta64[D]")
+    leaseto = leasefrom + lease_days
+    tenure = np.clip(rng.gamma(2.0, 250.0, size=n) * np.where(evicted, 0.45, 1.0), 30, None)
+    moveout = movein + tenure.astype(int).astype("timedelta64[D]")
+    moveout = _nat_where(moveout, moveout > np.datetime64(end, "D"))
+    earlyout = _nat_where(moveout, ~(evicted | (rng.random(n) < 0.05)))
+    moveout_reason = np.where(
+        evicted, len(MOVEOUT_REASONS) - 1, rng.integers(0, len(MOVEOUT_REASONS) - 1, size=n)
+    )
+
+    # --- money / payment behaviour ---
+    rent = np.round(rng.lognormal(np.log(1350), 0.25, size=n), 2)
+    income = np.round(rent * 12 * rng.lognormal(np.log(3.4), 0.3, size=n) * np.exp(-0.15 * risk), 2)
+    numlate = rng.poisson(np.exp(0.4 + 0.75 * risk + 0.6 * evicted))
+    numnsf = rng.poisson(np.exp(-1.4 + 0.8 * risk + 0.5 * evicted))
+    avgdayslate = np.where(numlate > 0, np.clip(rng.normal(4 + 3 * risk, 3), 1, 60), 0).astype(int)
+    daypaid = np.clip(np.round(rng.normal(3 + 2.5 * np.clip(risk, 0, None), 3)), 1, 28).astype(int)
+    paysource_change = rng.poisson(np.exp(-1.2 + 0.5 * risk))
+    collections = np.where(evicted | (rng.random(n) < 0.03), np.round(rng.lognormal(7.2, 0.8, size=n), 2), 0.0)
+    rent_wo = np.where(evicted, np.round(rent * rng.uniform(0.5, 3, size=n), 2), 0.0)
+    nonrent_wo = np.where(evicted | (rng.random(n) < 0.05), np.round(rng.lognormal(5.5, 0.7, size=n), 2), 0.0)
+
+    transacts = pd.DataFrame({
+        "pscode": _cat(prop_idx, [f"{p}.0" for p in props]),  # Excel-style codes
+        "tscode": tscode,
+        "uscode": _cat(prop_idx * 900 + units, unit_labels),
+        "screenresult": _pick(rng, SCREEN_RESULTS, n, p=[0.7, 0.2, 0.07, 0.03]),
+        "screenvendor": _pick(rng, SCREEN_VENDORS, n),
+        "dnumnsf": numnsf,
+        "dnumlate": numlate,
+        "davgdayslate": avgdayslate,
+        "sevicted": _cat(evicted.astype(np.int32), ["No", "Yes"], rng.random(n) < 0.02),
+        "smoveoutreason": _cat(moveout_reason, MOVEOUT_REASONS, np.isnat(moveout)),
+        "drentwrittenoff": rent_wo,
+        "dnonrentwrittenoff": nonrent_wo,
+        "damoutcollections": collections,
+        "srenewed": _flag(renewed, "Yes", "No"),
+        "srent": rent,
+        "sfulfilledterm": _flag(~(evicted | (rng.random(n) < 0.15)), "Yes", "No"),
+        "dincome": income,
+        "dtleasefrom": leasefrom,
+        "dtleaseto": leaseto,
+        "dtmovein": movein,
+        "dtmoveout": moveout,
+        "dwocount": (rent_wo > 0).astype(int) + (nonrent_wo > 0).astype(int),
+        "dtroomearlyout": earlyout,
+        "sempcompany": _pick(rng, EMPLOYERS, n, null_rate=0.1),
+        "sempposition": _pick(rng, POSITIONS, n, null_rate=0.1),
+        "sflex": _flag(rng.random(n) < 0.1),
+        "sleap": _flag(rng.random(n) < 0.05),
+        "sprevzip": _int_text(rng.integers(73301, 79999, size=n), 73301, 79999),
+        "daypaid": daypaid,
+        "spaymentsource": _pick(rng, PAYMENT_SOURCES, n, p=[0.4, 0.2, 0.1, 0.1, 0.15, 0.05]),
+        "dpaysourcechange": paysource_change,
+    })
+
+    # --- screening: same tenants (voyappcode = tscode) for a covered subset ---
+    has_screen = rng.random(n) < screening_coverage
+    m = int(has_screen.sum())
+    s_idx = idx[has_screen]
+    s_risk = risk[has_screen]
+    s_rent = rent[has_screen]
+    s_prop = prop_idx[has_screen]
+    monthly_income = np.round(income[has_screen] / 12, 2)
+    credit_date = movein[has_screen] - rng.integers(5, 60, size=m).astype("timedelta64[D]")
+    riskscore = np.clip(np.round(rng.normal(640 - 70 * s_risk, 45)), 300, 850)
+    totdebt = np.round(rng.lognormal(np.log(9000) + 0.35 * s_risk, 0.9), 2)
+    scorable = np.round(totdebt * rng.uniform(0.4, 1.0, size=m), 2)
+    stud = np.where(rng.random(m) < 0.3, rng.lognormal(9.5, 0.8, size=m), 0)
+    med = np.where(rng.random(m) < 0.15 + 0.1 * (s_risk > 1), rng.lognormal(7, 1.0, size=m), 0)
+    emp_months_total = np.clip(rng.gamma(2.0, 24.0, size=m) * np.exp(-0.2 * s_risk), 0, 480).astype(int)
+    res_months_total = np.clip(rng.gamma(2.0, 20.0, size=m) * np.exp(-0.2 * s_risk), 0, 480).astype(int)
+    prev_emp_total = rng.integers(0, 120, size=m)
+    prev_res_total = rng.integers(0, 120, size=m)
+    prim_income = np.round(monthly_income * rng.uniform(0.7, 1.0, size=m), 2)
+    score_text = _int_text(riskscore, 300, 850)
+    prop_names = _cat(s_prop, [f"Property {p}" for p in props])
+
+    screening = pd.DataFrame({
+        "appcredid": _ids("ac", s_idx),
+        "appcreddate": credit_date,
+        "appid": _ids("a", s_idx),
+        "category": _pick(rng, ["1", "2", "3", "4"], m),
+        "city": _pick(rng, CITIES, m),
+        "companycode": _cat(np.zeros(m), ["BILL"]),
+        "companyname": _cat(np.zeros(m), ["Billingsley"]),
+        "creditrun": _flag(rng.random(m) < 0.97, "True", "False"),
+        "date": credit_date,
+        "propertyid": _cat(s_prop, [str(p) for p in props]),
+        "policy": _pick(rng, ["Standard", "Conventional", "Student"], m),
+        "posemployment": _flag(emp_months_total >= 12),
+        "poshousing": _flag(res_months_total >= 12),
+        "propname": prop_names,
+        "reasonone": _pick(rng, REASONS, m, null_rate=0.5),
+        "reasontwo": _pick(rng, REASONS, m, null_rate=0.7),
+        "reasonthree": _pick(rng, REASONS, m, null_rate=0.85),
+        "rentownhist": _pick(rng, ["Rent", "Own", "None"], m, p=[0.75, 0.1, 0.15]),
+        "origscore": score_text,
+        "finscore": score_text,
+        "scorecat": _cat(np.clip((850 - riskscore) // 110, 0, 4), SCORE_CATS),
+        "scoremodel": rng.integers(1, 4, size=m),
+        "marketsource": _pick(rng, MARKET_SOURCES, m),
+        "state": _cat(np.zeros(m), ["TX"]),
+        "zip": _int_text(rng.integers(73301, 79999, size=m), 73301, 79999),
+        "age": np.clip(np.round(rng.normal(34, 10, size=m)), 18, 90),
+        "currempmon": emp_months_total % 12,
+        "currempyear": emp_months_total // 12,
+        "currresmon": res_months_total % 12,
+        "currresyear": res_months_total // 12,
+        "income": monthly_income,
+        "primincome": prim_income,
+        "addincome": np.round(monthly_income - prim_income, 2),
+        "riskscore": riskscore,
+        "prevempmon": prev_emp_total % 12,
+        "prevempyear": prev_emp_total // 12,
+        "prevresmon": prev_res_total % 12,
+        "prevresyear": prev_res_total // 12,
+        "rent": s_rent,
+        "rentincratio": np.round(100 * s_rent / np.maximum(monthly_income, 1), 2),
+        "debtincratio": np.round(100 * (totdebt / 36) / np.maximum(monthly_income, 1), 2),
+        "debtcredratio": np.round(np.clip(rng.normal(35 + 15 * s_risk, 15), 0, 100), 2),
+        "voyappcode": tscode[has_screen].reset_index(drop=True),
+        "voypropname": prop_names,
+        "voypropcode": _cat(s_prop, [f"{p}.0" for p in props]),
+        "hascpmess": _flag(rng.random(m) < 0.2),
+        "checkmes1": _pick(rng, CHECKPOINT_MSGS, m, null_rate=0.8),
+        "checkmes2": _pick(rng, CHECKPOINT_MSGS, m, null_rate=0.9),
+        "hasconsstmt": _flag(rng.random(m) < 0.05),
+        # TEXT columns upstream; rounded to $50 to keep the label sets small
+        "studdebt": _int_text(np.round(stud / 50) * 50, 0, 200_000),
+        "meddebt": _int_text(np.round(med / 50) * 50, 0, 200_000),
+        "totscordebt": scorable,
+        "totdebt": totdebt,
+        "itemrev1": _pick(rng, REVIEW_ITEMS, m, null_rate=0.6),
+        "itemrev2": _pick(rng, REVIEW_ITEMS, m, null_rate=0.8),
+        "itemrev3": _pick(rng, REVIEW_ITEMS, m, null_rate=0.9),
+        "revrepack": _flag(rng.random(m) < 0.9),
+        "appid2": _ids("app", s_idx),
+        "appscore": score_text,
+        "appmoninc": _int_text(np.round(monthly_income), 0, 50_000),
+        "apptotdebt": np.round(totdebt * rng.uniform(0.8, 1.0, size=m), 2),
+        "avgriskscore": np.round(riskscore + rng.normal(0, 15, size=m)),
+        "twnreport": _flag(rng.random(m) < 0.6),
+        "appstatus": _pick(rng, APP_STATUSES, m, p=[0.2, 0.05, 0.05, 0.4, 0.3]),
+    })
+
+    return transacts[TRANSACTS_COLUMNS], screening[list(SCREEN_HEADERS.values())]
+
+
+def _generate_at(offset, rows, chunk_rows, kwargs):
+    return generate_chunk(offset, min(chunk_rows, rows - offset), **kwargs)
+
+
+def iter_chunks(rows, chunk_rows=DEFAULT_CHUNK_ROWS, workers=1, **kwargs):
+    """
+    Yield (transacts_df, screening_df) chunks covering `rows` tenants, in
+    order. With workers > 1 chunks are generated in a process pool.
+    """
+    offsets = range(0, rows, chunk_rows)
+    if workers <= 1:
+        for offset in offsets:
+            yield _generate_at(offset, rows, chunk_rows, kwargs)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(
+            _generate_at,
+            offsets,
+            repeat(rows),
+            repeat(chunk_rows),
+            repeat(kwargs),
+        )
+
+
+def to_upload_frame(df, kind):
+    """
+    Format a generated frame exactly like the upload exports: mm/dd/yyyy
+    dates and, for screening, SCREEN_HEADERS display names as headers.
+    """
+    out = df.copy()
+    date_cols = TRANSACT_DATE_COLUMNS if kind == "transacts" else SCREENING_DATE_COLUMNS
+    for c in date_cols:
+        out[c] = pd.to_datetime(out[c]).dt.strftime("%m/%d/%Y")
+    if kind == "screening":
+        display = {v: k for k, v in SCREEN_HEADERS.items()}
+        out.columns = [display[c] for c in out.columns]
+    return out
+
+
+def write_csv(chunks, out_dir):
+    """Stream generated chunks into transacts.csv / screening.csv."""
+    paths = {
+        "transacts": os.path.join(out_dir, "transacts.csv"),
+        "screening": os.path.join(out_dir, "screening.csv"),
+    }
+    for i, (tx, sc) in enumerate(chunks):
+        for kind, df in (("transacts", tx), ("screening", sc)):
+            to_upload_frame(df, kind).to_csv(
+                paths[kind], mode="w" if i == 0 else "a", header=(i == 0), index=False
+            )
+    return paths
+
+
+def write_xlsx(chunks, out_dir):
+    """Write transacts.xlsx / screening.xlsx with the 5-row noise preamble."""
+    from openpyxl import Workbook
+
+    paths = {
+        "transacts": os.path.join(out_dir, "transacts.xlsx"),
+        "screening": os.path.join(out_dir, "screening.xlsx"),
+    }
+    books = {kind: Workbook(write_only=True) for kind in paths}
+    sheets = {kind: wb.create_sheet() for kind, wb in books.items()}
+    for kind, ws in sheets.items():
+        ws.append([f"Synthetic {kind} export"])
+        for _ in range(4):
+            ws.append([])
+
+    for i, (tx, sc) in enumerate(chunks):
+        for kind, df in (("transacts", tx), ("screening", sc)):
+            frame = to_upload_frame(df, kind)
+            if i == 0:
+                sheets[kind].append(list(frame.columns))
+            for row in frame.itertuples(index=False):
+                sheets[kind].append([None if pd.isna(v) else v for v in row])
+
+    for kind, wb in books.items():
+        wb.save(paths[kind])
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="number of tenants (transacts rows)")
+    parser.add_argument("--out-dir", default="synthetic")
+    parser.add_argument("--format", choices=["csv", "xlsx"], default="csv")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--eviction-rate", type=float, default=0.08)
+    parser.add_argument("--screening-coverage", type=float, default=0.85,
+                        help="fraction of tenants with a screening row")
+    parser.add_argument("--properties", type=int, default=60)
+    parser.add_argument("--start", default="2021-01-01", help="earliest move-in date")
+    parser.add_argument("--end", default="2025-06-30", help="latest move-in date")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="processes generating chunks in parallel")
+    args = parser.parse_args()
+
+    if args.format == "xlsx" and args.rows > XLSX_MAX_ROWS:
+        parser.error(f"xlsx holds at most {XLSX_MAX_ROWS} data rows; use --format csv")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    chunks = iter_chunks(
+        args.rows,
+        chunk_rows=args.chunk_rows,
+        workers=args.workers,
+        seed=args.seed,
+        eviction_rate=args.eviction_rate,
+        screening_coverage=args.screening_coverage,
+        n_properties=args.properties,
+        start=args.start,
+        end=args.end,
+    )
+
+    t0 = time.perf_counter()
+    writer = write_csv if args.format == "csv" else write_xlsx
+    paths = writer(chunks, args.out_dir)
+    print(f"Wrote {args.rows:,} tenants in {time.perf_counter() - t0:.1f}s")
+    for kind, path in paths.items():
+        print(f"  {kind}: {path}")
+
+
+if __name__ == "__main__":
+    main()
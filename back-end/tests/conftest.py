@@ -0,0 +1,76 @@
+import os
+import sys
+
+# The back-end modules are imported by name (python Backend.py), not as a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def pg_database():
+    """
+    A scratch database with every migration applied, on the server the
+    DB_* settings point at (the name of DB_NAME is only used to connect).
+    Tests that need it are skipped when no server is reachable.
+    """
+    psycopg2 = pytest.importorskip("psycopg2")
+    params = dict(
+        dbname=os.getenv("DB_NAME") or "postgres",
+        user=os.getenv("DB_USER"),
+        password=os.getenv("DB_PASSWORD"),
+        host=os.getenv("DB_HOST"),
+        port=os.getenv("DB_PORT"),
+    )
+    try:
+        admin = psycopg2.connect(**params)
+    except psycopg2.OperationalError as exc:
+        pytest.skip(f"Postgres not reachable: {exc}")
+    admin.autocommit = True
+    name = f"eviction_risk_test_{os.getpid()}"
+    with admin.cursor() as cur:
+        cur.execute(f"DROP DATABASE IF EXISTS {name}")
+        cur.execute(f"CREATE DATABASE {name}")
+
+    import schema
+
+    params["dbname"] = name
+    conn = psycopg2.connect(**params)
+    try:
+        schema.migrate(conn, log=lambda *_: None)
+        yield params
+    finally:
+        conn.close()
+        with admin.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+        admin.close()
+
+
+@pytest.fixture
+def pg_cursor(pg_database):
+    """A cursor on the scratch database; everything it does is rolled back."""
+    import psycopg2
+
+    conn = psycopg2.connect(**pg_database)
+    try:
+        with conn.cursor() as cur:
+            yield cur
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+@pytest.fixture(scope="session")
+def backend(pg_database):
+    """Backend, with its connections pointed at the scratch database."""
+    with pytest.MonkeyPatch.context() as mp:
+        # Backend reads DB_NAME at import; repoint it if it's already loaded
+        mp.setenv("DB_NAME", pg_database["dbname"])
+        import Backend
+
+        mp.setitem(Backend.DB_PARAMS, "dbname", pg_database["dbname"])
+        if Backend._conn is not None:
+            Backend._conn.close()
+        yield Backend
+        if Backend._conn is not None:
+            Backend._conn.close()
@@ -0,0 +1,80 @@
+"""
+The KPI filter matrix shared by tests/test_kpi_parity.py (DuckDB mirror vs
+Postgres, rows must match) and benchmarks/kpi_parity.py (which times it).
+"""
+
+import math
+
+EXACT_COLUMNS = ("total_rows", "nsf_count", "month_key")
+
+
+def filter_cases(backend):
+    """(label, params) pairs covering every filter _build_filter_sql knows."""
+    with backend.get_conn().cursor(cursor_factory=backend.RealDictCursor) as cur:
+        cur.execute(backend.FILTER_OPTIONS_SQL)
+        options = backend._filter_options_payload(cur.fetchall())
+        month = backend._bucketsql()
+        cur.execute(f"SELECT MIN({month}) AS first, MAX({month}) AS last FROM transacts")
+        span = cur.fetchone()
+        first, last = span["first"], span["last"]
+
+    cases = [("all", {})]
+    if first and last:
+        mid = first + (last - first) / 2
+        cases += [
+            ("start", {"start": mid.strftime("%Y-%m")}),
+            ("end", {"end": mid.strftime("%Y-%m")}),
+            ("window", {"start": first.strftime("%Y-%m"), "end": mid.strftime("%Y-%m")}),
+            ("one month", {"start": last.strftime("%Y-%m"), "end": last.strftime("%Y-%m")}),
+        ]
+    # No rows in the window: exercises the all-dates fallback
+    cases.append(("empty window", {"start": "1990-01", "end": "1990-12"}))
+
+    pscodes = options["pscodes"]
+    if pscodes:
+        cases.append(("pscode", {"pscode": [pscodes[0]]}))
+        # Uploaded codes can carry a trailing ".0"; the filter matches them cleaned
+        cases.append(("pscodes", {"pscode": pscodes[: max(2, len(pscodes) // 3)]}))
+    cases.append(("unknown pscode", {"pscode": ["no-such-property"]}))
+    for screen in options["screenresults"][:3]:
+        cases.append((f"screen {screen}", {"screenresult": screen}))
+    cases += [
+        ("collections with", {"collections": "with"}),
+        ("collections without", {"collections": "without"}),
+        ("evicted Yes", {"evicted": "Yes"}),
+        ("evicted No", {"evicted": "No"}),
+    ]
+    if pscodes and options["screenresults"] and first and last:
+        cases.append((
+            "combined",
+            {
+                "pscode": pscodes[: max(1, len(pscodes) // 2)],
+                "screenresult": options["screenresults"][0],
+                "collections": "without",
+                "evicted": "No",
+                "start": first.strftime("%Y-%m"),
+                "end": last.strftime("%Y-%m"),
+            },
+        ))
+    return cases
+
+
+def _same(a, b, column, rel_tol):
+    if a is None or b is None:
+        return a is None and b is None
+    if column in EXACT_COLUMNS:
+        return a == b
+    return math.isclose(float(a), float(b), rel_tol=rel_tol, abs_tol=1e-9)
+
+
+def diff_rows(expected, actual, rel_tol):
+    """First difference between two row lists, or None."""
+    if len(expected) != len(actual):
+        return f"{len(expected)} rows vs {len(actual)}"
+    for i, (e, a) in enumerate(zip(expected, actual)):
+        if set(e) != set(a):
+            return f"row {i}: columns {sorted(e)} vs {sorted(a)}"
+        for column in e:
+            if not _same(e[column], a[column], column, rel_tol):
+                return f"row {i} {column}: {e[column]!r} vs {a[column]!r}"
+    return None
@@ -0,0 +1,62 @@
+import csv
+import io
+import random
+
+import pytest
+
+import ingest
+
+FIELDS = ["voyappcode", "note", "city"]
+SPEC = ingest.RowSpec("screening", FIELDS, {}, FIELDS, "voyappcode", ("voyappcode",))
+
+
+def _cell(rng):
+    kind = rng.randrange(6)
+    if kind == 0:
+        return ""
+    if kind == 1:
+        return rng.choice(["plain", "Dallas", "café", "x" * rng.randrange(1, 40)])
+    if kind == 2:
+        return '"a, b"'
+    if kind == 3:
+        return '"say ""hi"""'
+    if kind == 4:
+        return '"line one\nline two"'
+    return '"crlf one\r\ncrlf two\r\n"'
+
+
+def _write_csv(path, rng, rows, newline):
+    lines = [",".join(FIELDS)]
+    for i in range(rows):
+        lines.append(",".join([f"K{i}", _cell(rng), _cell(rng)]))
+    path.write_bytes((newline.join(lines) + rng.choice(["", newline])).encode("utf-8"))
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_chunked_parse_matches_sequential(tmp_path, monkeypatch, seed):
+    rng = random.Random(seed)
+    path = tmp_path / "upload.csv"
+    _write_csv(path, rng, rng.randrange(0, 60), rng.choice(["\n", "\r\n"]))
+    fieldnames, offset = ingest.read_csv_header(path)
+    assert fieldnames == FIELDS
+    size = path.stat().st_size
+    sequential = ingest._parse_chunk(path, offset, size, SPEC)
+    whole = path.read_bytes()[offset:].decode("utf-8")
+    records = list(csv.reader(io.StringIO(whole)))
+
+    for block in (1, 2, 7, 64):
+        monkeypatch.setattr(ingest, "_SCAN_BLOCK_BYTES", block)
+        for chunk in (1, 5, 33, 200):
+            ranges = ingest.csv_chunks(path, offset, chunk)
+            # contiguous, in order, and covering the whole body
+            bounds = [offset] + [e for _, e in ranges]
+            assert [s for s, _ in ranges] == bounds[:-1]
+            assert bounds[-1] == size
+
+            chunked = [r for s, e in ranges
+                       for r in csv.reader(io.StringIO(path.read_bytes()[s:e].decode("utf-8")))]
+            assert chunked == records
+
+            packed = [ingest._parse_chunk(path, s, e, SPEC) for s, e in ranges]
+            assert "".join(p["copy"] for p in packed) == sequential["copy"]
+            assert sum(p["parsed"] for p in packed) == sequential["parsed"]
@@ -0,0 +1,43 @@
+"""
+KPI_ENGINE=duckdb must answer every filter case exactly like Postgres:
+the kpi_cases matrix on a small synthetic dataset, through Backend._kpi_rows
+with each engine. Skipped without Postgres or duckdb.
+"""
+
+import os
+import sys
+
+import pytest
+
+from kpi_cases import diff_rows, filter_cases
+
+SEED_ROWS = 5000
+
+
+@pytest.fixture(scope="module")
+def seeded(backend, pg_database):
+    pytest.importorskip("duckdb")
+    pytest.importorskip("pandas")
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+    import common
+
+    common.seed(pg_database["dbname"], SEED_ROWS, seed=7)
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(backend, "KPI_DUCKDB_PATH", ":memory:")
+        yield backend
+
+
+def test_duckdb_mirror_matches_postgres(seeded):
+    backend = seeded
+    cases = filter_cases(backend)
+    assert len(cases) > 10
+    mismatches = []
+    for label, params in cases:
+        for kind in ("snapshot", "timeseries"):
+            for allow_dates in (True, False):
+                expected = backend._kpi_rows(kind, params, allow_dates, engine="postgres")
+                actual = backend._kpi_rows(kind, params, allow_dates, engine="duckdb")
+                problem = diff_rows(expected, actual, rel_tol=1e-9)
+                if problem:
+                    mismatches.append(f"{label} / {kind} (dates={allow_dates}): {problem}")
+    assert not mismatches
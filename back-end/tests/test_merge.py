@@ -0,0 +1,132 @@
+from datetime import date
+
+import pytest
+
+import ingest
+import schema
+
+KEY, MOVED_KEY = ("tscode", "bucket_month"), ("tscode",)
+COLUMNS = ["tscode", "pscode", "screenresult", "screenvendor", "spaymentsource", "dtmovein", "bucket_month"]
+
+
+def _merge(cur, rows, columns=COLUMNS):
+    """Merge row dicts into transacts the way an upload batch does."""
+    for row in rows:
+        row["bucket_month"] = schema.bucket_month(row)
+    packed = ingest.pack_rows(columns, [[r.get(c) for c in columns] for r in rows], MOVED_KEY)
+    return ingest.merge_packed(cur, "transacts", columns, packed, KEY, moved_key=MOVED_KEY)
+
+
+def _dimensions(cur):
+    out = {}
+    for table, (value_col, _, _) in schema.TRANSACTS_DIMENSIONS.items():
+        cur.execute(f"SELECT {value_col}, row_count FROM {table} ORDER BY 1")
+        out[table] = cur.fetchall()
+    return out
+
+
+def _assert_dimensions_match_rebuild(cur):
+    merged = _dimensions(cur)
+    schema.rebuild_dimensions(cur)
+    assert merged == _dimensions(cur)
+
+
+def _rows(cur):
+    cur.execute("SELECT tscode, bucket_month, screenresult, screenvendor FROM transacts ORDER BY tscode")
+    return cur.fetchall()
+
+
+def _row(tscode, moved_in, pscode="101.0", result="Approved", vendor="Acme", source="Check"):
+    return {"tscode": tscode, "pscode": pscode, "screenresult": result,
+            "screenvendor": vendor, "spaymentsource": source, "dtmovein": moved_in}
+
+
+@pytest.fixture
+def cur(pg_cursor):
+    pg_cursor.execute("TRUNCATE transacts")
+    schema.rebuild_dimensions(pg_cursor)
+    schema.ensure_transacts_partitions(pg_cursor, {2023, 2024})
+    stats = _merge(pg_cursor, [
+        _row("T1", date(2023, 5, 9)),
+        _row("T2", date(2024, 1, 3), pscode="102", result="Denied"),
+        _row("T3", None, vendor=None),
+    ])
+    assert stats == {"staged": 3, "inserted": 3, "updated": 0, "unchanged": 0}
+    _assert_dimensions_match_rebuild(pg_cursor)
+    return pg_cursor
+
+
+def test_merge_counts_unchanged_moved_and_new_rows(cur):
+    stats = _merge(cur, [
+        _row("T1", date(2023, 5, 9)),                                # unchanged
+        _row("T2", date(2023, 2, 1), pscode="102", result="Approved"),  # moves 2024-01 -> 2023-02
+        _row("T3", None, vendor="Other"),                            # updated in place
+        _row("T4", date(2024, 6, 30), pscode="103"),                 # new
+    ])
+    assert stats == {"staged": 4, "inserted": 1, "updated": 2, "unchanged": 1}
+    assert _rows(cur) == [
+        ("T1", date(2023, 5, 1), "Approved", "Acme"),
+        ("T2", date(2023, 2, 1), "Approved", "Acme"),
+        ("T3", schema.BUCKET_MONTH_SENTINEL, "Approved", "Other"),
+        ("T4", date(2024, 6, 1), "Approved", "Acme"),
+    ]
+    cur.execute("SELECT count(*) FROM transacts_y2024 WHERE tscode = 'T2'")
+    assert cur.fetchone()[0] == 0
+    _assert_dimensions_match_rebuild(cur)
+
+
+def test_redundant_upload_changes_nothing(cur):
+    before = _dimensions(cur)
+    stats = _merge(cur, [
+        _row("T1", date(2023, 5, 9)),
+        _row("T2", date(2024, 1, 3), pscode="102", result="Denied"),
+        _row("T3", None, vendor=None),
+    ])
+    assert stats == {"staged": 3, "inserted": 0, "updated": 0, "unchanged": 3}
+    assert _dimensions(cur) == before
+
+
+def test_missing_column_kept_in_place_and_null_when_moved(cur):
+    columns = [c for c in COLUMNS if c != "screenvendor"]
+    stats = _merge(cur, [
+        _row("T1", date(2023, 5, 20), result="Denied"),  # same month: updated in place
+        _row("T2", date(2023, 8, 1), pscode="102"),      # moves to 2023-08
+        _row("T5", None),                                # new
+    ], columns)
+    assert stats == {"staged": 3, "inserted": 1, "updated": 2, "unchanged": 0}
+    assert _rows(cur) == [
+        ("T1", date(2023, 5, 1), "Denied", "Acme"),
+        ("T2", date(2023, 8, 1), "Approved", None),
+        ("T3", schema.BUCKET_MONTH_SENTINEL, "Approved", None),
+        ("T5", schema.BUCKET_MONTH_SENTINEL, "Approved", None),
+    ]
+    _assert_dimensions_match_rebuild(cur)
+
+
+def test_merge_staged_last_row_wins(cur):
+    stage = "upload_stage_test"
+    ingest.create_upload_stage(cur, "transacts", stage)
+    for rows in ([_row("T1", date(2023, 5, 9), result="Denied")],
+                 [_row("T1", date(2024, 2, 2), result="Pending"), _row("T6", date(2024, 2, 2))]):
+        for row in rows:
+            row["bucket_month"] = schema.bucket_month(row)
+        packed = ingest.pack_rows(COLUMNS, [[r.get(c) for c in COLUMNS] for r in rows], MOVED_KEY)
+        ingest.copy_packed(cur, stage, COLUMNS, packed)
+    stats = ingest.merge_staged(cur, "transacts", stage, COLUMNS, KEY, moved_key=MOVED_KEY)
+    assert stats == {"staged": 2, "inserted": 1, "updated": 1, "unchanged": 0}
+    cur.execute("SELECT bucket_month, screenresult FROM transacts WHERE tscode = 'T1'")
+    assert cur.fetchall() == [(date(2024, 2, 1), "Pending")]
+    _assert_dimensions_match_rebuild(cur)
+
+
+def test_drop_stale_upload_stages(pg_cursor):
+    fresh = ingest.upload_stage_name("ab12", 0)
+    stale = "upload_stage_1000000000_ab12_0"
+    legacy = "upload_stage_ab12_1"
+    for name in (fresh, stale, legacy):
+        ingest.create_upload_stage(pg_cursor, "screening", name)
+    pg_cursor.execute("CREATE TABLE upload_stagex (id int)")
+
+    assert sorted(ingest.drop_stale_upload_stages(pg_cursor, 3600)) == sorted([stale, legacy])
+    pg_cursor.execute("SELECT relname FROM pg_class WHERE relkind = 'r' AND relname LIKE 'upload\\_stage%%' ORDER BY 1")
+    assert [r[0] for r in pg_cursor.fetchall()] == [fresh, "upload_stagex"]
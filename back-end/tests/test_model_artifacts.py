@@ -0,0 +1,64 @@
+import datetime
+import pickle
+
+import pytest
+
+VERSION = datetime.datetime(2026, 1, 2, 3, 4, 5)
+
+
+class _Touch:
+    """Unpickling this creates `path`: stands in for a malicious artifact."""
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def __reduce__(self):
+        return (open, (self.path, "w"))
+
+
+@pytest.fixture
+def artifacts(backend, monkeypatch):
+    monkeypatch.setattr(backend, "MODEL_ARTIFACT_KEY", b"test-key")
+    with backend.get_conn().cursor() as cur:
+        cur.execute("DELETE FROM model_artifacts")
+    yield backend
+    with backend.get_conn().cursor() as cur:
+        cur.execute("DELETE FROM model_artifacts")
+
+
+def _set(backend, column, value):
+    with backend.get_conn().cursor() as cur:
+        cur.execute(f"UPDATE model_artifacts SET {column} = %s WHERE model = 'demo'", (value,))
+
+
+def test_signed_artifact_round_trips(artifacts):
+    artifacts._save_model_artifact({"payload": {"auc": 0.9}, "last_meta_ts": VERSION}, "demo", VERSION, 1.0, "test")
+    cache = {}
+    assert artifacts._load_model_artifact(cache, "demo", VERSION)
+    assert cache == {"payload": {"auc": 0.9}, "last_meta_ts": VERSION}
+    assert set(artifacts._stored_artifacts(VERSION)) == {"demo"}
+
+
+def test_forged_artifact_is_never_unpickled(artifacts, tmp_path):
+    artifacts._save_model_artifact({"payload": {"auc": 0.9}}, "demo", VERSION, 1.0, "test")
+    marker = tmp_path / "pwned"
+    _set(artifacts, "artifact", pickle.dumps({"payload": _Touch(marker)}))
+    assert not artifacts._load_model_artifact({}, "demo", VERSION)
+    assert artifacts._stored_artifacts(VERSION) == {}
+
+    # Nor without a signature, or one made with another key / for another model
+    forged = pickle.dumps({"payload": _Touch(marker)})
+    _set(artifacts, "artifact", forged)
+    for signature in (None, b"\0" * 32, artifacts._artifact_signature("other", VERSION, forged)):
+        _set(artifacts, "signature", signature)
+        assert not artifacts._load_model_artifact({}, "demo", VERSION)
+    assert not marker.exists()
+
+
+def test_no_key_no_sharing(artifacts, monkeypatch):
+    monkeypatch.setattr(artifacts, "MODEL_ARTIFACT_KEY", b"")
+    artifacts._save_model_artifact({"payload": {"auc": 0.9}}, "demo", VERSION, 1.0, "test")
+    with artifacts.get_conn().cursor() as cur:
+        cur.execute("SELECT count(*) FROM model_artifacts")
+        assert cur.fetchone()[0] == 0
+    assert not artifacts._load_model_artifact({}, "demo", VERSION)
@@ -0,0 +1,82 @@
+from decimal import Decimal
+
+import pytest
+
+import ingest
+import schema
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (None, (None, True)),
+    ("", (None, True)),
+    ("  ", (None, True)),
+    ("$", (None, True)),
+    ("12.5%", (Decimal("12.5"), True)),
+    ("$1,234.50", (Decimal("1234.50"), True)),
+    ("-3", (Decimal("-3"), True)),
+    ("1e3", (Decimal("1E+3"), True)),
+    ("1e131072", (None, False)),
+    ("1e-16384", (None, False)),
+    ("N/A", (None, False)),
+    ("1.2.3", (None, False)),
+    (float("nan"), (None, True)),
+    (7, (7, True)),
+])
+def test_parse_numeric(raw, expected):
+    assert schema.parse_numeric(raw) == expected
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("", (None, True)),
+    ("700", (700, True)),
+    ("1,200", (1200, True)),
+    ("2.0", (2, True)),
+    ("1e3", (1000, True)),
+    ("1.5", (None, False)),
+    ("1e-1", (None, False)),
+    ("9999999999", (None, False)),
+    ("1e99999999", (None, False)),
+    (1.5, (None, False)),
+    (float("inf"), (None, False)),
+    (float("nan"), (None, True)),
+])
+def test_parse_numeric_integer(raw, expected):
+    assert schema.parse_numeric(raw, integer=True) == expected
+
+
+def test_integer_columns_come_from_the_ddl():
+    assert "scoremodel" in schema.SCREENING_INTEGER_COLUMNS
+    assert schema.SCREENING_INTEGER_COLUMNS < set(schema.SCREENING_NUMERIC_COLUMNS)
+
+
+def test_parse_screening_numerics():
+    numeric = next(c for c in schema.SCREENING_NUMERIC_COLUMNS if c not in schema.SCREENING_INTEGER_COLUMNS)
+    row = {"voyappcode": "A1", "scoremodel": "1.5", numeric: "$1,000", "other": "1.5"}
+    rejects = []
+    ingest.parse_screening_numerics(row, rejects)
+    assert row == {"voyappcode": "A1", "scoremodel": None, numeric: Decimal("1000"), "other": "1.5"}
+    assert rejects == [("A1", "scoremodel", "1.5")]
+
+    row = {"voyappcode": "A2", "scoremodel": "1e2", numeric: "n/a"}
+    rejects = []
+    ingest.parse_screening_numerics(row, rejects)
+    assert row["scoremodel"] == 100 and row[numeric] is None
+    assert rejects == [("A2", numeric, "n/a")]
+
+
+def test_arrow_numeric_matches_row_path():
+    pa = pytest.importorskip("pyarrow")
+    numeric = next(c for c in schema.SCREENING_NUMERIC_COLUMNS if c not in schema.SCREENING_INTEGER_COLUMNS)
+    raws = ["7", "1.5", "1e3", "", None, "$1,2", "x", "1e131072"]
+    keys = pa.array([f"K{i}" for i in range(len(raws))])
+
+    for name in ("scoremodel", numeric):
+        integer = name in schema.SCREENING_INTEGER_COLUMNS
+        arrow_rejects, row_rejects = [], []
+        got = ingest._arrow_numeric(pa.array(raws), name, keys, arrow_rejects).to_pylist()
+        for key, raw in zip(keys.to_pylist(), raws):
+            ingest.parse_screening_numerics({"voyappcode": key, name: raw}, row_rejects)
+        assert arrow_rejects == row_rejects
+        expected = [schema.parse_numeric(raw, integer=integer)[0] for raw in raws]
+        # The text path hands COPY the cleaned string; compare as numbers.
+        assert [None if v is None else Decimal(v) for v in got] == expected
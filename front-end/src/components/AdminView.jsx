@@ -18,6 +18,7 @@ export default function AdminView({ user, onLogout }) {
                     <div className="flex-grow flex justify-center items-stretch overflow-hidden p-4">
                         {activeView === "tenant-transaction" && (<TenantTransaction />)}
                         {activeView === "screening-data" && (<ScreeningData />)}
+                        {activeView === "batch-import" && (<BatchImport />)}
                     </div>
 
                     <div className="w-full">
@@ -96,4 +97,43 @@ function ScreeningData() {
    
         </div>
     )
-}
\ No newline at end of file
+}
+
+function BatchImport() {
+
+    // Several exports (or a .zip of them) in one request: the backend merges
+    // them as a single data version, so the models retrain once per batch.
+    const handleFileUpload = async (files) => {
+        try {
+            console.log(`Uploading ${files.length} file(s)!`);
+            const formData = new FormData();
+            files.forEach((file) => formData.append("files", file));
+
+            const response = await fetch("http://127.0.0.1:5000/upload/batch", {
+            method: "POST",
+            body: formData,
+            });
+
+            if (!response.ok) {
+            const errText = await response.text();
+            throw new Error(errText);
+            }
+
+            const data = await response.json();
+            console.log(data);
+        } catch (err) {
+            console.error("Upload failed:", err);
+        }
+    }
+
+    return (
+        <div className="w-full h-full flex justify-center items-center relative">
+            <p className="absolute top-0 pt-24 text-7xl font-extralight">Batch Import</p>
+            <p className="absolute top-0 pt-48 text-xl font-extralight text-zinc-500">
+                Files are matched by name: transact… for transactions, screening… for screening data
+            </p>
+            <FileUpload onUpload={handleFileUpload} multiple />
+
+        </div>
+    )
+}
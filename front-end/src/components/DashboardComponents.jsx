@@ -95,6 +95,16 @@ export function AdminNavigation({ activeView, setActiveView }) {
                 >
                     <p className="text-xl text-center text-black">Screening Data</p>
                 </button>
+
+                <button
+                    onClick={() => setActiveView("batch-import")}
+                    className={`px-4 py-2 w-[180px] flex flex-col items-center ${activeView === "batch-import"
+                        ? "border-b-4 border-[#0A1A33] font-extralight"
+                        : "opacity-70"
+                        }`}
+                >
+                    <p className="text-xl text-center text-black">Batch Import</p>
+                </button>
             </div>
         </div>
     )
@@ -1771,6 +1771,18 @@ function PropertyDetail({
   );
 }
 
+// Model endpoints answer 202 + Retry-After while a retrain is queued or
+// running; wait and ask again until the scores are ready.
+async function fetchModelPayload(url, attempts = 20) {
+  for (let i = 0; i < attempts; i++) {
+    const res = await fetch(url);
+    if (res.status !== 202) return res;
+    const waitSeconds = Number(res.headers.get("Retry-After")) || 15;
+    await new Promise((resolve) => setTimeout(resolve, waitSeconds * 1000));
+  }
+  throw new Error(`Model at ${url} is still retraining`);
+}
+
 export function PropertyView({ selectedTenants, setSelectedTenants }) {
   const [selectedProperty, setSelectedProperty] = useState(null);
 
@@ -1784,7 +1796,7 @@ export function PropertyView({ selectedTenants, setSelectedTenants }) {
   // Screening model tenants (existing /tenants/active)
   // Screening model tenants (NEW /tenants/screening-eviction-risk)
   useEffect(() => {
-    fetch("http://127.0.0.1:5000/tenants/screening-eviction-risk")
+    fetchModelPayload("http://127.0.0.1:5000/tenants/screening-eviction-risk")
       .then((res) => {
         if (!res.ok) throw new Error("Failed to fetch screening tenant data");
         return res.json();
@@ -1804,7 +1816,7 @@ export function PropertyView({ selectedTenants, setSelectedTenants }) {
 
   // Transaction model tenants (new /tenants/eviction-risk)
   useEffect(() => {
-    fetch("http://127.0.0.1:5000/tenants/eviction-risk")
+    fetchModelPayload("http://127.0.0.1:5000/tenants/eviction-risk")
       .then((res) => {
         if (!res.ok) throw new Error("Failed to fetch transaction model data");
         return res.json();
@@ -1856,7 +1868,7 @@ function AtRiskView({ selectedTenants }) {
 
     (async () => {
       try {
-        const res = await fetch(
+        const res = await fetchModelPayload(
           "http://127.0.0.1:5000/models/global-drivers"
         );
         const json = res.ok ? await res.json() : {};
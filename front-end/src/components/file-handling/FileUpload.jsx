@@ -1,17 +1,18 @@
 import { useState } from "react"
 
-export default function FileUpload({ onUpload }) {
+export default function FileUpload({ onUpload, multiple = false }) {
 
-    const [file, setFile] = useState(null);
+    // Selected files; at most one unless `multiple`
+    const [files, setFiles] = useState([]);
     const [error, setError] = useState("");
 
     const handleFileChange = (e) => {
-        const file = e.target.files[0];
-        validateFile(file);
+        validateFiles(Array.from(e.target.files));
     }
 
-    const validateFile = (file) => {
-        if (!file) return;
+    const validateFiles = (picked) => {
+        if (!multiple) picked = picked.slice(0, 1);
+        if (picked.length === 0) return;
 
         const validMIMEType = [
             // .csv
@@ -21,30 +22,35 @@ export default function FileUpload({ onUpload }) {
             // .xlsx
             "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
         ];
+        if (multiple) {
+            // .zip archives of exports
+            validMIMEType.push("application/zip", "application/x-zip-compressed");
+        }
+        // Browsers report no MIME type for Parquet / Arrow, so go by extension
+        const validExtension = /\.(parquet|arrow|feather|ipc)$/i;
 
-        if (!validMIMEType.includes(file.type)) {
-            setFile(null);
-            setError("Excel and CSV are allowed file types");
+        if (!picked.every((f) => validMIMEType.includes(f.type) || validExtension.test(f.name))) {
+            setFiles([]);
+            setError(multiple ? "Excel, CSV, Parquet / Arrow and ZIP are allowed file types" : "Excel, CSV and Parquet / Arrow are allowed file types");
             return;
         }
 
         setError("");
-        setFile(file);
+        setFiles(picked);
 
         // if (onUpload) onUpload(file);
     }
 
     const handleDragAndDrop = (e) => {
         e.preventDefault();
-        const droppedFile = e.dataTransfer.files[0];
-        validateFile(droppedFile);
+        validateFiles(Array.from(e.dataTransfer.files));
     }
 
     const handleImport = async () => {
-        if (onUpload && file) {
+        if (onUpload && files.length > 0) {
             try {
-                await onUpload(file);
-                setFile(null); // Clear the file after successful import
+                await onUpload(multiple ? files : files[0]);
+                setFiles([]); // Clear the file(s) after successful import
             } catch (err) {
                 console.error("Import failed:", err);
                 setError("Import failed. Please try again.");
@@ -61,7 +67,8 @@ export default function FileUpload({ onUpload }) {
             >
                 <input
                     type="file"
-                    accept=".csv, .xls, .xlsx"
+                    accept={multiple ? ".csv, .xls, .xlsx, .parquet, .arrow, .feather, .zip" : ".csv, .xls, .xlsx, .parquet, .arrow, .feather"}
+                    multiple={multiple}
                     onChange={handleFileChange}
                     className="hidden"
                     id="fileInput"
@@ -69,7 +76,7 @@ export default function FileUpload({ onUpload }) {
 
                 <label htmlFor="fileInput" className="group cursor-pointer w-full h-full flex flex-row justify-center items-center gap-8 rounded-full">
                     <p className="text-2xl text-[#0A1A33] font-extralight group-hover:text-white transition-colors duration-500 ease-in-out">
-                        {file ? file.name : "Upload"}
+                        {files.length === 0 ? "Upload" : files.length === 1 ? files[0].name : `${files.length} files`}
                     </p>
 
                     <svg
@@ -84,12 +91,12 @@ export default function FileUpload({ onUpload }) {
                 {error && <p className="text-2xl mb-2 text-red-500">{error}</p>}
             </div>
             <div className="">
-                {file && !error && (
+                {files.length > 0 && !error && (
                     <button
                     onClick={handleImport}
                     className="absolute top-[70%] left-1/2 -translate-x-1/2 px-8 py-3 bg-[#0A1A33] text-zinc-100 text-lg rounded-full shadow-lg hover:bg-[#13294B] transition-colors"
                     >
-                    Import File
+                    {files.length > 1 ? "Import Files" : "Import File"}
                     </button>
                 )}
             </div>